@@ -8,6 +8,7 @@ from pathlib import Path
 # Add parent directory to Python path to import from root
 sys.path.append(str(Path(__file__).parent.parent))
 from strategy import HighWinRateStrategy
+import indicators
 
 import matplotlib.pyplot as plt
 import seaborn as sns
@@ -86,27 +87,19 @@ class StrategyBacktester:
 
         
         # Calculate technical indicators
-        df['fast_ema'] = df['close'].ewm(span=self.strategy_params['fast_ema_period'], adjust=False).mean()
-        df['slow_ema'] = df['close'].ewm(span=self.strategy_params['slow_ema_period'], adjust=False).mean()
+        params = self.strategy_params
+        close, high, low, volume = df['close'], df['high'], df['low'], df['volume']
+        df['fast_ema'] = indicators.ema(close, params['fast_ema_period'])
+        df['slow_ema'] = indicators.ema(close, params['slow_ema_period'])
         
         # RSI
-        delta = df['close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=self.strategy_params['rsi_period']).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=self.strategy_params['rsi_period']).mean()
-        rs = gain / loss
-        df['rsi'] = 100 - (100 / (1 + rs))
+        df['rsi'] = indicators.rsi(close, params['rsi_period'])
         
         # VWAP
-        typical_price = (df['high'] + df['low'] + df['close']) / 3
-        df['vwap'] = (typical_price * df['volume']).rolling(window=self.strategy_params['vwap_period']).sum() / \
-                     df['volume'].rolling(window=self.strategy_params['vwap_period']).sum()
+        df['vwap'] = indicators.rolling_vwap(high, low, close, volume, params['vwap_period'])
         
         # ATR
-        high_low = df['high'] - df['low']
-        high_close = (df['high'] - df['close'].shift()).abs()
-        low_close = (df['low'] - df['close'].shift()).abs()
-        tr = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-        df['atr'] = tr.rolling(window=self.strategy_params['atr_period']).mean()
+        df['atr'] = indicators.atr(high, low, close, params['atr_period'])
         
         return df
 
@@ -0,0 +1,334 @@
+"""
+Bounded queues with explicit overload policies for MCX Trading System
+Every hand-off between threads on the tick path is a bounded queue whose
+behaviour when full is chosen up front and measured, rather than decided by
+whichever ``except`` happens to catch the overflow.
+
+- ``BLOCK``: the producer waits up to ``block_timeout`` for room; on timeout
+  the item is rejected and counted as dropped.
+- ``DROP_OLDEST``: FIFO; the oldest queued item makes room.
+- ``DROP_NEWEST``: FIFO; the incoming item is rejected.
+- ``COALESCE``: one pending item per key; a newer item replaces the queued
+  one in place, and a full queue drops its oldest key.
+- ``SPILL``: FIFO; overflow is appended to a JSON-lines file and read back in
+  order as the consumer catches up (also after a restart).
+
+Each queue counts enqueued, dequeued, dropped, coalesced and spilled items,
+keeps its high-water mark and a time-in-queue histogram. Overload is logged
+once when it starts and once when the queue has drained to half; never per
+item. Queues register by name and ``queue_stats`` reports all of them.
+"""
+import logging
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict, deque
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from latency import LatencyHistogram
+from serialization import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+# Overflow policies
+BLOCK = 'block'
+DROP_OLDEST = 'drop_oldest'
+DROP_NEWEST = 'drop_newest'
+COALESCE = 'coalesce'
+SPILL = 'spill'
+POLICIES = (BLOCK, DROP_OLDEST, DROP_NEWEST, COALESCE, SPILL)
+
+# Live queues by name (the owner keeps the queue alive)
+_registry: 'weakref.WeakValueDictionary[str, QueueMetrics]' = weakref.WeakValueDictionary()
+
+
+def queue_stats() -> Dict[str, Dict[str, Any]]:
+    """``stats()`` of every live queue, by name."""
+    return {name: queue.stats() for name, queue in sorted(list(_registry.items()))}
+
+
+class QueueMetrics:
+    """Counters and overload tracking shared by every bounded queue (see also ``ColumnBatcher``).
+
+    Subclasses update the counters under their own lock and call
+    ``_overflow`` / ``_drained`` around capacity transitions.
+    """
+
+    def __init__(self, name: str, maxsize: int, policy: str):
+        self.name = name
+        self.maxsize = int(maxsize)
+        self.policy = policy
+        self.queue_time = LatencyHistogram()   # time in queue, recorded by the consumer
+        self._overloaded = False
+        self._episode = (0, 0)           # (dropped, spilled) when the current overload began
+
+        # Counters
+        self.enqueued = 0
+        self.dequeued = 0
+        self.dropped = 0
+        self.spilled = 0
+        self.high_water = 0
+        self.overloads = 0
+        _registry[name] = self
+
+    def _overflow(self, dropped: bool = True):
+        if dropped:
+            self.dropped += 1
+        else:
+            self.spilled += 1
+        if not self._overloaded:
+            self._overloaded = True
+            self.overloads += 1
+            self._episode = (self.dropped - dropped, self.spilled - (not dropped))
+            logger.warning(f"⚠️ Queue '{self.name}' full ({self.maxsize}, {self.policy}) - overload started")
+
+    def _drained(self, depth: int):
+        if self._overloaded and depth <= self.maxsize // 2:
+            self._overloaded = False
+            dropped, spilled = self.dropped - self._episode[0], self.spilled - self._episode[1]
+            logger.info(f"✅ Queue '{self.name}' drained: {dropped} dropped, {spilled} spilled during overload")
+
+    def metrics(self, depth: int) -> Dict[str, Any]:
+        return {
+            'policy': self.policy,
+            'maxsize': self.maxsize,
+            'depth': depth,
+            'high_water': self.high_water,
+            'enqueued': self.enqueued,
+            'dequeued': self.dequeued,
+            'dropped': self.dropped,
+            'spilled': self.spilled,
+            'overloads': self.overloads,
+            'overloaded': self._overloaded,
+            'time_in_queue': self.queue_time.snapshot(),
+        }
+
+
+class BoundedQueue(QueueMetrics):
+    """Thread-safe bounded FIFO (or per-key) queue with one of ``POLICIES``."""
+
+    def __init__(self, name: str, maxsize: int = 1000, policy: str = DROP_OLDEST,
+                 key: Optional[Callable[[Any], Hashable]] = None, block_timeout: Optional[float] = None,
+                 spill_path: Optional[str] = None):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy: {policy}")
+        if policy == COALESCE and key is None:
+            raise ValueError("COALESCE policy needs a key function")
+        if policy == SPILL and not spill_path:
+            raise ValueError("SPILL policy needs a spill_path")
+        super().__init__(name, maxsize, policy)
+        self.key = key
+        self.block_timeout = block_timeout
+        self.spill_path = spill_path
+        # (enqueue time_ns, item) pairs
+        self._items = OrderedDict() if policy == COALESCE else deque()
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._spill_writer = None
+        self._spill_reader = None
+        self._spill_pending = 0
+
+        # Counters
+        self.coalesced = 0
+        self.blocked = 0
+
+        if policy == SPILL:
+            self._open_spill()
+
+    def __len__(self) -> int:
+        return len(self._items) + self._spill_pending
+
+    # ------------------------------------------------------------------
+    # Producer side
+    # ------------------------------------------------------------------
+
+    def put(self, item: Any) -> bool:
+        """Enqueue ``item``; False if the policy rejected it (it is counted, never logged)."""
+        now = time.time_ns()
+        with self._lock:
+            self.enqueued += 1
+            items = self._items
+            if self.policy == COALESCE:
+                k = self.key(item)
+                if k in items:
+                    items[k] = (now, item)   # keeps its place in line
+                    self.coalesced += 1
+                    return True
+                if len(items) >= self.maxsize:
+                    items.popitem(last=False)
+                    self._overflow()
+                items[k] = (now, item)
+            else:
+                if self._spill_pending or len(items) >= self.maxsize:
+                    if self.policy == SPILL:
+                        # Once anything is on disk, newer items queue behind it to keep FIFO order
+                        ok = self._spill(now, item)
+                        self._overflow(dropped=not ok)
+                        self._not_empty.notify()
+                        return ok
+                    if self.policy == DROP_NEWEST:
+                        self._overflow()
+                        return False
+                    if self.policy == DROP_OLDEST:
+                        items.popleft()
+                        self._overflow()
+                    else:
+                        self.blocked += 1
+                        if not self._not_full.wait_for(lambda: len(items) < self.maxsize, self.block_timeout):
+                            self._overflow()
+                            return False
+                        now = time.time_ns()
+                items.append((now, item))
+            if len(items) > self.high_water:
+                self.high_water = len(items)
+            self._not_empty.notify()
+        return True
+
+    # ------------------------------------------------------------------
+    # Consumer side
+    # ------------------------------------------------------------------
+
+    def _available(self) -> bool:
+        return bool(self._items) or self._spill_pending > 0
+
+    def _pop(self, now: int) -> Any:
+        if self.policy == COALESCE:
+            queued_ns, item = self._items.popitem(last=False)[1]
+        else:
+            queued_ns, item = self._items.popleft()
+        self.dequeued += 1
+        self.queue_time.record((now - queued_ns) // 1000)
+        return item
+
+    def _after_pop(self):
+        depth = len(self._items)
+        if self._spill_pending and depth <= self.maxsize // 2:
+            self._refill()
+            depth = len(self._items)
+        self._not_full.notify()
+        self._drained(depth + self._spill_pending)
+
+    def get(self, timeout: Optional[float] = None) -> Tuple[Any, bool]:
+        """(item, True), or (None, False) if nothing arrived within ``timeout`` seconds."""
+        with self._lock:
+            if not self._items:
+                if not self._not_empty.wait_for(self._available, timeout):
+                    return None, False
+                if not self._items:
+                    self._refill()
+                    if not self._items:
+                        return None, False
+            item = self._pop(time.time_ns())
+            self._after_pop()
+        return item, True
+
+    def get_many(self, max_items: int, timeout: Optional[float] = 0) -> List[Any]:
+        """Up to ``max_items`` queued items, oldest first, waiting at most ``timeout`` for the first."""
+        with self._lock:
+            if not self._available() and not timeout:
+                return []
+            if not self._not_empty.wait_for(self._available, timeout):
+                return []
+            if not self._items:
+                self._refill()
+            now = time.time_ns()
+            out = []
+            while self._items and len(out) < max_items:
+                out.append(self._pop(now))
+                if not self._items and self._spill_pending:
+                    self._refill()
+            self._after_pop()
+        return out
+
+    # ------------------------------------------------------------------
+    # Spill file (lock held by the caller)
+    # ------------------------------------------------------------------
+
+    def _open_spill(self):
+        os.makedirs(os.path.dirname(self.spill_path) or '.', exist_ok=True)
+        if os.path.isfile(self.spill_path):
+            with open(self.spill_path, 'rb') as f:
+                self._spill_pending = sum(1 for _ in f)
+            if self._spill_pending:
+                logger.info(f"📂 Queue '{self.name}' resuming {self._spill_pending} spilled items "
+                            f"from {self.spill_path}")
+        self._spill_writer = open(self.spill_path, 'ab')
+
+    def _spill(self, now: int, item: Any) -> bool:
+        if self._spill_writer is None:
+            return False   # closed
+        try:
+            self._spill_writer.write(dumps([now, item]) + b'\n')
+        except (OSError, TypeError, ValueError) as e:
+            logger.error(f"❌ Queue '{self.name}' spill failed: {e}")
+            return False
+        self._spill_pending += 1
+        return True
+
+    def _refill(self):
+        """Move spilled items back into memory, oldest first, up to ``maxsize``."""
+        if not self._spill_pending:
+            return
+        try:
+            self._spill_writer.flush()
+            if self._spill_reader is None:
+                self._spill_reader = open(self.spill_path, 'rb')
+            while self._spill_pending and len(self._items) < self.maxsize:
+                line = self._spill_reader.readline()
+                if not line:
+                    # Count was off (e.g. a torn last line after a crash)
+                    self._spill_pending = 0
+                    break
+                self._spill_pending -= 1
+                try:
+                    queued_ns, item = loads(line)
+                except ValueError:
+                    self.dropped += 1
+                    continue
+                self._items.append((queued_ns, item))
+            if not self._spill_pending:
+                self._spill_reader.close()
+                self._spill_reader = None
+                self._spill_writer.truncate(0)
+        except OSError as e:
+            logger.error(f"❌ Queue '{self.name}' spill read failed, {self._spill_pending} items lost: {e}")
+            self.dropped += self._spill_pending
+            self._spill_pending = 0
+
+    def close(self):
+        """Stop spilling; a SPILL queue writes everything still queued back to its file, oldest first.
+
+        The next queue opened on the same path resumes from there, so closed
+        bars survive a restart instead of dying with the process.
+        """
+        with self._lock:
+            if self._spill_writer is None:
+                return
+            try:
+                self._spill_writer.flush()
+                if self._spill_reader is None and self._spill_pending:
+                    self._spill_reader = open(self.spill_path, 'rb')
+                rest = self._spill_reader.read() if self._spill_reader is not None else b''
+                tmp = f"{self.spill_path}.tmp"
+                with open(tmp, 'wb') as f:
+                    for queued_ns, item in self._items:
+                        f.write(dumps([queued_ns, item]) + b'\n')
+                    f.write(rest)
+                os.replace(tmp, self.spill_path)
+                if self._items:
+                    logger.info(f"💾 Queue '{self.name}' kept {len(self._items) + self._spill_pending} "
+                                f"unsent items in {self.spill_path}")
+            except (OSError, TypeError, ValueError) as e:
+                logger.error(f"❌ Queue '{self.name}' could not save unsent items: {e}")
+            finally:
+                for f in (self._spill_reader, self._spill_writer):
+                    if f is not None:
+                        f.close()
+                self._spill_reader = self._spill_writer = None
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.metrics(len(self._items))
+        stats.update(coalesced=self.coalesced, blocked=self.blocked, spill_pending=self._spill_pending)
+        return stats
@@ -9,6 +9,8 @@ import time
 import random
 from typing import Any, Dict
 
+from instrument_index import get_instrument_index
+
 try:
     from SmartApi import SmartConnect  # type: ignore
 except ImportError:  # pragma: no cover – keeps mypy happy if library absent
@@ -98,22 +100,12 @@ class Broker:
                 symbol_token = numeric
             else:
                 # Fallback: try lookup by trading_symbol directly
-                from pathlib import Path
-                import pandas as pd
-                instruments_path = Path("instruments")
-                if instruments_path.exists():
-                    # choose most recent csv
-                    csv_files = sorted(instruments_path.glob("*_instrument_file.csv"), key=lambda p: p.stat().st_mtime, reverse=True)
-                    if csv_files:
-                        df = pd.read_csv(csv_files[0], low_memory=False)
-                        col = 'tradingsymbol' if 'tradingsymbol' in df.columns else 'symbol'
-                        match = df[df[col] == trading_symbol]
-                        if not match.empty:
-                            numeric = str(match.iloc[0]['token'])
-                            logger.warning("Trading symbol lookup: %s -> token %s", trading_symbol, numeric)
-                            symbol_token = numeric
-                        else:
-                            return {"error": f"Invalid symbol_token {symbol_token}"}
+                index = get_instrument_index()
+                match = index.by_symbol(trading_symbol) if index is not None else None
+                if match is not None:
+                    numeric = match['token']
+                    logger.warning("Trading symbol lookup: %s -> token %s", trading_symbol, numeric)
+                    symbol_token = numeric
                 else:
                     return {"error": f"Invalid symbol_token {symbol_token}"}
 
@@ -0,0 +1,345 @@
+"""
+Columnar multi-interval candle store for MCX Trading System
+One fixed-size ring of OHLCV columns per (contract, interval), maintained by
+hierarchical roll-up from 1s base bars.
+
+Ticks only touch the base bar. When a bar closes it is folded into the next
+coarser interval (1s -> 5s -> 10s -> 30s -> 1min -> ...), so coarse intervals
+cost one fold per finer bar instead of work on every tick. The still-open
+coarse bar is derived on read by merging its ring row with the open finer
+bars below it.
+
+Bars are keyed by bucket start (epoch ms, aligned to IST midnight, see
+``timeutil``). Readers get the last N bars as zero-copy NumPy views, or a
+DataFrame copy that includes the live partial bar.
+
+With a session calendar (``market_calendar``) ticks outside trading hours
+are dropped, so bars exist only for traded buckets; ``frame(fill=True)``
+fills short intra-session gaps at read time instead of storing flat bars.
+An ``on_close`` callback sees every bar as it closes (for persistence).
+"""
+import logging
+from typing import Callable, Dict, Any, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from market_calendar import MAX_FILL_BARS, SessionCalendar, fill_gaps
+from ring_buffer import SeqLock, TickRingBuffer
+from timeutil import interval_ms, floor_ist_ms, ist_index
+
+logger = logging.getLogger(__name__)
+
+CANDLE_COLUMNS = {
+    'bucket_start': np.int64,   # epoch ms
+    'open': np.float64,
+    'high': np.float64,
+    'low': np.float64,
+    'close': np.float64,
+    'volume': np.int64,         # exchange day volume at the last tick of the bar
+    'oi': np.int64,
+}
+PRICE_FIELDS = ('open', 'high', 'low', 'close', 'volume', 'oi')
+
+# (bucket_start, open, high, low, close, volume, oi)
+Bar = Tuple[int, float, float, float, float, int, int]
+# on_close(key, interval, bar), called on the writer thread; must not block
+CloseCallback = Callable[[str, str, Bar], None]
+
+
+class CandleSeries:
+    """Ring of bars for one contract and interval."""
+
+    def __init__(self, step_ms: int, capacity: int = 1000, parent: Optional['CandleSeries'] = None,
+                 interval: Optional[str] = None):
+        self.step_ms = int(step_ms)
+        self.interval = interval
+        self.ring = TickRingBuffer(capacity, CANDLE_COLUMNS)
+        self.parent = parent
+        self.children: List['CandleSeries'] = []
+        # The open bar is mirrored in scalars so updates never read the arrays back
+        self._bar: Optional[list] = None
+        self.late_dropped = 0
+
+    def __len__(self) -> int:
+        return len(self.ring)
+
+    @property
+    def last_bucket(self) -> Optional[int]:
+        return self._bar[0] if self._bar else None
+
+    def fold(self, bucket: int, o: float, h: float, l: float, c: float, v: int = 0, oi: int = 0) -> Optional[Bar]:
+        """Merge a tick (o=h=l=c) or a finer bar into ``bucket``; returns the bar this closed, if any."""
+        bar = self._bar
+        if bar is not None and bucket == bar[0]:
+            row = {'close': c}
+            bar[4] = c
+            if h > bar[2]:
+                bar[2] = row['high'] = h
+            if l < bar[3]:
+                bar[3] = row['low'] = l
+            if v > 0:
+                bar[5] = row['volume'] = v
+            if oi > 0:
+                bar[6] = row['oi'] = oi
+            self.ring.update_last(row)
+            return None
+        if bar is None or bucket > bar[0]:
+            self.ring.append({'bucket_start': bucket, 'open': o, 'high': h, 'low': l,
+                              'close': c, 'volume': v, 'oi': oi})
+            self._bar = [bucket, o, h, l, c, v, oi]
+            return tuple(bar) if bar is not None else None
+        self.widen(bucket, h, l)
+        return None
+
+    def widen(self, bucket: int, h: float, l: float):
+        """Late data for an already-closed bar: widen its range if it is still in the ring."""
+        if self._bar is not None and bucket == self._bar[0]:
+            self.fold(bucket, self._bar[1], max(h, self._bar[2]), min(l, self._bar[3]), self._bar[4])
+            return
+        starts = self.ring.view('bucket_start')
+        i = int(np.searchsorted(starts, bucket))
+        if i >= len(starts) or starts[i] != bucket:
+            self.late_dropped += 1
+            return
+        offset = len(starts) - i
+        if h > self.ring.last('high', offset):
+            self.ring.set_last('high', h, offset)
+        if l < self.ring.last('low', offset):
+            self.ring.set_last('low', l, offset)
+
+    def live_bar(self) -> Optional[Bar]:
+        """The newest bar including finer data that has not been folded in yet.
+
+        Each finer level's open bar has not been folded upwards yet (the 1min
+        bar for 12:37 stays open until a 12:38 bar arrives from 30s, even
+        after the 30s level has moved on), so every level's pending bar is
+        merged, oldest (coarsest) first.
+        """
+        bar = None
+        series = self
+        while series is not None:
+            pending = series._bar
+            series = series.parent
+            if pending is None:
+                continue
+            bucket = floor_ist_ms(pending[0], self.step_ms)
+            if bar is None or bucket > bar[0]:
+                bar = (bucket,) + tuple(pending[1:])
+            elif bucket == bar[0]:
+                bar = (bucket, bar[1], max(bar[2], pending[2]), min(bar[3], pending[3]), pending[4],
+                       pending[5] if pending[5] > 0 else bar[5], pending[6] if pending[6] > 0 else bar[6])
+        return bar
+
+    def columns(self, n: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Zero-copy views of the newest ``n`` ring rows (oldest first).
+
+        For roll-up intervals the newest row lags the open finer bars; use
+        ``live_bar`` (or ``CandleStore.frame``) for the up-to-the-tick bar.
+        """
+        return {name: self.ring.view(name, n) for name in CANDLE_COLUMNS}
+
+
+class CandleStore:
+    """Candle series for every (contract, interval) pair, rolled up from the finest interval.
+
+    Each interval's parent is the largest finer interval that divides it; the
+    finest interval is fed by ticks. A single writer (the tick worker) calls
+    ``update``; ``frame`` copies are made consistent with it by a sequence
+    lock, so chart reads never block the tick path.
+    """
+
+    def __init__(self, intervals: Iterable[str], capacity: Union[int, Dict[str, int]] = 1000,
+                 calendar: Optional[SessionCalendar] = None, on_close: Optional[CloseCallback] = None):
+        self.capacity = capacity
+        self.calendar = calendar
+        self.on_close = on_close
+        self.off_session = 0
+        self._seqlock = SeqLock()
+        self._series: Dict[Tuple[str, str], CandleSeries] = {}
+        self._base: Dict[str, CandleSeries] = {}
+        # Per-contract counter, bumped on every bar change (response caches key on it)
+        self._versions: Dict[str, int] = {}
+        self.set_intervals(intervals)
+
+    def set_intervals(self, intervals: Iterable[str]):
+        steps = sorted({interval_ms(i): i for i in intervals}.items())
+        if not steps:
+            raise ValueError("At least one interval is required")
+        names = dict(steps)
+        base_step = steps[0][0]
+        parents = {}
+        for i, (step, interval) in enumerate(steps):
+            if step % base_step:
+                raise ValueError(f"{interval} is not a multiple of the base interval {names[base_step]}")
+            divisors = [other for other, _ in steps[:i] if step % other == 0]
+            parents[interval] = names[divisors[-1]] if divisors else None
+        self.intervals = [interval for _, interval in steps]
+        self._steps = {interval: step for step, interval in steps}
+        self._parents = parents
+        with self._seqlock:
+            self._series.clear()
+            self._base.clear()
+            for key in self._versions:
+                self._versions[key] += 1
+
+    def _capacity(self, interval: str) -> int:
+        if isinstance(self.capacity, dict):
+            return int(self.capacity.get(interval, self.capacity.get('default', 1000)))
+        return int(self.capacity)
+
+    def _create(self, key: str) -> CandleSeries:
+        created: Dict[str, CandleSeries] = {}
+        for interval in self.intervals:
+            parent = created.get(self._parents[interval])
+            series = CandleSeries(self._steps[interval], self._capacity(interval), parent, interval)
+            if parent is not None:
+                parent.children.append(series)
+            created[interval] = series
+            self._series[(key, interval)] = series
+        base = created[self.intervals[0]]
+        self._base[key] = base
+        return base
+
+    def _propagate(self, key: str, series: CandleSeries, closed: Bar):
+        if self.on_close is not None:
+            try:
+                self.on_close(key, series.interval, closed)
+            except Exception as e:
+                logger.error(f"Bar close callback failed for {key} {series.interval}: {e}")
+        for child in series.children:
+            bucket = floor_ist_ms(closed[0], child.step_ms)
+            child_closed = child.fold(bucket, *closed[1:])
+            if child_closed is not None:
+                self._propagate(key, child, child_closed)
+
+    def update(self, key: str, ts_ms: int, price: float, volume: int = 0, oi: int = 0) -> int:
+        """Fold a tick into the base bar of ``key``; returns the number of bars touched."""
+        if self.calendar is not None and not self.calendar.in_session(ts_ms):
+            self.off_session += 1
+            return 0
+        with self._seqlock:
+            base = self._base.get(key) or self._create(key)
+            self._versions[key] = self._versions.get(key, 0) + 1
+            bucket = floor_ist_ms(ts_ms, base.step_ms)
+            last = base.last_bucket
+            if last is not None and bucket < last:
+                # Late tick: widen the bar it belongs to at every level
+                for interval in self.intervals:
+                    series = self._series[(key, interval)]
+                    series.widen(floor_ist_ms(ts_ms, series.step_ms), price, price)
+                return len(self.intervals)
+            closed = base.fold(bucket, price, price, price, price, volume, oi)
+            if closed is None:
+                return 1
+            self._propagate(key, base, closed)
+            return len(self.intervals)
+
+    def version(self, key: str) -> int:
+        """Monotonic change counter for ``key`` (0 if it has never been updated)."""
+        return self._versions.get(key, 0)
+
+    def keys(self) -> List[str]:
+        return list(self._base)
+
+    def series(self, key: str, interval: str) -> Optional[CandleSeries]:
+        return self._series.get((key, interval))
+
+    def last(self, key: str, interval: str, n: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Zero-copy column views of the newest ``n`` bars (empty dict if unknown)."""
+        series = self._series.get((key, interval))
+        return series.columns(n) if series is not None else {}
+
+    def frame(self, key: str, interval: str, n: Optional[int] = None,
+              fill: bool = False, max_fill: int = MAX_FILL_BARS) -> pd.DataFrame:
+        """Newest ``n`` bars, live partial bar included, indexed by IST bar start (a copy).
+
+        ``fill`` adds flat bars for gaps of up to ``max_fill`` buckets inside
+        a session (see ``market_calendar.fill_gaps``); ``n`` still caps the result.
+        """
+        series = self._series.get((key, interval))
+        if series is None:
+            return pd.DataFrame(columns=list(PRICE_FIELDS))
+        cols, live = self._seqlock.read(lambda: (
+            {name: view.copy() for name, view in series.columns(n).items()}, series.live_bar()))
+        if live is None and not len(cols['bucket_start']):
+            return pd.DataFrame(columns=list(PRICE_FIELDS))
+        if live is not None:
+            if len(cols['bucket_start']) and live[0] == cols['bucket_start'][-1]:
+                for name, value in zip(CANDLE_COLUMNS, live):
+                    cols[name][-1] = value
+            elif not len(cols['bucket_start']) or live[0] > cols['bucket_start'][-1]:
+                keep = slice(1, None) if n is not None and len(cols['bucket_start']) >= n else slice(None)
+                cols = {name: np.append(col[keep], np.array([value], dtype=col.dtype))
+                        for (name, col), value in zip(cols.items(), live)}
+        if fill:
+            cols = fill_gaps(cols, series.step_ms, max_fill)
+            if n is not None and len(cols['bucket_start']) > n:
+                cols = {name: col[-n:] for name, col in cols.items()}
+        index = ist_index(cols.pop('bucket_start'))
+        index.name = 'timestamp'
+        return pd.DataFrame(cols, index=index)
+
+    def export_state(self) -> Dict[str, np.ndarray]:
+        """Every series packed into a few arrays (warm-start snapshot).
+
+        ``rows`` stacks all ring rows as float64 (epoch ms, prices and counts
+        are exact), ``offsets`` delimits each series named in ``series``
+        ('<key>|<interval>'), and ``open`` holds each series' open bar (NaN
+        row if none). Each series is copied consistently with the writer; the
+        set as a whole may straddle a tick.
+        """
+        names, blocks, open_bars = [], [], []
+        for (key, interval), series in list(self._series.items()):
+            block, bar = self._seqlock.read(lambda series=series: (
+                np.column_stack([view.astype(np.float64) for view in series.columns().values()]),
+                list(series._bar) if series._bar is not None else [np.nan] * len(CANDLE_COLUMNS)))
+            names.append(f"{key}|{interval}")
+            blocks.append(block.reshape(-1, len(CANDLE_COLUMNS)))
+            open_bars.append(bar)
+        return {
+            'series': np.array(names, dtype=str),
+            'offsets': np.cumsum([0] + [len(block) for block in blocks], dtype=np.int64),
+            'rows': np.concatenate(blocks) if blocks else np.empty((0, len(CANDLE_COLUMNS))),
+            'open': np.array(open_bars, dtype=np.float64).reshape(-1, len(CANDLE_COLUMNS)),
+        }
+
+    def load_state(self, state: Dict[str, np.ndarray]) -> int:
+        """Restore series from ``export_state`` arrays; returns the number of contracts loaded.
+
+        Intervals no longer configured are ignored; new ones start empty.
+        """
+        if 'series' not in state:
+            return 0
+        offsets, rows, open_bars = state['offsets'], state['rows'], state['open']
+        keys = set()
+        with self._seqlock:
+            for i, name in enumerate(state['series'].tolist()):
+                key, interval = name.rsplit('|', 1)
+                if interval not in self._steps:
+                    continue
+                if key not in self._base:
+                    self._create(key)
+                keys.add(key)
+                series = self._series[(key, interval)]
+                block = rows[offsets[i]:offsets[i + 1]]
+                series.ring.restore({column: block[:, j] for j, column in enumerate(CANDLE_COLUMNS)})
+                bar = open_bars[i]
+                series._bar = (None if np.isnan(bar[0]) else
+                               [int(bar[0]), float(bar[1]), float(bar[2]), float(bar[3]), float(bar[4]),
+                                int(bar[5]), int(bar[6])])
+            for key in keys:
+                self._versions[key] = self._versions.get(key, 0) + 1
+        return len(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        series = list(self._series.values())
+        return {
+            'contracts': len(self._base),
+            'intervals': self.intervals,
+            'series': len(series),
+            'bars': sum(len(s) for s in series),
+            'late_dropped': sum(s.late_dropped for s in series),
+            'off_session': self.off_session,
+            'read_retries': self._seqlock.retries,
+        }
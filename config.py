@@ -14,6 +14,7 @@ class Config:
     
     # Socket.IO settings
     SOCKETIO_MESSAGE_QUEUE = os.getenv('REDIS_URL', None)
+    SOCKET_PUBLISH_HZ = float(os.getenv('SOCKET_PUBLISH_HZ', 5))  # batched UI frames per second
     
     # API settings
     API_KEY = os.getenv('API_KEY')
@@ -47,6 +48,13 @@ class Config:
     LOG_FILE = os.getenv('LOG_FILE', 'logs/trading_bot.log')
     LOG_MAX_SIZE = os.getenv('LOG_MAX_SIZE', '10MB')
     LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', 5))
+    LOG_TICK_SAMPLE = int(os.getenv('LOG_TICK_SAMPLE', 100))    # log 1 in N ticks to the app log
+    LOG_SCORE_SAMPLE = int(os.getenv('LOG_SCORE_SAMPLE', 20))   # log 1 in N signal score lines
+    LOG_HOT_RATE = float(os.getenv('LOG_HOT_RATE', 5))          # max hot-path error lines per second
+    TICK_LOG_ENABLED = os.getenv('TICK_LOG_ENABLED', 'true').lower() == 'true'
+    TICK_LOG_DIR = os.getenv('TICK_LOG_DIR', 'logs/ticks')      # raw ticks as JSON lines, one file per day
+    TICK_JOURNAL_ENABLED = os.getenv('TICK_JOURNAL_ENABLED', 'true').lower() == 'true'
+    TICK_JOURNAL_DIR = os.getenv('TICK_JOURNAL_DIR', 'buffer/journal')  # write-ahead ticks for QuestDB
 
     # WebSocket Configuration
     WS_RECONNECT_ATTEMPTS = int(os.getenv('WS_RECONNECT_ATTEMPTS', 5))
@@ -62,7 +70,13 @@ class Config:
 
     # Market Data Configuration
     MARKET_DATA_BUFFER_SIZE = int(os.getenv('MARKET_DATA_BUFFER_SIZE', 1000))
+    ATM_LADDER_WIDTH = int(os.getenv('ATM_LADDER_WIDTH', 2))                       # strikes either side of ATM
+    ATM_RECENTER_HYSTERESIS = float(os.getenv('ATM_RECENTER_HYSTERESIS', 0.25))   # fraction of a strike step
     OHLC_INTERVALS = os.getenv('OHLC_INTERVALS', '1s,5s,30s,1min,5min,15min,1h')
+    MCX_HOLIDAYS = os.getenv('MCX_HOLIDAYS', '').split(',')                        # closed weekdays, YYYY-MM-DD
+    WARM_START_FILE = os.getenv('WARM_START_FILE', 'buffer/warm_start.npz')       # bars + strategy windows snapshot
+    WARM_START_INTERVAL = float(os.getenv('WARM_START_INTERVAL', 30))             # seconds between snapshots
+    WARM_START_BACKFILL_MINUTES = int(os.getenv('WARM_START_BACKFILL_MINUTES', 15))  # replayed when no snapshot
 
     # Monitoring Configuration
     HEALTH_CHECK_INTERVAL = int(os.getenv('HEALTH_CHECK_INTERVAL', 60))
@@ -1,10 +1,11 @@
 import asyncio
-import math
 from datetime import datetime
 from typing import List, Dict, Tuple
 
+import numpy as np
 import pandas as pd
-from scipy.stats import norm
+
+import option_pricing
 
 from mcxlib.market_data import (
     get_recent_expires,
@@ -37,18 +38,10 @@ def round_nearest(x: float, step: int = 50) -> int:
 
 
 def calculate_greeks(S, K, T, r, sigma, option_type="call"):
-    if T <= 0 or sigma == 0:
-        return 0, 0, 0, 0
-    d1 = (math.log(S / K) + (r + 0.5 * sigma * sigma) * T) / (sigma * math.sqrt(T))
-    d2 = d1 - sigma * math.sqrt(T)
-    delta = norm.cdf(d1) if option_type == "call" else -norm.cdf(-d1)
-    gamma = norm.pdf(d1) / (S * sigma * math.sqrt(T))
-    vega = S * norm.pdf(d1) * math.sqrt(T) / 100
-    theta = (
-        -S * norm.pdf(d1) * sigma / (2 * math.sqrt(T))
-        - r * K * math.exp(-r * T) * (norm.cdf(d2) if option_type == "call" else norm.cdf(-d2))
-    ) / 365
-    return delta, gamma, theta, vega
+    """Delta, gamma, theta, vega for arrays of strikes (zeros where T or sigma is 0)."""
+    g = option_pricing.greeks(S, K, T, r, sigma, option_type)
+    live = (np.asarray(T) > 0) & (np.asarray(sigma) != 0)
+    return tuple(np.where(live, g[name], 0.0) for name in ("delta", "gamma", "theta", "vega"))
 
 # ------------------------- Core logic --------------------------------
 
@@ -116,19 +109,30 @@ def process_chain(df: pd.DataFrame, fut_ltp: float, expiry: str) -> Tuple[List[D
     T = max((datetime.strptime(expiry, "%d%b%Y") - datetime.now()).days, 1) / 365
     r = 0.06
 
-    for _, row in subset.iterrows():
-        strike = int(row[strike_col])
-        ce_oi = int(row.get("CE_OpenInterest", 0))
-        pe_oi = int(row.get("PE_OpenInterest", 0))
-        ce_ltp = float(row.get("CE_LTP", 0))
-        pe_ltp = float(row.get("PE_LTP", 0))
-        ce_vol = int(row.get("CE_Volume", 0))
-        pe_vol = int(row.get("PE_Volume", 0))
-        iv_ce = float(row.get("CE_ImpliedVolatility", 22)) / 100
-        iv_pe = float(row.get("PE_ImpliedVolatility", 22)) / 100
-
-        delta_ce, gamma_ce, theta_ce, vega_ce = calculate_greeks(fut_ltp, strike, T, r, iv_ce, "call")
-        delta_pe, gamma_pe, theta_pe, vega_pe = calculate_greeks(fut_ltp, strike, T, r, iv_pe, "put")
+    def column(name, default):
+        return subset[name] if name in subset.columns else pd.Series(default, index=subset.index)
+
+    strikes = subset[strike_col].to_numpy(dtype=float)
+    iv_ce_all = column("CE_ImpliedVolatility", 22).to_numpy(dtype=float) / 100
+    iv_pe_all = column("PE_ImpliedVolatility", 22).to_numpy(dtype=float) / 100
+    # Greeks for the whole ladder in one vectorized pass per side
+    greeks_ce = calculate_greeks(fut_ltp, strikes, T, r, iv_ce_all, "call")
+    greeks_pe = calculate_greeks(fut_ltp, strikes, T, r, iv_pe_all, "put")
+
+    rows = zip(
+        strikes.tolist(),
+        column("CE_OpenInterest", 0).tolist(), column("PE_OpenInterest", 0).tolist(),
+        column("CE_LTP", 0).tolist(), column("PE_LTP", 0).tolist(),
+        column("CE_Volume", 0).tolist(), column("PE_Volume", 0).tolist(),
+        iv_ce_all.tolist(), iv_pe_all.tolist(),
+        zip(*(g.tolist() for g in greeks_ce)), zip(*(g.tolist() for g in greeks_pe)),
+    )
+    for (strike, ce_oi, pe_oi, ce_ltp, pe_ltp, ce_vol, pe_vol, iv_ce, iv_pe,
+         (delta_ce, gamma_ce, theta_ce, vega_ce), (delta_pe, gamma_pe, theta_pe, vega_pe)) in rows:
+        strike = int(strike)
+        ce_oi, pe_oi = int(ce_oi), int(pe_oi)
+        ce_ltp, pe_ltp = float(ce_ltp), float(pe_ltp)
+        ce_vol, pe_vol = int(ce_vol), int(pe_vol)
 
         oi_data.append({
             "Symbol": "CRUDEOIL", "Strike": strike,
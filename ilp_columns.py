@@ -0,0 +1,256 @@
+"""
+Columnar ILP batching for MCX Trading System
+Ticks are written field by field into preallocated typed NumPy columns as
+they arrive; a flush hands the filled slice to the QuestDB sender as one
+DataFrame, with no per-tick dicts, DataFrame construction or re-parsing.
+
+- ``ColumnBuffer`` is one batch: fixed capacity, one array per column,
+  timestamps kept as int64 epoch ms and converted in a single vectorised
+  step when the frame is built.
+- ``ColumnBatcher`` double-buffers two of them. Producers ``append`` into
+  the active buffer under a short lock; the writer thread ``swap``s and
+  sends the full one while producers keep filling the other. Overflow is
+  handled and counted like any ``bounded_queue`` queue.
+
+Run ``python ilp_columns.py`` to benchmark sustained ticks/sec and CPU per
+tick against the dict -> DataFrame path it replaces.
+"""
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from bounded_queue import BLOCK, DROP_NEWEST, QueueMetrics
+from timeutil import to_ms
+
+logger = logging.getLogger(__name__)
+
+# (column, tick key, kind) - kind is 'symbol', 'float' or 'int'
+Field = Tuple[str, str, str]
+
+# mcx_ticks, fed by QuestDBManager
+MCX_TICK_FIELDS: List[Field] = [
+    ('symbol', 'symbol', 'symbol'),
+    ('type', 'type', 'symbol'),
+    ('ltp', 'ltp', 'float'),
+    ('volume', 'volume', 'int'),
+    ('oi', 'oi', 'int'),
+    ('open', 'open', 'float'),
+    ('high', 'high', 'float'),
+    ('low', 'low', 'float'),
+]
+
+# tick_data, fed by UltraFastQuestDBManager
+ULTRA_TICK_FIELDS: List[Field] = [
+    ('token', 'token', 'symbol'),
+    ('contract_type', 'contract_type', 'symbol'),
+    ('ltp', 'ltp', 'float'),
+    ('volume', 'volume', 'int'),
+    ('oi', 'oi', 'int'),
+    ('open_price', 'open_price', 'float'),
+    ('high_price', 'high_price', 'float'),
+    ('low_price', 'low_price', 'float'),
+    ('change_pct', 'change_pct', 'float'),
+]
+
+_DTYPES = {'symbol': object, 'float': np.float64, 'int': np.int64}
+_DEFAULTS = {'symbol': '', 'float': 0.0, 'int': 0}
+
+
+class ColumnBuffer:
+    """One ILP batch as preallocated typed columns."""
+
+    def __init__(self, capacity: int, fields: Iterable[Field], timestamp_key: str = 'timestamp'):
+        self.capacity = int(capacity)
+        self.fields = list(fields)
+        self.timestamp_key = timestamp_key
+        self.timestamps = np.zeros(self.capacity, dtype=np.int64)   # epoch ms
+        self.columns = {name: np.full(self.capacity, _DEFAULTS[kind], dtype=_DTYPES[kind])
+                        for name, _, kind in self.fields}
+        self.symbols = [name for name, _, kind in self.fields if kind == 'symbol']
+        self._symbols = [(self.columns[name], key) for name, key, kind in self.fields if kind == 'symbol']
+        self._values = [(self.columns[name], key, _DEFAULTS[kind]) for name, key, kind in self.fields
+                        if kind != 'symbol']
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def full(self) -> bool:
+        return self.size >= self.capacity
+
+    def append(self, tick: Dict[str, Any]) -> bool:
+        """Write one tick into the next row; False (nothing written) if the buffer is full."""
+        i = self.size
+        if i >= self.capacity:
+            return False
+        ts = tick.get(self.timestamp_key)
+        # The tick path carries int epoch ms; anything else is a legacy value
+        self.timestamps[i] = ts if type(ts) is int else to_ms(ts) or 0
+        for column, key in self._symbols:
+            value = tick.get(key)
+            column[i] = value if type(value) is str else ('' if value is None else str(value))
+        for column, key, default in self._values:
+            value = tick.get(key)
+            column[i] = default if value is None else value
+        self.size = i + 1
+        return True
+
+    def frame(self, timestamp_column: str = 'timestamp') -> pd.DataFrame:
+        """The filled rows as a DataFrame for ``Sender.dataframe`` (UTC timestamps)."""
+        n = self.size
+        data = {name: column[:n] for name, column in self.columns.items()}
+        data[timestamp_column] = pd.to_datetime(self.timestamps[:n], unit='ms', utc=True)
+        return pd.DataFrame(data, copy=False)
+
+    def clear(self):
+        """Forget the rows (columns are overwritten, not reallocated; stale symbols are released)."""
+        for name in self.symbols:
+            self.columns[name][:self.size] = ''
+        self.size = 0
+
+
+class ColumnBatcher(QueueMetrics):
+    """Two column buffers: producers fill the active one while the writer sends the other.
+
+    The active buffer is the queue: when it is full the writer has fallen a
+    whole buffer behind, and ``policy`` (``DROP_NEWEST`` or ``BLOCK``)
+    decides whether the tick is rejected or the producer waits for a swap.
+    Time in queue is the age of each batch's oldest tick when it is swapped.
+    """
+
+    def __init__(self, fields: Iterable[Field], capacity: int = 10000, batch_size: int = 100,
+                 timestamp_key: str = 'timestamp', name: str = 'ilp', policy: str = DROP_NEWEST,
+                 block_timeout: Optional[float] = None):
+        if policy not in (DROP_NEWEST, BLOCK):
+            raise ValueError(f"ColumnBatcher supports {DROP_NEWEST} and {BLOCK}, not {policy}")
+        super().__init__(name, capacity, policy)
+        fields = list(fields)
+        self.batch_size = batch_size
+        self.block_timeout = block_timeout
+        self._active = ColumnBuffer(capacity, fields, timestamp_key)
+        self._spare = ColumnBuffer(capacity, fields, timestamp_key)
+        self._lock = threading.Lock()
+        self._swapped = threading.Condition(self._lock)
+        self._ready = threading.Event()
+        self._first_ns = 0   # when the active buffer's oldest row arrived
+
+    def __len__(self) -> int:
+        return len(self._active)
+
+    def append(self, tick: Dict[str, Any]) -> bool:
+        """Add a tick; False (counted as dropped, not logged) when the policy rejects it."""
+        with self._lock:
+            self.enqueued += 1
+            ok = self._active.append(tick)
+            if not ok and self.policy == BLOCK:
+                self._ready.set()
+                if self._swapped.wait_for(lambda: not self._active.full, self.block_timeout):
+                    ok = self._active.append(tick)
+            if not ok:
+                self._overflow()
+                return False
+            size = self._active.size
+            if size == 1:
+                self._first_ns = time.time_ns()
+            if size > self.high_water:
+                self.high_water = size
+        if size >= self.batch_size:
+            self._ready.set()
+        return True
+
+    def wait(self, timeout: float) -> bool:
+        """Block until a full batch is waiting or ``timeout`` passes; True if a batch is ready."""
+        ready = self._ready.wait(timeout)
+        self._ready.clear()
+        return ready
+
+    def swap(self) -> ColumnBuffer:
+        """Take the filled buffer (the writer sends it, then ``clear``s it before the next swap)."""
+        with self._lock:
+            self._spare.clear()
+            self._active, self._spare = self._spare, self._active
+            size = self._spare.size
+            if size:
+                self.dequeued += size
+                self.queue_time.record((time.time_ns() - self._first_ns) // 1000)
+            self._drained(0)
+            self._swapped.notify_all()
+        return self._spare
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.metrics(len(self._active))
+        stats['batch_size'] = self.batch_size
+        return stats
+
+
+# ---------------------------------------------------------------------------
+# Benchmark
+# ---------------------------------------------------------------------------
+
+def _legacy_frame(batch: List[Dict[str, Any]]) -> pd.DataFrame:
+    """What QuestDBManager._flush_batch used to do with each batch of tick dicts."""
+    df = pd.DataFrame(batch)
+    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms', utc=True)
+    df['ltp'] = df['ltp'].astype(float)
+    df['volume'] = df['volume'].astype(int)
+    df['oi'] = df['oi'].astype(int)
+    for col in ['open', 'high', 'low']:
+        if col not in df.columns:
+            df[col] = 0.0
+        else:
+            df[col] = df[col].fillna(0.0)
+    df['open'] = df['open'].astype(float)
+    df['high'] = df['high'].astype(float)
+    df['low'] = df['low'].astype(float)
+    return df
+
+
+def _benchmark(n: int = 200_000, batch_size: int = 100):
+    try:
+        from questdb.ingress import Buffer
+    except ImportError:
+        Buffer = None
+
+    def encode(df):
+        # Real ILP encoding when the client is installed; otherwise stop at the frame
+        if Buffer is not None:
+            buf = Buffer()
+            buf.dataframe(df, table_name='mcx_ticks', symbols=['symbol', 'type'], at='timestamp')
+
+    base = 1_760_600_000_000
+    ticks = [{'token': str(400000 + i % 7), 'symbol': f"CRUDEOIL25OCT{5400 + i % 7 * 50}CE",
+              'type': 'CE', 'ltp': 100.0 + i % 97 * 0.05, 'volume': 1000 + i, 'oi': 5000 + i % 13,
+              'open': 101.0, 'high': 110.0, 'low': 95.0, 'timestamp': base + i * 37} for i in range(n)]
+
+    def legacy():
+        batch = []
+        for tick in ticks:
+            batch.append(tick)
+            if len(batch) >= batch_size:
+                encode(_legacy_frame(batch))
+                batch = []
+
+    batcher = ColumnBatcher(MCX_TICK_FIELDS, capacity=max(batch_size * 4, 1000), batch_size=batch_size,
+                            name='ilp.benchmark')
+
+    def columnar():
+        for tick in ticks:
+            batcher.append(tick)
+            if len(batcher) >= batch_size:
+                encode(batcher.swap().frame())
+
+    print(f"{n} ticks, batches of {batch_size}, ILP encoding {'on' if Buffer else 'off (questdb not installed)'}")
+    for name, fn in (('dict -> DataFrame', legacy), ('column buffers', columnar)):
+        wall, cpu = time.perf_counter(), time.process_time()
+        fn()
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        print(f"{name:>18}: {n / wall:12,.0f} ticks/s  {cpu / n * 1e6:7.2f} us CPU/tick")
+
+
+if __name__ == '__main__':
+    _benchmark()
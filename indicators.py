@@ -0,0 +1,418 @@
+"""
+Streaming technical indicators for MCX Trading System
+One implementation shared by the live strategy, the chart endpoints and the backtester.
+
+Every indicator comes in two flavours that produce the same numbers as the
+historical pandas formulas (``ewm(adjust=False)`` / ``rolling(...).mean()``):
+
+- batch functions (``ema``, ``rsi``, ``atr`` ...) that take NumPy arrays and
+  return a NumPy array of the same length;
+- stateful classes (``EMA``, ``RSI``, ``ATR`` ...) whose ``update`` consumes one
+  new tick or bar in constant time. ``seed`` runs the batch function over a
+  history array and leaves the object ready to continue incrementally.
+"""
+import logging
+import math
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import lfilter
+
+logger = logging.getLogger(__name__)
+
+NAN = float('nan')
+
+# Running sums are re-summed from the window every N updates to stop float drift
+_RESYNC_EVERY = 1024
+
+
+def _as_float(values) -> np.ndarray:
+    return np.asarray(values, dtype=np.float64)
+
+
+# ---------------------------------------------------------------------------
+# Batch functions
+# ---------------------------------------------------------------------------
+
+def ema(values, span: int) -> np.ndarray:
+    """Exponential moving average, equivalent to ``Series.ewm(span, adjust=False).mean()``."""
+    x = _as_float(values)
+    if not len(x):
+        return x.copy()
+    alpha = 2.0 / (max(int(span), 1) + 1.0)
+    valid = ~np.isnan(x)
+    if valid.all():
+        out, _ = lfilter([alpha], [1.0, alpha - 1.0], x, zi=[(1.0 - alpha) * x[0]])
+        return out
+    # NaN-aware path: carry the last value through gaps like pandas does
+    out = np.empty_like(x)
+    state = EMA(span)
+    for i, v in enumerate(x):
+        out[i] = state.update(v)
+    return out
+
+
+def rolling_sum(values, window: int, min_periods: Optional[int] = None) -> np.ndarray:
+    """``Series.rolling(window, min_periods).sum()`` (NaNs are skipped, not propagated)."""
+    x = _as_float(values)
+    window = max(int(window), 1)
+    min_periods = window if min_periods is None else int(min_periods)
+    n = len(x)
+    out = np.full(n, np.nan)
+    if not n:
+        return out
+    valid = ~np.isnan(x)
+    padded = np.concatenate([np.zeros(window - 1), np.where(valid, x, 0.0)])
+    counts = np.concatenate([np.zeros(window - 1), valid.astype(np.float64)])
+    sums = sliding_window_view(padded, window).sum(axis=1)
+    count = sliding_window_view(counts, window).sum(axis=1)
+    ok = count >= max(min_periods, 1)
+    out[ok] = sums[ok]
+    return out
+
+
+def rolling_mean(values, window: int, min_periods: Optional[int] = None) -> np.ndarray:
+    """``Series.rolling(window, min_periods).mean()``."""
+    x = _as_float(values)
+    window = max(int(window), 1)
+    min_periods = window if min_periods is None else int(min_periods)
+    n = len(x)
+    if not n:
+        return np.full(0, np.nan)
+    valid = (~np.isnan(x)).astype(np.float64)
+    sums = rolling_sum(x, window, min_periods=1)
+    count = sliding_window_view(np.concatenate([np.zeros(window - 1), valid]), window).sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out = sums / count
+    out[count < max(min_periods, 1)] = np.nan
+    return out
+
+
+def _gains_losses(close: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    delta = np.diff(close, prepend=np.nan)
+    # delta.where(delta > 0, 0) maps the leading NaN to 0 as well
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = np.where(delta < 0, -delta, 0.0)
+    return gain, loss
+
+
+def _rsi_from(gain_avg, loss_avg):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rs = np.divide(gain_avg, loss_avg)
+        return 100.0 - (100.0 / (1.0 + rs))
+
+
+def rsi(close, period: int, min_periods: Optional[int] = None) -> np.ndarray:
+    """RSI on simple rolling means of gains/losses (the formula used throughout this repo)."""
+    gain, loss = _gains_losses(_as_float(close))
+    return _rsi_from(rolling_mean(gain, period, min_periods), rolling_mean(loss, period, min_periods))
+
+
+def true_range(high, low, close) -> np.ndarray:
+    high, low, close = _as_float(high), _as_float(low), _as_float(close)
+    prev_close = np.concatenate([[np.nan], close[:-1]]) if len(close) else close
+    with np.errstate(invalid='ignore'):
+        return np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+
+def atr(high, low, close, period: int, min_periods: Optional[int] = None) -> np.ndarray:
+    """Average true range as a simple rolling mean of the true range."""
+    return rolling_mean(true_range(high, low, close), period, min_periods)
+
+
+def rolling_vwap(high, low, close, volume, window: int, min_periods: Optional[int] = None) -> np.ndarray:
+    """VWAP over the last ``window`` rows using the typical price."""
+    typical = (_as_float(high) + _as_float(low) + _as_float(close)) / 3
+    volume = _as_float(volume)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return rolling_sum(typical * volume, window, min_periods) / rolling_sum(volume, window, min_periods)
+
+
+def cumulative_vwap(high, low, close, volume) -> np.ndarray:
+    """Session VWAP: cumulative typical-price * volume over cumulative volume."""
+    typical = (_as_float(high) + _as_float(low) + _as_float(close)) / 3
+    volume = _as_float(volume)
+    pv = typical * volume
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out = np.nancumsum(pv) / np.nancumsum(volume)
+    out[np.isnan(pv) | np.isnan(volume)] = np.nan
+    return out
+
+
+def macd(close, fast_span: int, slow_span: int, signal_span: int = 9) -> Tuple[np.ndarray, np.ndarray]:
+    """MACD line (fast EMA - slow EMA) and its signal EMA."""
+    line = ema(close, fast_span) - ema(close, slow_span)
+    return line, ema(line, signal_span)
+
+
+# ---------------------------------------------------------------------------
+# Streaming state
+# ---------------------------------------------------------------------------
+
+class EMA:
+    """Incremental ``ewm(span, adjust=False)``."""
+
+    def __init__(self, span: int):
+        self.reset(span)
+
+    def reset(self, span: int):
+        """Switch to a new span and forget the running value."""
+        self.span = max(int(span), 1)
+        self.alpha = 2.0 / (self.span + 1.0)
+        self.value = NAN
+        self._old_wt = 1.0
+
+    def update(self, x: float) -> float:
+        if x is None or math.isnan(x):
+            # Like pandas (ignore_na=False) a gap decays the weight of the carried value
+            if not math.isnan(self.value):
+                self._old_wt *= 1.0 - self.alpha
+            return self.value
+        if math.isnan(self.value):
+            self.value = float(x)
+        else:
+            old_wt = self._old_wt * (1.0 - self.alpha)
+            if self.value != x:
+                self.value = (old_wt * self.value + self.alpha * x) / (old_wt + self.alpha)
+        self._old_wt = 1.0
+        return self.value
+
+    def seed(self, values) -> np.ndarray:
+        self.reset(self.span)
+        out = ema(values, self.span)
+        x = _as_float(values)
+        valid = np.flatnonzero(~np.isnan(x))
+        if len(valid):
+            self.value = float(out[-1])
+            self._old_wt = (1.0 - self.alpha) ** (len(x) - 1 - valid[-1])
+        return out
+
+
+class RollingMean:
+    """Incremental ``rolling(window, min_periods).mean()`` with a running sum."""
+
+    def __init__(self, window: int, min_periods: Optional[int] = None):
+        self.window = max(int(window), 1)
+        self.min_periods = self.window if min_periods is None else max(int(min_periods), 1)
+        self._values = deque(maxlen=self.window)
+        self._sum = 0.0
+        self._count = 0
+        self._updates = 0
+
+    def update(self, x: float) -> float:
+        if len(self._values) == self.window:
+            old = self._values[0]
+            if not math.isnan(old):
+                self._sum -= old
+                self._count -= 1
+        self._values.append(x)
+        if not math.isnan(x):
+            self._sum += x
+            self._count += 1
+        self._updates += 1
+        if self._updates % _RESYNC_EVERY == 0:
+            self._sum = math.fsum(v for v in self._values if not math.isnan(v))
+        return self.value
+
+    @property
+    def sum(self) -> float:
+        return self._sum if self._count >= self.min_periods else NAN
+
+    @property
+    def value(self) -> float:
+        return self._sum / self._count if self._count >= self.min_periods else NAN
+
+    def seed(self, values) -> np.ndarray:
+        x = _as_float(values)
+        self._values.clear()
+        self._values.extend(x[-self.window:].tolist())
+        tail = [v for v in self._values if not math.isnan(v)]
+        self._sum = math.fsum(tail)
+        self._count = len(tail)
+        return rolling_mean(x, self.window, self.min_periods)
+
+
+class RollingSum(RollingMean):
+    """Incremental ``rolling(window, min_periods).sum()``."""
+
+    @property
+    def value(self) -> float:
+        return self.sum
+
+    def seed(self, values) -> np.ndarray:
+        super().seed(values)
+        return rolling_sum(values, self.window, self.min_periods)
+
+
+class RSI:
+    """Incremental RSI on rolling means of gains and losses."""
+
+    def __init__(self, period: int, min_periods: Optional[int] = None):
+        self.period = max(int(period), 1)
+        self._gain = RollingMean(self.period, min_periods)
+        self._loss = RollingMean(self.period, min_periods)
+        self._prev = NAN
+        self.value = NAN
+
+    def update(self, close: float) -> float:
+        delta = close - self._prev if not math.isnan(self._prev) else NAN
+        self._prev = close
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        self.value = float(_rsi_from(np.float64(self._gain.update(gain)), np.float64(self._loss.update(loss))))
+        return self.value
+
+    def seed(self, close) -> np.ndarray:
+        close = _as_float(close)
+        gain, loss = _gains_losses(close)
+        out = _rsi_from(self._gain.seed(gain), self._loss.seed(loss))
+        self._prev = float(close[-1]) if len(close) else NAN
+        self.value = float(out[-1]) if len(out) else NAN
+        return out
+
+
+class ATR:
+    """Incremental average true range."""
+
+    def __init__(self, period: int, min_periods: Optional[int] = None):
+        self.period = max(int(period), 1)
+        self._tr = RollingMean(self.period, min_periods)
+        self._prev_close = NAN
+
+    def update(self, high: float, low: float, close: float) -> float:
+        tr = high - low
+        if not math.isnan(self._prev_close):
+            tr = max(tr, abs(high - self._prev_close), abs(low - self._prev_close))
+        self._prev_close = close
+        return self._tr.update(tr)
+
+    @property
+    def value(self) -> float:
+        return self._tr.value
+
+    def seed(self, high, low, close) -> np.ndarray:
+        close = _as_float(close)
+        out = self._tr.seed(true_range(high, low, close))
+        self._prev_close = float(close[-1]) if len(close) else NAN
+        return out
+
+
+class RollingVWAP:
+    """Incremental VWAP over the last ``window`` rows."""
+
+    def __init__(self, window: int, min_periods: Optional[int] = None):
+        self.window = max(int(window), 1)
+        self._pv = RollingSum(self.window, min_periods)
+        self._vol = RollingSum(self.window, min_periods)
+
+    def update(self, high: float, low: float, close: float, volume: float) -> float:
+        typical = (high + low + close) / 3
+        self._pv.update(typical * volume)
+        self._vol.update(volume)
+        return self.value
+
+    @property
+    def value(self) -> float:
+        pv, vol = self._pv.value, self._vol.value
+        if math.isnan(pv) or math.isnan(vol):
+            return NAN
+        return float(np.float64(pv) / np.float64(vol)) if vol else (NAN if not pv else math.copysign(math.inf, pv))
+
+    def seed(self, high, low, close, volume) -> np.ndarray:
+        typical = (_as_float(high) + _as_float(low) + _as_float(close)) / 3
+        volume = _as_float(volume)
+        self._pv.seed(typical * volume)
+        self._vol.seed(volume)
+        return rolling_vwap(high, low, close, volume, self.window, self._pv.min_periods)
+
+
+class CumulativeVWAP:
+    """Incremental session VWAP."""
+
+    def __init__(self):
+        self._pv = 0.0
+        self._vol = 0.0
+        self.value = NAN
+
+    def update(self, high: float, low: float, close: float, volume: float) -> float:
+        pv = (high + low + close) / 3 * volume
+        if math.isnan(pv) or math.isnan(volume):
+            return NAN
+        self._pv += pv
+        self._vol += volume
+        self.value = self._pv / self._vol if self._vol else NAN
+        return self.value
+
+    def seed(self, high, low, close, volume) -> np.ndarray:
+        typical = (_as_float(high) + _as_float(low) + _as_float(close)) / 3
+        volume = _as_float(volume)
+        self._pv = float(np.nansum(typical * volume))
+        self._vol = float(np.nansum(volume))
+        out = cumulative_vwap(high, low, close, volume)
+        self.value = float(out[-1]) if len(out) else NAN
+        return out
+
+
+class MACD:
+    """Incremental MACD line and signal."""
+
+    def __init__(self, fast_span: int, slow_span: int, signal_span: int = 9):
+        self.fast = EMA(fast_span)
+        self.slow = EMA(slow_span)
+        self.signal = EMA(signal_span)
+        self.value = NAN
+
+    def update(self, close: float) -> Tuple[float, float]:
+        self.value = self.fast.update(close) - self.slow.update(close)
+        return self.value, self.signal.update(self.value)
+
+    def seed(self, close) -> Tuple[np.ndarray, np.ndarray]:
+        line = self.fast.seed(close) - self.slow.seed(close)
+        signal = self.signal.seed(line)
+        self.value = float(line[-1]) if len(line) else NAN
+        return line, signal
+
+
+class StrategyIndicators:
+    """Per-contract indicator state used by ``HighWinRateStrategy``.
+
+    The EMA spans follow the strategy's volatility-adjusted periods, so the
+    caller re-seeds ``fast_ema``/``slow_ema`` from its price history whenever a
+    span changes (see ``EMA.reset``).
+    """
+
+    def __init__(self, fast_span: int, slow_span: int, rsi_period: int, atr_period: int,
+                 vwap_period: int, volume_ma_period: int, oi_ma_period: int):
+        self.fast_ema = EMA(fast_span)
+        self.slow_ema = EMA(slow_span)
+        self.rsi = RSI(rsi_period)
+        self.atr = ATR(atr_period)
+        self.vwap = RollingVWAP(vwap_period)
+        self.volume_ma = RollingMean(volume_ma_period)
+        self.oi_ma = RollingMean(oi_ma_period)
+
+    def periods(self) -> Tuple[int, int, int, int, int]:
+        return (self.rsi.period, self.atr.period, self.vwap.window,
+                self.volume_ma.window, self.oi_ma.window)
+
+    def update_bar(self, high: float, low: float, close: float, volume: float, oi: float) -> Dict[str, float]:
+        """Advance every non-EMA indicator by one row."""
+        return {
+            'rsi': self.rsi.update(close),
+            'atr': self.atr.update(high, low, close),
+            'vwap': self.vwap.update(high, low, close, volume),
+            'volume_ma': self.volume_ma.update(volume),
+            'oi_ma': self.oi_ma.update(oi),
+        }
+
+    def seed(self, high, low, close, volume, oi) -> Dict[str, np.ndarray]:
+        """Rebuild every non-EMA indicator from history; returns the full columns."""
+        return {
+            'rsi': self.rsi.seed(close),
+            'atr': self.atr.seed(high, low, close),
+            'vwap': self.vwap.seed(high, low, close, volume),
+            'volume_ma': self.volume_ma.seed(volume),
+            'oi_ma': self.oi_ma.seed(oi),
+        }
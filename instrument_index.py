@@ -0,0 +1,189 @@
+"""
+MCX instrument master index
+Loads the Angel One scrip master once per day, keeps only MCX rows and serves
+O(1) token / contract lookups plus sorted expiry and strike ladders.
+
+The filtered rows are persisted next to the daily CSV as a compact columnar
+``.npz`` file, so restarts during the day never parse the full CSV again.
+"""
+import logging
+import os
+import threading
+from datetime import date, datetime
+from typing import Dict, Any, Optional, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+INSTRUMENTS_DIR = "instruments"
+COLUMNS = ['token', 'symbol', 'name', 'expiry', 'strike', 'lotsize', 'instrumenttype', 'exch_seg', 'tick_size']
+NUMERIC_COLUMNS = ('strike', 'lotsize', 'tick_size')
+
+
+def scrip_master_path(day: Optional[date] = None) -> str:
+    day = day or datetime.today()
+    return os.path.join(INSTRUMENTS_DIR, f"{day.strftime('%Y%m%d')}_instrument_file.csv")
+
+
+def index_cache_path(day: Optional[date] = None) -> str:
+    day = day or datetime.today()
+    return os.path.join(INSTRUMENTS_DIR, f"{day.strftime('%Y%m%d')}_mcx_index.npz")
+
+
+def _option_type(symbol: str) -> Optional[str]:
+    suffix = symbol[-2:]
+    return suffix if suffix in ('CE', 'PE') else None
+
+
+def _strike_key(raw_strike: float) -> float:
+    # Scrip master strikes are quoted in paise (x100)
+    return round(float(raw_strike) / 100, 2)
+
+
+class InstrumentIndex:
+    """Columnar MCX instrument table with hash indexes.
+
+    Rows are returned as plain dicts using the scrip master's column names, so
+    callers that previously indexed DataFrame rows keep working unchanged
+    (``strike`` stays in the file's x100 units).
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        self.columns = columns
+        self._expiry_days = pd.to_datetime(columns['expiry'], format='%d%b%Y', errors='coerce').to_numpy('datetime64[D]')
+        self._by_token: Dict[str, int] = {}
+        self._by_symbol: Dict[str, int] = {}
+        self._by_contract: Dict[Tuple, int] = {}
+        self._expiries: Dict[Tuple[str, str], List[Tuple[np.datetime64, str]]] = {}
+        self._strikes: Dict[Tuple[str, str], set] = {}
+        self._build()
+
+    def __len__(self) -> int:
+        return len(self.columns['token'])
+
+    def _build(self):
+        cols = self.columns
+        for i, (token, symbol, name, expiry, strike, itype) in enumerate(zip(
+                cols['token'].tolist(), cols['symbol'].tolist(), cols['name'].tolist(),
+                cols['expiry'].tolist(), cols['strike'].tolist(), cols['instrumenttype'].tolist())):
+            # First occurrence wins, matching the old "iloc[0]" lookups
+            self._by_token.setdefault(token, i)
+            self._by_symbol.setdefault(symbol, i)
+            opt = _option_type(symbol)
+            strike_key = _strike_key(strike) if opt and not np.isnan(strike) else None
+            self._by_contract.setdefault((name, itype, strike_key, expiry, opt), i)
+            if not np.isnat(self._expiry_days[i]):
+                self._expiries.setdefault((name, itype), []).append((self._expiry_days[i], expiry))
+            if strike_key is not None:
+                self._strikes.setdefault((name, expiry), set()).add(strike_key)
+        for key, values in self._expiries.items():
+            self._expiries[key] = sorted(set(values))
+        self._strikes = {key: np.array(sorted(values)) for key, values in self._strikes.items()}
+
+    # ------------------------------------------------------------------
+    # Construction / persistence
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'InstrumentIndex':
+        df = df[df['exch_seg'] == 'MCX']
+        columns = {}
+        for col in COLUMNS:
+            series = df[col] if col in df.columns else pd.Series(np.nan, index=df.index)
+            if col in NUMERIC_COLUMNS:
+                columns[col] = pd.to_numeric(series, errors='coerce').to_numpy(np.float64)
+            else:
+                columns[col] = series.fillna('').astype(str).to_numpy(dtype=str)
+        return cls(columns)
+
+    @classmethod
+    def from_csv(cls, csv_path: str) -> 'InstrumentIndex':
+        header = pd.read_csv(csv_path, nrows=0).columns
+        df = pd.read_csv(csv_path, usecols=[c for c in COLUMNS if c in header],
+                         dtype={'token': str, 'symbol': str, 'name': str, 'expiry': str,
+                                'instrumenttype': str, 'exch_seg': str},
+                         low_memory=False)
+        return cls.from_frame(df)
+
+    def save(self, path: str):
+        tmp = f"{path}.tmp.npz"
+        np.savez_compressed(tmp, **self.columns)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'InstrumentIndex':
+        with np.load(path, allow_pickle=False) as data:
+            return cls({col: data[col] for col in COLUMNS})
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def _row(self, i: Optional[int]) -> Optional[Dict[str, Any]]:
+        if i is None:
+            return None
+        row = {col: arr[i].item() for col, arr in self.columns.items()}
+        if not np.isnan(row['lotsize']) and row['lotsize'].is_integer():
+            row['lotsize'] = int(row['lotsize'])
+        return row
+
+    def by_token(self, token) -> Optional[Dict[str, Any]]:
+        return self._row(self._by_token.get(str(token)))
+
+    def by_symbol(self, symbol: str) -> Optional[Dict[str, Any]]:
+        return self._row(self._by_symbol.get(symbol))
+
+    def lookup(self, name: str, instrument_type: str, strike: Optional[float] = None,
+               expiry: str = '', option_type: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Exact contract lookup; ``strike`` is in rupees, ``expiry`` as in the file (e.g. 16OCT2025)."""
+        strike_key = round(float(strike), 2) if option_type and strike is not None else None
+        return self._row(self._by_contract.get((name, instrument_type, strike_key, expiry.upper(), option_type)))
+
+    def expiries(self, name: str, instrument_type: str, on_or_after: Optional[date] = None) -> List[str]:
+        """Sorted expiry ladder, optionally only expiries on/after a date."""
+        ladder = self._expiries.get((name, instrument_type), [])
+        if on_or_after is not None:
+            cutoff = np.datetime64(on_or_after, 'D')
+            ladder = [item for item in ladder if item[0] >= cutoff]
+        return [label for _, label in ladder]
+
+    def next_expiry(self, name: str, instrument_type: str, on_or_after: Optional[date] = None) -> Optional[str]:
+        ladder = self.expiries(name, instrument_type, on_or_after or date.today())
+        return ladder[0] if ladder else None
+
+    def strikes(self, name: str, expiry: str) -> np.ndarray:
+        """Sorted strike ladder (rupees) listed for an option expiry."""
+        return self._strikes.get((name, expiry.upper()), np.empty(0))
+
+
+_index: Optional[InstrumentIndex] = None
+_index_day: Optional[date] = None
+_index_lock = threading.Lock()
+
+
+def get_instrument_index(day: Optional[date] = None) -> Optional[InstrumentIndex]:
+    """Today's index: memory, then the ``.npz`` cache, then a one-off CSV parse."""
+    global _index, _index_day
+    day = day or date.today()
+    with _index_lock:
+        if _index is not None and _index_day == day:
+            return _index
+        cache_path, csv_path = index_cache_path(day), scrip_master_path(day)
+        try:
+            if os.path.exists(cache_path):
+                index = InstrumentIndex.load(cache_path)
+                logger.info(f"📇 Loaded instrument index from {cache_path} ({len(index)} MCX rows)")
+            elif os.path.exists(csv_path):
+                index = InstrumentIndex.from_csv(csv_path)
+                index.save(cache_path)
+                logger.info(f"📇 Built instrument index from {csv_path} ({len(index)} MCX rows)")
+            else:
+                logger.error(f"Instrument file not found: {csv_path}")
+                return _index
+        except Exception as e:
+            logger.error(f"Error loading instrument index: {e}")
+            return _index
+        _index, _index_day = index, day
+        return _index
@@ -0,0 +1,137 @@
+"""
+Tick latency instrumentation for MCX Trading System
+HDR-style log-linear histograms of per-stage tick latency.
+
+Values are recorded in microseconds into buckets with 64 sub-buckets per
+power of two (~1.6% relative precision). Each histogram has a single writer
+(the pipeline stage that owns it), so recording is a plain list increment with
+no lock; readers take a snapshot copy of the counts.
+"""
+import logging
+import time
+from typing import Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_SUB_BITS = 6
+_SUB_COUNT = 1 << _SUB_BITS           # 64 sub-buckets per octave
+_LINEAR_LIMIT = 2 * _SUB_COUNT        # values below this map 1:1 to a bucket
+MAX_TRACKABLE_US = 3_600_000_000      # one hour - anything above is clamped
+
+# Stages in tick order; each value is the time spent between two timestamps
+STAGES = (
+    'feed',            # exchange_timestamp -> socket receive
+    'parse',           # receive -> normalised
+    'strategy',        # normalised -> strategy/signal evaluated
+    'processing',      # receive -> strategy done
+    'tick_to_signal',  # exchange_timestamp -> strategy done
+    'order_queue',     # signal -> order sent to broker
+    'order_ack',       # order sent -> broker response
+    'tick_to_order',   # exchange_timestamp -> broker response
+)
+
+
+def _bucket_index(value: int) -> int:
+    if value < _LINEAR_LIMIT:
+        return value
+    shift = value.bit_length() - _SUB_BITS - 1
+    return (shift + 1) * _SUB_COUNT + (value >> shift) - _SUB_COUNT
+
+
+def _bucket_value(index: int) -> int:
+    """Highest value that maps to ``index`` (reported percentiles never under-state)."""
+    if index < _LINEAR_LIMIT:
+        return index
+    shift = index // _SUB_COUNT - 1
+    sub = index % _SUB_COUNT + _SUB_COUNT
+    return ((sub + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """Log-linear latency histogram (microsecond resolution)."""
+
+    def __init__(self):
+        self.counts = [0] * (_bucket_index(MAX_TRACKABLE_US) + 1)
+        self.total = 0
+        self.sum_us = 0
+        self.max_us = 0
+
+    def record(self, micros: int):
+        micros = 0 if micros < 0 else (MAX_TRACKABLE_US if micros > MAX_TRACKABLE_US else int(micros))
+        self.counts[_bucket_index(micros)] += 1
+        self.total += 1
+        self.sum_us += micros
+        if micros > self.max_us:
+            self.max_us = micros
+
+    def percentiles(self, quantiles=(0.5, 0.99, 0.999)) -> Tuple[Optional[float], ...]:
+        counts = list(self.counts)  # snapshot
+        total = sum(counts)
+        if not total:
+            return tuple(None for _ in quantiles)
+        targets = [max(1, int(q * total + 0.999999)) for q in quantiles]
+        results = [None] * len(quantiles)
+        seen = 0
+        pending = sorted(range(len(targets)), key=lambda i: targets[i])
+        pos = 0
+        for index, count in enumerate(counts):
+            if not count:
+                continue
+            seen += count
+            while pos < len(pending) and seen >= targets[pending[pos]]:
+                results[pending[pos]] = _bucket_value(index)
+                pos += 1
+            if pos == len(pending):
+                break
+        return tuple(results)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Summary in milliseconds."""
+        p50, p99, p999 = self.percentiles()
+        to_ms = lambda us: None if us is None else round(min(us, self.max_us) / 1000, 3)
+        return {
+            'count': self.total,
+            'mean_ms': round(self.sum_us / self.total / 1000, 3) if self.total else None,
+            'p50_ms': to_ms(p50),
+            'p99_ms': to_ms(p99),
+            'p999_ms': to_ms(p999),
+            'max_ms': round(self.max_us / 1000, 3) if self.total else None,
+        }
+
+
+class LatencyTracker:
+    """Histograms keyed by (stage, contract type), e.g. ('strategy', 'CE')."""
+
+    def __init__(self):
+        self.histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self.started_at = time.time()
+
+    def record(self, stage: str, contract: str, start_ns: Optional[int], end_ns: Optional[int] = None):
+        """Record ``end_ns - start_ns`` (both ``time.time_ns()``) for a stage."""
+        if start_ns is None:
+            return
+        if end_ns is None:
+            end_ns = time.time_ns()
+        key = (stage, contract)
+        hist = self.histograms.get(key)
+        if hist is None:
+            hist = self.histograms.setdefault(key, LatencyHistogram())
+        hist.record((end_ns - start_ns) // 1000)
+
+    def snapshot(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        result: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for (stage, contract), hist in sorted(list(self.histograms.items())):
+            result.setdefault(stage, {})[contract] = hist.snapshot()
+        return result
+
+    def mean_ms(self, stage: str) -> Optional[float]:
+        """Mean latency of a stage across all contract types."""
+        hists = [h for (s, _), h in list(self.histograms.items()) if s == stage]
+        total = sum(h.total for h in hists)
+        if not total:
+            return None
+        return round(sum(h.sum_us for h in hists) / total / 1000, 3)
+
+    def reset(self):
+        self.histograms = {}
+        self.started_at = time.time()
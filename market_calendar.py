@@ -0,0 +1,174 @@
+"""
+MCX session calendar for MCX Trading System
+Which epoch-ms instants are inside an MCX trading session, and bar helpers
+that only ever produce bars for traded time.
+
+- Non-agri commodities trade Monday-Friday 09:00-23:30 IST, extended to
+  23:55 from November to March (US winter time). Weekends and listed
+  holidays are closed.
+- A session never crosses IST midnight, so the IST day number identifies it
+  and daily bars (aligned to IST midnight) map one-to-one onto sessions.
+- ``aggregate_ticks`` builds OHLC bars from tick arrays with one sort-free
+  pass and emits only buckets that traded; ``fill_gaps`` adds flat bars for
+  short gaps inside one session at read time. Neither ever materializes the
+  overnight or weekend span, so multi-day windows cost what was traded.
+"""
+import logging
+from datetime import date, timedelta
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from timeutil import IST_OFFSET_MS, floor_ist_ms
+
+logger = logging.getLogger(__name__)
+
+DAY_MS = 86_400_000
+SESSION_OPEN = '09:00'
+SESSION_CLOSE = '23:30'
+SESSION_CLOSE_EXTENDED = '23:55'
+EXTENDED_MONTHS = (11, 12, 1, 2, 3)
+# Longest run of missing bars filled inside a session; longer gaps are real halts
+MAX_FILL_BARS = 60
+
+_EPOCH = date(1970, 1, 1)
+
+
+def _clock_ms(hhmm: str) -> int:
+    hours, minutes = hhmm.split(':')
+    return (int(hours) * 60 + int(minutes)) * 60_000
+
+
+def ist_day(ts_ms) -> int:
+    """IST calendar day number (days since 1970-01-01); works on scalars and arrays."""
+    return (ts_ms + IST_OFFSET_MS) // DAY_MS
+
+
+class SessionCalendar:
+    """Trading sessions of one exchange segment, resolved per IST day and cached."""
+
+    def __init__(self, open_time: str = SESSION_OPEN, close_time: str = SESSION_CLOSE,
+                 extended_close: str = SESSION_CLOSE_EXTENDED,
+                 extended_months: Iterable[int] = EXTENDED_MONTHS, holidays: Iterable = ()):
+        self.open_ms = _clock_ms(open_time)
+        self.close_ms = _clock_ms(close_time)
+        self.extended_close_ms = _clock_ms(extended_close)
+        self.extended_months = frozenset(extended_months)
+        self.holidays = set()
+        self._sessions: Dict[int, Optional[Tuple[int, int]]] = {}
+        self.add_holidays(holidays)
+
+    def add_holidays(self, days: Iterable):
+        """Mark days closed ('YYYY-MM-DD' strings or ``date`` objects)."""
+        for day in days:
+            if isinstance(day, str):
+                day = day.strip()
+                if not day:
+                    continue
+                day = date.fromisoformat(day)
+            self.holidays.add((day - _EPOCH).days)
+        self._sessions.clear()
+
+    def _resolve(self, day: int) -> Optional[Tuple[int, int]]:
+        calendar_day = _EPOCH + timedelta(days=day)
+        if calendar_day.weekday() >= 5 or day in self.holidays:
+            return None
+        close = self.extended_close_ms if calendar_day.month in self.extended_months else self.close_ms
+        midnight = day * DAY_MS - IST_OFFSET_MS
+        return midnight + self.open_ms, midnight + close
+
+    def session(self, ts_ms: int) -> Optional[Tuple[int, int]]:
+        """(open, close) epoch ms of the session on ``ts_ms``'s IST day, or None if closed."""
+        day = ist_day(int(ts_ms))
+        try:
+            return self._sessions[day]
+        except KeyError:
+            bounds = self._sessions[day] = self._resolve(day)
+            return bounds
+
+    def in_session(self, ts_ms: int) -> bool:
+        bounds = self.session(ts_ms)
+        return bounds is not None and bounds[0] <= ts_ms <= bounds[1]
+
+    def mask(self, ts_ms: np.ndarray) -> np.ndarray:
+        """Vectorised ``in_session`` over an array of epoch ms."""
+        ts_ms = np.asarray(ts_ms, dtype=np.int64)
+        if not len(ts_ms):
+            return np.zeros(0, dtype=bool)
+        days = ist_day(ts_ms)
+        unique, inverse = np.unique(days, return_inverse=True)
+        opens = np.full(len(unique), -1, dtype=np.int64)
+        closes = np.full(len(unique), -2, dtype=np.int64)
+        for i, day in enumerate(unique.tolist()):
+            bounds = self.session(day * DAY_MS - IST_OFFSET_MS)
+            if bounds is not None:
+                opens[i], closes[i] = bounds
+        return (ts_ms >= opens[inverse]) & (ts_ms <= closes[inverse])
+
+
+MCX_CALENDAR = SessionCalendar()
+
+
+def aggregate_ticks(ts_ms: np.ndarray, price: np.ndarray, volume: Optional[np.ndarray] = None,
+                    oi: Optional[np.ndarray] = None, step_ms: int = 1000,
+                    calendar: Optional[SessionCalendar] = MCX_CALENDAR) -> Dict[str, np.ndarray]:
+    """OHLC columns from time-ordered ticks: one row per traded bucket, off-session ticks dropped.
+
+    ``volume``/``oi`` take the last value in the bucket (day-cumulative feed
+    fields). Returns ``bucket_start`` plus open/high/low/close/volume/oi.
+    """
+    ts_ms = np.asarray(ts_ms, dtype=np.int64)
+    price = np.asarray(price, dtype=np.float64)
+    volume = np.zeros(len(ts_ms), dtype=np.int64) if volume is None else np.asarray(volume, dtype=np.int64)
+    oi = np.zeros(len(ts_ms), dtype=np.int64) if oi is None else np.asarray(oi, dtype=np.int64)
+    keep = price > 0
+    if calendar is not None:
+        keep &= calendar.mask(ts_ms)
+    if not keep.all():
+        ts_ms, price, volume, oi = ts_ms[keep], price[keep], volume[keep], oi[keep]
+    if not len(ts_ms):
+        return {name: np.empty(0, dtype=np.int64 if name in ('bucket_start', 'volume', 'oi') else np.float64)
+                for name in ('bucket_start', 'open', 'high', 'low', 'close', 'volume', 'oi')}
+    buckets = floor_ist_ms(ts_ms, step_ms)
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(buckets)] - 1
+    return {
+        'bucket_start': buckets[starts],
+        'open': price[starts],
+        'high': np.maximum.reduceat(price, starts),
+        'low': np.minimum.reduceat(price, starts),
+        'close': price[ends],
+        'volume': volume[ends],
+        'oi': oi[ends],
+    }
+
+
+def fill_gaps(columns: Dict[str, np.ndarray], step_ms: int, max_bars: int = MAX_FILL_BARS) -> Dict[str, np.ndarray]:
+    """Insert flat bars (previous close, volume and OI) for missing buckets inside one session.
+
+    Only gaps of at most ``max_bars`` buckets between two bars of the same
+    IST day are filled; session breaks, weekends and long halts stay gaps.
+    Steps of a day or more are never filled.
+    """
+    starts = columns['bucket_start']
+    if len(starts) < 2 or step_ms >= DAY_MS:
+        return columns
+    missing = np.diff(starts) // step_ms - 1
+    missing[(missing > max_bars) | (ist_day(starts[1:]) != ist_day(starts[:-1]))] = 0
+    missing[missing < 0] = 0
+    if not missing.any():
+        return columns
+    counts = np.r_[missing + 1, 1]
+    source = np.repeat(np.arange(len(starts)), counts)
+    # Position of each output row within its source bar's run (0 = the real bar)
+    offset = np.arange(len(source)) - np.repeat(np.cumsum(counts) - counts, counts)
+    filled = offset > 0
+    out = {}
+    for name, values in columns.items():
+        values = values[source]
+        if name == 'bucket_start':
+            values = values + offset * step_ms
+        elif name in ('open', 'high', 'low'):
+            values[filled] = columns['close'][source[filled]]
+        out[name] = values
+    return out
@@ -0,0 +1,246 @@
+"""
+Live market data service for MCX Trading System
+The single write path for ticks: normalization, bar building and indicator
+state live here; the strategy, Flask routes and persistence read through it.
+
+- ``normalize`` turns a raw SmartAPI tick into the flat tick dict every
+  consumer uses (prices in rupees, int epoch-ms timestamp).
+- ``ingest`` folds a normalized tick into the candle store (1s base bars
+  rolled up to every chart interval), the recent-tick ring and the
+  latest-tick map. It is called from exactly one thread. Bars are only
+  built inside MCX sessions (``market_calendar``). Closed bars of the
+  persisted intervals are handed to ``bar_sink`` (QuestDB ``mcx_ohlc``).
+- Readers get bar frames/columns, change versions, tick snapshots and the
+  latest indicator values without taking a lock the writer waits on.
+"""
+import logging
+import os
+from typing import Any, Callable, Dict, Iterable, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from candle_store import CandleStore
+from market_calendar import MCX_CALENDAR, SessionCalendar
+from ring_buffer import TickRingBuffer
+from timeutil import ms_series, tick_ms
+
+logger = logging.getLogger(__name__)
+
+# Chart intervals kept in memory; each rolls up from the next finer one
+CHART_INTERVALS = ["1s", "5s", "10s", "30s", "1min", "5min", "15min", "1h", "1d"]
+# One hour of 1s bars, 1000 bars of everything else
+BAR_CAPACITY = {'1s': 3600, 'default': 1000}
+# Closed bars persisted for long-range charts: the 1s -> 1min -> 15min -> 1d pyramid
+PERSIST_INTERVALS = ("1s", "1min", "15min", "1d")
+
+# Recent raw ticks (all contracts), for snapshots and the CSV backup
+TICK_COLUMNS = {
+    'timestamp': np.int64,   # epoch ms
+    'ltp': np.float64,
+    'volume': np.int64,
+    'oi': np.int64,
+    'token': 'U24',
+    'type': 'U4',
+    'open': np.float64,
+    'high': np.float64,
+    'low': np.float64,
+}
+
+
+class MarketDataService:
+    """Owns live bars, recent ticks and indicator state for every subscribed contract.
+
+    Candles are keyed by contract symbol. ``ingest`` is the only writer;
+    every read API is safe to call from other threads.
+    """
+
+    def __init__(self, intervals: Iterable[str] = CHART_INTERVALS,
+                 bar_capacity: Optional[Union[int, Dict[str, int]]] = None, tick_capacity: int = 1000,
+                 calendar: Optional[SessionCalendar] = MCX_CALENDAR,
+                 bar_sink: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 persist_intervals: Iterable[str] = PERSIST_INTERVALS):
+        self.candles = CandleStore(intervals, capacity=bar_capacity or BAR_CAPACITY, calendar=calendar,
+                                   on_close=self._bar_closed)
+        self.ticks = TickRingBuffer(tick_capacity, TICK_COLUMNS)
+        # Closed bars of these intervals go to bar_sink (one flat dict per bar, writer thread)
+        self.bar_sink = bar_sink
+        self.persist_intervals = frozenset(persist_intervals)
+        self._types: Dict[str, str] = {}
+        # Values are replaced, never mutated, so readers never see a half-built entry
+        self._last_ticks: Dict[str, Dict[str, Any]] = {}
+        self._indicators: Dict[str, Dict[str, Any]] = {}
+
+        # Counters
+        self.ticks_ingested = 0
+        self.bar_updates = 0
+        self.bars_persisted = 0
+
+    @property
+    def intervals(self):
+        return self.candles.intervals
+
+    # ------------------------------------------------------------------
+    # Write path
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def normalize(message: Dict[str, Any], tick_type: str, symbol: str) -> Dict[str, Any]:
+        """Flat tick dict from a raw SmartAPI message (prices arrive in paise)."""
+        return {
+            'token': str(message.get('token', '')),
+            'ltp': float(message.get('last_traded_price', 0)) / 100,
+            'volume': int(message.get('volume_trade_for_the_day', 0)),
+            'oi': int(message.get('open_interest', 0)),
+            'type': tick_type,
+            # Exchange time stays an int (epoch ms) through the whole tick path
+            'timestamp': tick_ms(message),
+            'open': float(message.get('open_price_of_the_day', 0)) / 100,
+            'high': float(message.get('high_price_of_the_day', 0)) / 100,
+            'low': float(message.get('low_price_of_the_day', 0)) / 100,
+            'symbol': symbol,
+        }
+
+    def ingest(self, tick: Dict[str, Any]):
+        """Fold one normalized tick into bars, the tick ring and the latest-tick map."""
+        price = tick['ltp']
+        if price <= 0:
+            return
+        self._types[tick['symbol']] = tick['type']
+        self.bar_updates += self.candles.update(tick['symbol'], tick['timestamp'], price,
+                                                tick['volume'], tick['oi'])
+        self.ticks.append(tick)
+        self._last_ticks[tick['token']] = tick
+        self.ticks_ingested += 1
+
+    def _bar_closed(self, symbol: str, interval: str, bar):
+        if self.bar_sink is None or interval not in self.persist_intervals:
+            return
+        self.bar_sink({
+            'symbol': symbol,
+            'type': self._types.get(symbol, ''),
+            'interval': interval,
+            'timestamp': bar[0],   # bucket start, epoch ms
+            'open': bar[1],
+            'high': bar[2],
+            'low': bar[3],
+            'close': bar[4],
+            'volume': bar[5],
+            'oi': bar[6],
+        })
+        self.bars_persisted += 1
+
+    def set_indicators(self, kind: str, values: Dict[str, Any]):
+        """Publish the latest indicator values for a contract type (strategy stage)."""
+        self._indicators[kind] = values
+
+    # ------------------------------------------------------------------
+    # Read APIs
+    # ------------------------------------------------------------------
+
+    def bars(self, symbol: str, interval: str = '1s', limit: Optional[int] = None,
+             fill: bool = False) -> pd.DataFrame:
+        """Newest ``limit`` bars (live bar included) indexed by IST bar start; empty if unknown.
+
+        ``fill`` adds flat bars for short gaps inside a session; overnight and
+        weekend breaks are never filled.
+        """
+        if interval not in self.candles.intervals:
+            logger.warning(f"Interval {interval} is not cached; supported: {self.candles.intervals}")
+            return pd.DataFrame()
+        frame = self.candles.frame(symbol, interval, limit, fill=fill)
+        return frame if len(frame) else pd.DataFrame()
+
+    def bar_columns(self, symbol: str, interval: str = '1s', limit: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Zero-copy column views of completed-and-open ring rows (see ``CandleSeries.columns``)."""
+        return self.candles.last(symbol, interval, limit)
+
+    def version(self, symbol: str) -> int:
+        """Change counter of a contract's bars; bumps on every ingested tick."""
+        return self.candles.version(symbol)
+
+    def last_tick(self, token: str) -> Optional[Dict[str, Any]]:
+        return self._last_ticks.get(str(token))
+
+    def last_ticks(self) -> Dict[str, Dict[str, Any]]:
+        return dict(self._last_ticks)
+
+    def tick_snapshot(self, n: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Consistent read-only copy of the newest ``n`` raw ticks (all contracts)."""
+        return self.ticks.snapshot(n)
+
+    def indicators(self, kind: str) -> Dict[str, Any]:
+        return self._indicators.get(kind, {})
+
+    # ------------------------------------------------------------------
+    # Tick backup
+    # ------------------------------------------------------------------
+
+    def save_ticks(self, path: str):
+        if len(self.ticks):
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            pd.DataFrame(self.ticks.snapshot()).to_csv(path, index=False)
+            logger.info(f"Tick buffer saved to {path}")
+
+    def load_ticks(self, path: str):
+        """Refill the tick ring from a CSV backup (old files hold datetime strings)."""
+        if not os.path.isfile(path):
+            return
+        try:
+            df = pd.read_csv(path)
+            if 'timestamp' not in df.columns:
+                logger.warning("No timestamp column found in tick buffer file")
+                return
+            df = df.dropna(subset=['timestamp'])
+            df = df[df['timestamp'].astype(str).str.strip() != '']
+            if df.empty:
+                logger.warning("No valid timestamps found in tick buffer file")
+                return
+            df['timestamp'] = ms_series(df['timestamp'])
+            df = df[df['timestamp'] > 0]
+            df = df.astype({'token': str, 'type': str}, errors='ignore')
+            for row in df.tail(self.ticks.capacity).to_dict('records'):
+                self.ticks.append(row)
+            logger.info(f"Loaded tick buffer from {path}, {len(self.ticks)} records.")
+        except Exception as e:
+            logger.error(f"Failed to load tick buffer: {e}")
+            self.ticks.clear()
+
+    # ------------------------------------------------------------------
+    # Warm start
+    # ------------------------------------------------------------------
+
+    def export_state(self) -> Dict[str, np.ndarray]:
+        """Bars, recent ticks and contract types as flat arrays (see ``warm_start``)."""
+        state = {f"bars|{name}": values for name, values in self.candles.export_state().items()}
+        # Recent ticks stay one array per column (a few, and two of them are strings)
+        state.update({f"ticks|{name}": values for name, values in self.ticks.snapshot().items()})
+        types = dict(self._types)
+        state['types|symbol'] = np.array(list(types), dtype=str)
+        state['types|type'] = np.array(list(types.values()), dtype=str)
+        return state
+
+    def load_state(self, state: Dict[str, np.ndarray]) -> int:
+        """Restore ``export_state`` arrays; returns the number of contracts with bars."""
+        bars, ticks = {}, {}
+        for name, values in state.items():
+            group, _, rest = name.partition('|')
+            if group == 'bars':
+                bars[rest] = values
+            elif group == 'ticks':
+                ticks[rest] = values
+        if ticks:
+            self.ticks.restore(ticks)
+        if 'types|symbol' in state:
+            self._types.update(zip(state['types|symbol'].tolist(), state['types|type'].tolist()))
+        return self.candles.load_state(bars)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'ticks_ingested': self.ticks_ingested,
+            'bar_updates': self.bar_updates,
+            'bars_persisted': self.bars_persisted,
+            'contracts': len(self._last_ticks),
+            'recent_ticks': len(self.ticks),
+            'candles': self.candles.stats(),
+        }
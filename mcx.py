@@ -20,9 +20,19 @@ import os
 import threading
 from flask import Flask, jsonify, render_template, request, send_from_directory, redirect, url_for
 import time
-import numpy as np
 import requests
 from strategy import HighWinRateStrategy
+import indicators
+from instrument_index import get_instrument_index
+from tick_pipeline import TickPipeline
+from bounded_queue import COALESCE, DROP_NEWEST, DROP_OLDEST, queue_stats
+from latency import LatencyTracker
+from socket_publisher import SocketPublisher
+from subscription_manager import SubscriptionManager
+from ohlc_cache import OhlcResponseCache, parse_since
+from timeutil import now_ms
+import serialization
+import trade_logging
 import atexit
 import smtplib
 from email.mime.text import MIMEText
@@ -48,8 +58,11 @@ try:
 except ImportError:
     PSUTIL_AVAILABLE = False
 
-# Import optimized components
-from optimized_websocket import OptimizedWebSocketHandler
+# Live market data (ticks -> bars/indicator state), shared by strategy, routes and persistence
+from market_data_service import MarketDataService
+from market_calendar import MCX_CALENDAR
+from ohlc_history import BarHistory
+from warm_start import WarmStart
 # Broker wrapper for order execution
 from broker import Broker
 # Import optimized components with error handling
@@ -60,7 +73,7 @@ except ImportError:
     DATABASE_MANAGER_AVAILABLE = False
     # Create a dummy class for fallback
     class OptimizedDataManager:
-        def __init__(self, questdb_host='localhost'):
+        def __init__(self, questdb_host='localhost', journal_dir=None):
             self.questdb_host = questdb_host
             self.running = False
             self.questdb = None
@@ -70,6 +83,9 @@ except ImportError:
         
         def process_tick(self, tick_data):
             pass
+
+        def process_bar(self, bar):
+            pass
         
         def stop(self):
             pass
@@ -130,9 +146,6 @@ if missing_vars:
 
 
 
-# File path for instrument CSV (daily updated)
-SCRIP_MASTER_FILE = f"instruments/{datetime.today().strftime('%Y%m%d')}_instrument_file.csv"
-
 # Notification settings from environment
 notification_settings = {
     'telegram': {
@@ -148,14 +161,21 @@ notification_settings = {
 }
 
 def setup_logging():
-    """Setup logging configuration"""
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - %(message)s'
+    """Setup logging configuration (queue-backed; I/O happens off the tick path)"""
+    root = trade_logging.setup_logging(
+        level=Config.LOG_LEVEL,
+        log_file=Config.LOG_FILE,
+        max_bytes=Config.LOG_MAX_SIZE,
+        backup_count=Config.LOG_BACKUP_COUNT,
+        sample={'mcx.ticks': Config.LOG_TICK_SAMPLE, 'strategy.score': Config.LOG_SCORE_SAMPLE},
+        rate_limit={'tick_pipeline': Config.LOG_HOT_RATE, 'mcx.hot': Config.LOG_HOT_RATE},
     )
-    return logging.getLogger()
+    atexit.register(trade_logging.stop_logging)
+    return root
 
 logger = setup_logging()
+tick_logger = logging.getLogger('mcx.ticks')
+hot_logger = logging.getLogger('mcx.hot')
 
 def get_crude_atm_strike():
     """Get ATM strike for CRUDEOIL using mcxlib, and return nearest MCX OPTFUT expiry for options trading"""
@@ -186,26 +206,16 @@ def get_crude_atm_strike():
         logger.info(f"Calculated ATM strike: {atm_strike}")
 
         # Get options expiry (OPTFUT)
-        df = pd.read_csv(SCRIP_MASTER_FILE, low_memory=False)
-        opt_df = df[
-            (df['name'] == 'CRUDEOIL') &
-            (df['exch_seg'] == 'MCX') &
-            (df['instrumenttype'] == 'OPTFUT')
-        ]
-        
-        if opt_df.empty:
+        index = get_instrument_index()
+        if index is None:
+            raise Exception("Instrument index not available")
+        if not index.expiries('CRUDEOIL', 'OPTFUT'):
             raise Exception("No CRUDEOIL options found")
 
-        opt_df = opt_df.copy()
-        opt_df.loc[:, 'expiry_date'] = pd.to_datetime(opt_df['expiry'], format='%d%b%Y', errors='coerce')
-        opt_df = opt_df.dropna(subset=['expiry_date']).copy()
-        today = pd.Timestamp.now().normalize()
-        future_expiries = opt_df[opt_df['expiry_date'] >= today]
-        
-        if future_expiries.empty:
+        opt_expiry = index.next_expiry('CRUDEOIL', 'OPTFUT')
+        if opt_expiry is None:
             raise Exception("No future MCX OPTFUT expiries found for CRUDEOIL")
             
-        opt_expiry = future_expiries.iloc[0]['expiry']
         logger.info(f"Options expiry: {opt_expiry}")
 
         return atm_strike, spot_price, opt_expiry
@@ -216,78 +226,45 @@ def get_crude_atm_strike():
         return None, None, None
 
 def resolve_token(symbol: str, strike: int, expiry: str, option_type: str = None):
-    """Resolve token from instrument CSV file"""
+    """Resolve token from the in-memory instrument index"""
     try:
-        if not os.path.exists(SCRIP_MASTER_FILE):
-            logger.error(f"Instrument file not found: {SCRIP_MASTER_FILE}")
+        index = get_instrument_index()
+        if index is None:
             return None
 
-        df = pd.read_csv(SCRIP_MASTER_FILE, low_memory=False)
-
-        base_mask = (
-            (df['name'] == symbol) &
-            (df['exch_seg'] == 'MCX')
-        )
-        base_filtered = df[base_mask]
-
-        if base_filtered.empty:
-            logger.error(f"No {symbol} contracts found in MCX")
+        instrument_type = 'OPTFUT' if option_type else 'FUTCOM'
+        expiries = index.expiries(symbol, instrument_type)
+        if not expiries:
+            logger.error(f"No {symbol} {instrument_type} contracts found in MCX")
             return None
 
         # Futures
         if option_type is None:
-            futures_mask = (base_filtered['instrumenttype'] == 'FUTCOM')
-            matches = base_filtered[futures_mask]
-            if not matches.empty:
-                # Convert expiry to datetime for comparison
-                expiry_dt = pd.to_datetime(expiry, format='%d%b%Y')
-                matches = matches.copy()
-                matches.loc[:, 'expiry_dt'] = pd.to_datetime(matches['expiry'], format='%d%b%Y', errors='coerce')
-                matches = matches.dropna(subset=['expiry_dt']).copy()
-                
-                # Find exact match
-                exact_match = matches[matches['expiry_dt'] == expiry_dt]
-                if not exact_match.empty:
-                    token = str(exact_match.iloc[0]['token'])
-                    logger.info(f"Found futures token: {token} for {symbol} {expiry} on MCX")
-                    return token
-                
-                # If no exact match, find nearest future expiry
-                future_expiries = matches[matches['expiry_dt'] >= expiry_dt]
-                if not future_expiries.empty:
-                    token = str(future_expiries.iloc[0]['token'])
-                    logger.info(f"Found nearest futures token: {token} for {symbol} {future_expiries.iloc[0]['expiry']} on MCX")
-                    return token
-
-        # Options
-        else:
-            options_mask = (base_filtered['instrumenttype'] == 'OPTFUT')
-            options = base_filtered[options_mask]
-            if options.empty:
-                logger.error(f"No option contracts found for {symbol}")
-                return None
+            row = index.lookup(symbol, 'FUTCOM', expiry=expiry or '')
+            if row is not None:
+                logger.info(f"Found futures token: {row['token']} for {symbol} {expiry} on MCX")
+                return row['token']
 
-            mcx_matches = options[
-                (options['strike'] == float(strike) * 100) &
-                (options['symbol'].str.contains(option_type, na=False))
-            ]
-
-            matches = mcx_matches
-            if matches.empty:
-                logger.error(f"No MCX matches found for strike {strike} and type {option_type}")
+            # If no exact match, find nearest future expiry
+            try:
+                expiry_dt = datetime.strptime(expiry, '%d%b%Y').date()
+            except (TypeError, ValueError):
                 return None
+            for candidate in index.expiries(symbol, 'FUTCOM', on_or_after=expiry_dt):
+                row = index.lookup(symbol, 'FUTCOM', expiry=candidate)
+                if row is not None:
+                    logger.info(f"Found nearest futures token: {row['token']} for {symbol} {candidate} on MCX")
+                    return row['token']
+            return None
 
-            if 'expiry' in matches.columns:
-                matches = matches.copy()
-                matches.loc[:, 'expiry_date'] = pd.to_datetime(matches['expiry'], format='%d%b%Y', errors='coerce')
-                matches = matches.sort_values('expiry_date')
-
-            token = str(matches.iloc[0]['token'])
-            symbol_found = matches.iloc[0]['symbol']
-            exch = matches.iloc[0]['exch_seg']
-            logger.info(f"Found option token: {token} for symbol {symbol_found} on {exch}")
-            return token
+        # Options: requested expiry first, then the earliest listed expiry for the strike
+        for candidate in ([expiry.upper()] if expiry else []) + expiries:
+            row = index.lookup(symbol, 'OPTFUT', strike=float(strike), expiry=candidate, option_type=option_type)
+            if row is not None:
+                logger.info(f"Found option token: {row['token']} for symbol {row['symbol']} on {row['exch_seg']}")
+                return row['token']
 
+        logger.error(f"No MCX matches found for strike {strike} and type {option_type}")
         return None
 
     except Exception as e:
@@ -302,36 +279,36 @@ class CrudeATMWebSocket:
         self.atm_strike = None
         self.spot_price = None
         self.expiry = None
-        self.tokens = []  # [fut_token, ce_token, pe_token]
+        self.tokens = []  # all subscribed tokens (futures + strike ladder)
         self.token_type_map = {}  # Map token to type (FUT/CE/PE)
-        
-        # NEW: High-performance components
-        self.optimized_handler = OptimizedWebSocketHandler()
-        # Define the intervals to be pre-calculated
-        self.supported_intervals = ["1s", "5s", "10s", "30s", "1min", "5min"]
-        self.optimized_handler.set_supported_intervals(self.supported_intervals)
-
-        # Simplified data manager without problematic async components
-        self.data_manager = OptimizedDataManager(questdb_host='localhost')
-        
-        # Legacy components (for backward compatibility)
-        self.tick_buffer = []  # Keep for compatibility
-        self.ohlc_fut = pd.DataFrame()
-        self.ohlc_ce = pd.DataFrame()
-        self.ohlc_pe = pd.DataFrame()
-        self.lock = threading.Lock()
+        self.subscriptions = None  # SubscriptionManager, created on first subscribe
+        
+        # Single write path for live data: bars for every chart interval, recent ticks, indicator state
+        MCX_CALENDAR.add_holidays(Config.MCX_HOLIDAYS)
+        self.market_data = MarketDataService(calendar=MCX_CALENDAR)
+        self.supported_intervals = self.market_data.intervals
+
+        # Simplified data manager without problematic async components (persistence only)
+        self.data_manager = OptimizedDataManager(
+            questdb_host='localhost',
+            journal_dir=Config.TICK_JOURNAL_DIR if Config.TICK_JOURNAL_ENABLED else None)
+        # Closed 1s/1min/15min/1d bars -> QuestDB mcx_ohlc; long-range charts read them back
+        self.market_data.bar_sink = self.data_manager.process_bar
+        self.bar_history = (BarHistory(self.data_manager.questdb, self.market_data)
+                            if self.data_manager.questdb is not None else None)
         
         self.fut_info = {}
         self.ce_info = {}
         self.pe_info = {}
         
-        # Strategy components
-        self.strategy_ce = HighWinRateStrategy(contract_hub=None)
-        self.strategy_pe = HighWinRateStrategy(contract_hub=None)
+        # Strategy components: one strategy per option token; strategy_ce/pe are the ATM pair
+        self.strategies = {}
+        self.strategy_types = {}  # token -> FUT/CE/PE of each strategy
+        self.strategy_overrides = {}
+        self._default_strategies = {'CE': HighWinRateStrategy(contract_hub=None),
+                                    'PE': HighWinRateStrategy(contract_hub=None)}
         self.latest_signal_ce = None
         self.latest_signal_pe = None
-        self.latest_indicators_ce = {}
-        self.latest_indicators_pe = {}
         # Broker instance will be initialised after login
         self.broker = None
         # === Trade management additions ===
@@ -350,51 +327,118 @@ class CrudeATMWebSocket:
         # Start optimized components safely
         try:
             self.data_manager.start()
-            self.optimized_handler.start()
             logger.info("✅ Optimized components started successfully")
         except Exception as e:
             logger.error(f"❌ Failed to start optimized components: {e}")
             # Continue without optimized components
 
+        # Bars and strategy windows from the last snapshot (or a tick backfill): signal-ready at boot
+        self.warm_start = WarmStart(Config.WARM_START_FILE, self.market_data, self._strategy_windows,
+                                    interval=Config.WARM_START_INTERVAL)
+        self._restore_warm_state()
+        self.warm_start.start()
+        atexit.register(self.warm_start.stop)
+
+        # Staged tick pipeline: the websocket thread only enqueues
+        self.latency = LatencyTracker()
+        self.tick_log = trade_logging.TickLog(Config.TICK_LOG_DIR) if Config.TICK_LOG_ENABLED else None
+        if self.tick_log:
+            self.tick_log.start()
+            atexit.register(self.tick_log.stop)
+        self.publisher = SocketPublisher(socketio, rate_hz=Config.SOCKET_PUBLISH_HZ)
+        self.publisher.start()
+        self.pipeline = self._build_pipeline()
+        self.pipeline.start()
+        self._start_latency_publisher()
+
     def _save_tick_buffer(self):
-        with self.lock:
-            if self.tick_buffer:
-                df = pd.DataFrame(self.tick_buffer)
-                # Convert timestamp to string for CSV storage
-                if 'timestamp' in df.columns:
-                    df['timestamp'] = df['timestamp'].astype(str)
-                df.to_csv(self.tick_buffer_file, index=False)
-                logger.info(f"Tick buffer saved to {self.tick_buffer_file}")
+        self.market_data.save_ticks(self.tick_buffer_file)
 
     def _load_tick_buffer(self):
-        if os.path.isfile(self.tick_buffer_file):
-            try:
-                df = pd.read_csv(self.tick_buffer_file)
-                # Convert timestamp back to datetime
-                if 'timestamp' in df.columns:
-                    # Handle empty or NaN timestamps
-                    df = df.dropna(subset=['timestamp'])
-                    df = df[df['timestamp'].astype(str).str.strip() != '']  # Remove empty string timestamps
-                    if not df.empty:
-                        df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
-                        df = df.dropna(subset=['timestamp'])  # Drop rows with invalid timestamps
-                        # Convert back to list of dictionaries with proper timestamp objects
-                        self.tick_buffer = []
-                        for _, row in df.iterrows():
-                            tick_dict = row.to_dict()
-                            self.tick_buffer.append(tick_dict)
-                        logger.info(f"Loaded tick buffer from {self.tick_buffer_file}, {len(self.tick_buffer)} records.")
-                    else:
-                        logger.warning("No valid timestamps found in tick buffer file")
-                        self.tick_buffer = []
-                else:
-                    logger.warning("No timestamp column found in tick buffer file")
-                    self.tick_buffer = []
-            except Exception as e:
-                logger.error(f"Failed to load tick buffer: {e}")
-                self.tick_buffer = []
-        else:
-            self.tick_buffer = []
+        self.market_data.load_ticks(self.tick_buffer_file)
+
+    def _strategy_windows(self):
+        return {token: (self.strategy_types.get(token, ''), strategy)
+                for token, strategy in list(self.strategies.items())}
+
+    def _restore_warm_state(self):
+        try:
+            if self.warm_start.restore(self._strategy_for):
+                return
+            index = get_instrument_index()
+            self.warm_start.backfill(
+                self._strategy_for,
+                questdb=self.data_manager.questdb,
+                archive_dir=Config.TICK_LOG_DIR,
+                minutes=Config.WARM_START_BACKFILL_MINUTES,
+                token_for=lambda symbol: (index.by_symbol(symbol) or {}).get('token') if index else None,
+                symbol_for=lambda token: (index.by_token(token) or {}).get('symbol', 'CRUDEOIL') if index else 'CRUDEOIL',
+            )
+        except Exception as e:
+            logger.error(f"❌ Warm start failed, starting cold: {e}")
+
+    # === Per-contract strategy state ===
+    @property
+    def strategy_ce(self):
+        return self._atm_strategy('CE')
+
+    @property
+    def strategy_pe(self):
+        return self._atm_strategy('PE')
+
+    def _atm_strategy(self, option_type):
+        token = self.subscriptions.atm_token(option_type) if self.subscriptions else None
+        return self._strategy_for(token, option_type) if token else self._default_strategies[option_type]
+
+    def _strategy_for(self, token, option_type):
+        strategy = self.strategies.get(token)
+        if strategy is None:
+            # The first ATM contract inherits the strategy that existed before subscribing
+            default = self._default_strategies.get(option_type)
+            if default is not None and default not in self.strategies.values():
+                strategy = default
+            else:
+                strategy = HighWinRateStrategy(contract_hub=None)
+                if self.strategy_overrides:
+                    strategy.update_parameters(self.strategy_overrides)
+            strategy = self.strategies.setdefault(token, strategy)
+            self.strategy_types[token] = option_type
+        return strategy
+
+    def all_strategies(self):
+        return list(self._default_strategies.values()) + [
+            s for s in list(self.strategies.values()) if s not in self._default_strategies.values()]
+
+    def apply_strategy_params(self, params):
+        """Apply parameter overrides to every live strategy and to ones created later."""
+        self.strategy_overrides.update(params)
+        for strategy in self.all_strategies():
+            strategy.update_parameters(params)
+
+    def _is_atm(self, token, tick_type):
+        return self.subscriptions is None or self.subscriptions.atm_token(tick_type) == token
+
+    def ohlc_symbol_for(self, token):
+        contract = self.subscriptions.contracts.get(token) if self.subscriptions else None
+        return contract.symbol if contract else 'CRUDEOIL'
+
+    def ohlc_symbol(self, contract_type):
+        """Candle-store symbol of the current ATM contract of a type."""
+        contract = self.subscriptions.atm_contract(contract_type) if self.subscriptions else None
+        return contract.symbol if contract else 'CRUDEOIL'
+
+    def _has_open_position(self, token):
+        strategy = self.strategies.get(token)
+        return strategy is not None and strategy.trade_state == 'OPEN'
+
+    def _on_recenter(self, manager):
+        self.token_type_map = manager.token_types
+        self.tokens = list(manager.contracts)
+        self.atm_strike = manager.atm_strike
+        for kind in ('FUT', 'CE', 'PE'):
+            contract = manager.atm_contract(kind)
+            if contract is not None:
+                setattr(self, f"{kind.lower()}_info", contract.info())
 
     # === NEW: Daily reset & signal handling helpers ===
     def _ensure_daily_reset(self):
@@ -403,7 +447,7 @@ class CrudeATMWebSocket:
         today = datetime.now(ist).date()
         if getattr(self, 'current_day', None) != today:
             self.current_day = today
-            for strat in [self.strategy_ce, self.strategy_pe]:
+            for strat in self.all_strategies():
                 strat.trades_today = 0
                 strat.daily_pnl = 0
                 strat.trade_state = 'IDLE'
@@ -421,25 +465,32 @@ class CrudeATMWebSocket:
             return False
         return True
 
-    def _handle_signal(self, option_type, signal):
-        """Execute basic state transitions for BUY / EXIT signals."""
-        strategy = self.strategy_ce if option_type == "CE" else self.strategy_pe
+    def _contract_info(self, token, option_type):
+        contract = self.subscriptions.contracts.get(token) if self.subscriptions else None
+        if contract is not None:
+            return contract.info()
+        return self.ce_info if option_type == "CE" else self.pe_info
+
+    def _handle_signal(self, token, signal, timing=None):
+        """Execute basic state transitions for BUY / EXIT signals on one contract."""
+        option_type = self.token_type_map.get(token)
+        strategy = self._strategy_for(token, option_type)
         if signal == 'BUY' and self._can_take_trade(strategy):
             # TODO: integrate real order placement here
-            logger.info(f"🛒 Executing BUY for {option_type}")
-            # Determine symbol/token/lot-size
-            info = self.ce_info if option_type == "CE" else self.pe_info
+            logger.info(f"🛒 Executing BUY for {option_type} {token}")
+            # Determine symbol/lot-size of this contract
+            info = self._contract_info(token, option_type)
             lot_size = int(info.get('lotsize', 1)) if info else 1
             symbol = info.get('symbol') if info else None
-            # Map option type to token
-            token_key = next((tok for tok, typ in self.token_type_map.items() if typ == option_type), None)
-            order_resp = self.broker.place_market_order(
+            token_key = token
+            order_resp = self._place_order(
+                option_type, timing,
                 symbol_token=str(token_key),
                 trading_symbol=symbol or option_type,
                 transaction_type='BUY',
                 quantity=lot_size,
             )
-            strategy.entry_price = strategy.data['ltp'].iloc[-1] if not strategy.data.empty else None
+            strategy.entry_price = strategy.ticks.last('ltp')
             strategy.trade_state = 'OPEN'
             strategy.trades_today += 1
             self.last_trade_time = time.time()
@@ -454,13 +505,14 @@ class CrudeATMWebSocket:
                 'strategy': option_type,
             })
         elif signal == 'EXIT' and strategy.trade_state == 'OPEN':
-            logger.info(f"💼 Exiting {option_type} position")
+            logger.info(f"💼 Exiting {option_type} {token} position")
             # close position via SELL
-            info = self.ce_info if option_type == "CE" else self.pe_info
+            info = self._contract_info(token, option_type)
             lot_size = int(info.get('lotsize', 1)) if info else 1
             symbol = info.get('symbol') if info else None
-            token_key = next((tok for tok, typ in self.token_type_map.items() if typ == option_type), None)
-            order_resp = self.broker.place_market_order(
+            token_key = token
+            order_resp = self._place_order(
+                option_type, timing,
                 symbol_token=str(token_key),
                 trading_symbol=symbol or option_type,
                 transaction_type='SELL',
@@ -525,135 +577,143 @@ class CrudeATMWebSocket:
             return False
 
     def on_data(self, ws, message):
+        # Runs on the websocket receive thread: filter and hand off, nothing else
+        if isinstance(message, dict) and str(message.get('token', '')) in self.token_type_map:
+            message['_recv_ns'] = time.time_ns()
+            self.pipeline.submit('normalize', message)
+
+    def _build_pipeline(self):
+        """Receive -> normalize -> {persist, strategy -> orders}; UI updates go through the publisher."""
+        pipeline = TickPipeline()
+        pipeline.add_stage('normalize', self._normalize_stage, maxsize=10000, policy=DROP_OLDEST)
+        pipeline.add_stage('persist', self._persist_stage, maxsize=10000, policy=DROP_OLDEST)
+        # Under overload only the newest tick per contract is evaluated
+        pipeline.add_stage('strategy', self._strategy_stage, maxsize=256, policy=COALESCE,
+                           key=lambda message: str(message.get('token', '')))
+        # Orders are never coalesced or silently replaced
+        pipeline.add_stage('orders', self._order_stage, maxsize=100, policy=DROP_NEWEST)
+        return pipeline
+
+    def _normalize_stage(self, message):
         try:
-            logger.info(f"📈 Tick: {message}")
-            # Daily reset for counters
-            self._ensure_daily_reset()
-            if isinstance(message, dict):
-                token = str(message.get('token', ''))
-                if token in self.tokens:
-                    ltp = float(message.get('last_traded_price', 0)) / 100
-                    volume = int(message.get('volume_trade_for_the_day', 0))
-                    oi = int(message.get('open_interest', 0))
-                    
-                    # Convert to IST
-                    ist = pytz.timezone('Asia/Kolkata')
-                    tick_time = pd.to_datetime(
-                        message.get('exchange_timestamp', int(time.time()*1000)),
-                        unit='ms'
-                    ).tz_localize('UTC').tz_convert(ist)
-                    
-                    tick_type = self.token_type_map.get(token, "UNKNOWN")
-                    
-                    # NEW: Process through optimized handler
-                    optimized_tick = {
-                        'token': token,
-                        'ltp': ltp,
-                        'volume': volume,
-                        'oi': oi,
-                        'type': tick_type,
-                        'timestamp': tick_time,
-                        'open': float(message.get('open_price_of_the_day', 0)) / 100,
-                        'high': float(message.get('high_price_of_the_day', 0)) / 100,
-                        'low': float(message.get('low_price_of_the_day', 0)) / 100,
-                        'symbol': 'CRUDEOIL'  # Add symbol
-                    }
-                    
-                    # Process through optimized system
-                    self.optimized_handler.process_market_data(optimized_tick)
-                    self.data_manager.process_tick(optimized_tick)
-                    
-                    # Emit real-time data via SocketIO (rate-limited by optimized handler)
-                    socketio.emit('market_data', {
-                        'type': tick_type,
-                        'ltp': ltp,
-                        'volume': volume,
-                        'oi': oi,
-                        'timestamp': tick_time.isoformat()
-                    })
-                    
-                    # Legacy tick buffer (keep for backward compatibility)
-                    with self.lock:
-                        if len(self.tick_buffer) > 1000:
-                            self.tick_buffer = self.tick_buffer[-1000:]
-                        
-                        self.tick_buffer.append({
-                            'timestamp': tick_time,
-                            'ltp': ltp,
-                            'volume': volume,
-                            'oi': oi,
-                            'token': token,
-                            'type': tick_type,
-                            'open': float(message.get('open_price_of_the_day', 0)) / 100,
-                            'high': float(message.get('high_price_of_the_day', 0)) / 100,
-                            'low': float(message.get('low_price_of_the_day', 0)) / 100,
-                        })
-
-                    # Update strategy data
-                    if tick_type == "CE":
-                        self.strategy_ce.update_data(message)
-                        self.latest_signal_ce = self.strategy_ce.generate_signals(message)
-                         # Handle trade state & limits
-                        self._handle_signal("CE", self.latest_signal_ce)
-                        exit_sig = self.strategy_ce.check_exit_conditions()
-                        if exit_sig:
-                            self._handle_signal("CE", exit_sig)
-                        if not self.strategy_ce.data.empty:
-                            last = self.strategy_ce.data.iloc[-1]
-                            self.latest_indicators_ce = {
-                                'fast_ema': float(last.get('fast_ema', 0)) if not pd.isna(last.get('fast_ema')) else None,
-                                'slow_ema': float(last.get('slow_ema', 0)) if not pd.isna(last.get('slow_ema')) else None,
-                                'rsi': float(last.get('rsi', 0)) if not pd.isna(last.get('rsi')) else None,
-                                'vwap': float(last.get('vwap', 0)) if not pd.isna(last.get('vwap')) else None,
-                                 'atr': float(last.get('atr', 0)) if not pd.isna(last.get('atr')) else None,
-                                 'macd': float(last.get('macd', 0)) if not pd.isna(last.get('macd')) else None,
-                                 'macd_signal': float(last.get('macd_signal', 0)) if not pd.isna(last.get('macd_signal')) else None,
-                                'market_regime': self.strategy_ce.market_regime if self.strategy_ce.market_regime else None,
-                            }
-                            # Emit strategy data
-                            socketio.emit('strategy_update', {
-                                'type': 'CE',
-                                'indicators': self.latest_indicators_ce,
-                                'signal': self.latest_signal_ce
-                            })
-                    elif tick_type == "PE":
-                        self.strategy_pe.update_data(message)
-                        self.latest_signal_pe = self.strategy_pe.generate_signals(message)
-                        # Handle trade state & limits
-                        self._handle_signal("PE", self.latest_signal_pe)
-                        exit_sig = self.strategy_pe.check_exit_conditions()
-                        if exit_sig:
-                            self._handle_signal("PE", exit_sig)
-                        if not self.strategy_pe.data.empty:
-                            last = self.strategy_pe.data.iloc[-1]
-                            self.latest_indicators_pe = {
-                                'fast_ema': float(last.get('fast_ema', 0)) if not pd.isna(last.get('fast_ema')) else None,
-                                'slow_ema': float(last.get('slow_ema', 0)) if not pd.isna(last.get('slow_ema')) else None,
-                                'rsi': float(last.get('rsi', 0)) if not pd.isna(last.get('rsi')) else None,
-                                'vwap': float(last.get('vwap', 0)) if not pd.isna(last.get('vwap')) else None,
-                                 'atr': float(last.get('atr', 0)) if not pd.isna(last.get('atr')) else None,
-                                 'macd': float(last.get('macd', 0)) if not pd.isna(last.get('macd')) else None,
-                                 'macd_signal': float(last.get('macd_signal', 0)) if not pd.isna(last.get('macd_signal')) else None,
-                                'market_regime': self.strategy_pe.market_regime if self.strategy_pe.market_regime else None,
-                            }
-                            # Emit strategy data
-                            socketio.emit('strategy_update', {
-                                'type': 'PE',
-                                'indicators': self.latest_indicators_pe,
-                                'signal': self.latest_signal_pe
-                            })
+            token = str(message.get('token', ''))
+            tick_type = self.token_type_map.get(token, "UNKNOWN")
+            # Candles are kept per contract
+            tick = self.market_data.normalize(message, tick_type, self.ohlc_symbol_for(token))
+            ltp, volume, oi, ts_ms = tick['ltp'], tick['volume'], tick['oi'], tick['timestamp']
+            # Sampled, lazily formatted human line; every tick goes to the JSON-lines tick log
+            tick_logger.info("📈 Tick %s %s ltp=%.2f vol=%d oi=%d", tick_type, token, ltp, volume, oi)
+            if self.tick_log:
+                self.tick_log.write({'ts': ts_ms, 'token': token, 'type': tick_type, 'ltp': ltp,
+                                     'vol': volume, 'oi': oi, 'recv_ns': message.get('_recv_ns')})
+            parsed_ns = message['_parsed_ns'] = time.time_ns()
+            exchange_ns = self._exchange_ns(message)
+            self.latency.record('feed', tick_type, exchange_ns, message.get('_recv_ns'))
+            self.latency.record('parse', tick_type, message.get('_recv_ns'), parsed_ns)
+            self.pipeline.submit('persist', tick)
+            if tick_type in ("CE", "PE"):
+                self.pipeline.submit('strategy', message)
+            elif tick_type == "FUT" and self.subscriptions:
+                self.subscriptions.on_future_price(ltp)
+            
+            # Real-time data for the UI: the ATM contracts (latest tick per instrument wins)
+            if self._is_atm(token, tick_type):
+                self.publisher.publish('market_data', tick_type, {
+                    'type': tick_type,
+                    'ltp': ltp,
+                    'volume': volume,
+                    'oi': oi,
+                    'timestamp': ts_ms
+                })
 
-        except Exception as e:
-            logger.error(f"Error processing tick: {str(e)}")
-            logger.error(traceback.format_exc())
+
+        except Exception:
+            hot_logger.error("Error processing tick", exc_info=True)
+
+    def _persist_stage(self, tick):
+        # Bars and recent ticks are built once here; the data manager only stores ticks
+        self.market_data.ingest(tick)
+        self.data_manager.process_tick(tick)
+
+    def _strategy_stage(self, message):
+        # Daily reset for counters
+        self._ensure_daily_reset()
+        token = str(message.get('token', ''))
+        option_type = self.token_type_map.get(token)
+        if option_type is None:
+            return  # unsubscribed while queued
+        strategy = self._strategy_for(token, option_type)
+        is_atm = self._is_atm(token, option_type)
+        
+        # Update strategy data
+        strategy.update_data(message)
+        signal = strategy.generate_signals(message)
+        if is_atm:
+            setattr(self, f"latest_signal_{option_type.lower()}", signal)
+        exit_sig = strategy.check_exit_conditions()
+        done_ns = time.time_ns()
+        exchange_ns = self._exchange_ns(message)
+        self.latency.record('strategy', option_type, message.get('_parsed_ns'), done_ns)
+        self.latency.record('processing', option_type, message.get('_recv_ns'), done_ns)
+        self.latency.record('tick_to_signal', option_type, exchange_ns, done_ns)
+        # Trade state & limits are handled by the order stage
+        timing = {'exchange_ns': exchange_ns, 'signal_ns': done_ns}
+        if signal:
+            self.pipeline.submit('orders', (token, signal, timing))
+        if exit_sig:
+            self.pipeline.submit('orders', (token, exit_sig, timing))
+        if is_atm and not strategy.ticks.empty:
+            last = strategy.ticks.last_row()
+            indicators = {
+                'fast_ema': float(last.get('fast_ema', 0)) if not pd.isna(last.get('fast_ema')) else None,
+                'slow_ema': float(last.get('slow_ema', 0)) if not pd.isna(last.get('slow_ema')) else None,
+                'rsi': float(last.get('rsi', 0)) if not pd.isna(last.get('rsi')) else None,
+                'vwap': float(last.get('vwap', 0)) if not pd.isna(last.get('vwap')) else None,
+                'atr': float(last.get('atr', 0)) if not pd.isna(last.get('atr')) else None,
+                'macd': float(last.get('macd', 0)) if not pd.isna(last.get('macd')) else None,
+                'macd_signal': float(last.get('macd_signal', 0)) if not pd.isna(last.get('macd_signal')) else None,
+                'market_regime': strategy.market_regime if strategy.market_regime else None,
+            }
+            self.market_data.set_indicators(option_type, indicators)
+            # Emit strategy data
+            self.publisher.publish('strategy_update', option_type, {
+                'type': option_type,
+                'indicators': indicators,
+                'signal': signal
+            })
+
+    def _order_stage(self, order):
+        token, signal, timing = order
+        self._handle_signal(token, signal, timing)
+
+    @staticmethod
+    def _exchange_ns(message):
+        exchange_ms = message.get('exchange_timestamp')
+        return int(exchange_ms) * 1_000_000 if exchange_ms else None
+
+    def _place_order(self, option_type, timing, **order):
+        """Send an order to the broker, recording order-path latency."""
+        sent_ns = time.time_ns()
+        if timing:
+            self.latency.record('order_queue', option_type, timing.get('signal_ns'), sent_ns)
+        response = self.broker.place_market_order(**order)
+        ack_ns = time.time_ns()
+        self.latency.record('order_ack', option_type, sent_ns, ack_ns)
+        if timing:
+            self.latency.record('tick_to_order', option_type, timing.get('exchange_ns'), ack_ns)
+        return response
+
+    def _start_latency_publisher(self, interval=2.0):
+        """Stream latency histograms to the performance page."""
+        def publish():
+            while True:
+                time.sleep(interval)
+                self.publisher.publish('latency_stats', None, {'stages': self.latency.snapshot()})
+        threading.Thread(target=publish, daemon=True, name="LatencyPublisher").start()
 
     def initialize_websocket(self):
         """Initialize and connect WebSocket with optimized handler"""
         try:
-            # Initialize optimized handler with SocketIO reference
-            if hasattr(self, 'optimized_handler'):
-                self.optimized_handler.socketio = socketio
-            
             self.websocket = SmartWebSocketV2(
                 self.jwt_token,
                 API_KEY,
@@ -686,8 +746,14 @@ class CrudeATMWebSocket:
             return False
 
     def subscribe(self):
-        """Subscribe to market data for futures and ATM strikes"""
+        """Subscribe to futures plus the ATM ± N strike ladder (re-centred as futures move)"""
         try:
+            if self.subscriptions is not None:
+                # Reconnect: replay the current ladder on the new connection
+                self.subscriptions.resubscribe()
+                logger.info(f"✅ Re-subscribed {len(self.subscriptions.contracts)} MCX tokens")
+                return
+
             self.atm_strike, self.spot_price, self.expiry = get_crude_atm_strike()
             if not self.atm_strike or not self.expiry:
                 self.notifier.notify_error("Subscription", "Failed to get ATM strike or expiry")
@@ -699,92 +765,34 @@ class CrudeATMWebSocket:
                 self.notifier.notify_error("Subscription", "Failed to resolve futures token")
                 raise Exception("Failed to resolve futures token")
 
-            # Get CE and PE tokens
-            ce_token = resolve_token("CRUDEOIL", self.atm_strike, self.expiry, "CE")
-            pe_token = resolve_token("CRUDEOIL", self.atm_strike, self.expiry, "PE")
-
-            if not ce_token or not pe_token:
+            def send(method, token_list):
+                logger.info(f"{method.capitalize()} token list: {token_list}")
+                getattr(self.websocket, method)(correlation_id="ws_crude_atm", mode=3, token_list=token_list)
+
+            self.subscriptions = SubscriptionManager(
+                get_instrument_index(), "CRUDEOIL", self.expiry, str(fut_token),
+                subscribe_fn=lambda token_list: send('subscribe', token_list),
+                unsubscribe_fn=lambda token_list: send('unsubscribe', token_list),
+                width=Config.ATM_LADDER_WIDTH,
+                hysteresis=Config.ATM_RECENTER_HYSTERESIS,
+                is_pinned=self._has_open_position,
+                on_recenter=self._on_recenter,
+            )
+            self.subscriptions.start(self.spot_price)
+            if not self.subscriptions.atm_token('CE') or not self.subscriptions.atm_token('PE'):
                 self.notifier.notify_error("Subscription", "Failed to resolve option tokens")
                 raise Exception("Failed to resolve option tokens")
 
-            self.tokens = [fut_token, ce_token, pe_token]
-            self.token_type_map = {
-                str(fut_token): "FUT",
-                str(ce_token): "CE", 
-                str(pe_token): "PE"
-            }
-
             # Notify startup
             self.notifier.notify_startup(
                 instrument="CRUDEOIL",
                 expiry=self.expiry,
                 spot_price=self.spot_price,
                 atm_strike=self.atm_strike,
-                monitored=["FUTURES", "CE", "PE"],
+                monitored=["FUTURES"] + [f"CE/PE ±{Config.ATM_LADDER_WIDTH} strikes"],
                 strategy="High Win Rate"
             )
-
-            df = pd.read_csv(SCRIP_MASTER_FILE, low_memory=False)
-
-            # Get futures info
-            fut_row = df[df['token'].astype(str) == str(fut_token)].iloc[0] if not df[df['token'].astype(str) == str(fut_token)].empty else None
-            if fut_row is not None:
-                self.fut_info = {
-                    'symbol': fut_row['symbol'],
-                    'expiry': fut_row['expiry'],
-                    'lotsize': fut_row['lotsize'],
-                }
-
-            # Get CE and PE info
-            ce_row = df[df['token'].astype(str) == str(ce_token)].iloc[0] if not df[df['token'].astype(str) == str(ce_token)].empty else None
-            pe_row = df[df['token'].astype(str) == str(pe_token)].iloc[0] if not df[df['token'].astype(str) == str(pe_token)].empty else None
-            if ce_row is not None:
-                self.ce_info = {
-                    'symbol': ce_row['symbol'],
-                    'strike': ce_row['strike'],
-                    'expiry': ce_row['expiry'],
-                    'lotsize': ce_row['lotsize'],
-                    'optiontype': ce_row['symbol'][-2:],
-                }
-            if pe_row is not None:
-                self.pe_info = {
-                    'symbol': pe_row['symbol'],
-                    'strike': pe_row['strike'],
-                    'expiry': pe_row['expiry'],
-                    'lotsize': pe_row['lotsize'],
-                    'optiontype': pe_row['symbol'][-2:],
-                }
-
-            mcx_tokens = []
-            for token in self.tokens:
-                str_token = str(token)
-                token_info = df[df['token'].astype(str) == str_token]
-                if not token_info.empty:
-                    exch = token_info.iloc[0]['exch_seg']
-                    logger.info(f"Token {token} belongs to exchange {exch}")
-                    if exch == 'MCX':
-                        mcx_tokens.append(str_token)
-                else:
-                    logger.error(f"Could not find exchange info for token {token}")
-
-            token_list = []
-            if mcx_tokens:
-                token_list.append({
-                    "exchangeType": 5,  # MCX
-                    "tokens": mcx_tokens
-                })
-                logger.info(f"Added MCX subscription for tokens: {mcx_tokens}")
-
-            if not token_list:
-                raise Exception("No valid tokens found for subscription")
-
-            logger.info(f"Subscribing with token list: {token_list}")
-            self.websocket.subscribe(
-                correlation_id="ws_crude_atm",
-                mode=3,
-                token_list=token_list
-            )
-            logger.info(f"✅ Subscribed to MCX tokens: {mcx_tokens}")
+            logger.info(f"✅ Subscribed to MCX tokens: {self.tokens}")
 
         except Exception as e:
             self.notifier.notify_error("Subscription", str(e))
@@ -804,132 +812,6 @@ class CrudeATMWebSocket:
         if self.websocket:
             self.websocket.close_connection()
 
-    def aggregate_ohlc(self, interval='5s'):
-        """Aggregate tick_buffer into OHLC DataFrames for futures, CE and PE."""
-        with self.lock:
-            logger.info(f"Aggregating OHLC data with interval {interval}. Tick buffer size: {len(self.tick_buffer)}")
-            if not self.tick_buffer:
-                logger.warning("Tick buffer is empty")
-                return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
-            
-            # Convert tick buffer to DataFrame
-            df = pd.DataFrame(self.tick_buffer)
-            
-            # **Clear the buffer after converting it to a DataFrame**
-            self.tick_buffer.clear()
-            logger.info("Legacy tick buffer cleared after aggregation.")
-
-            if df.empty:
-                logger.warning("Tick buffer DataFrame is empty")
-                return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
-            
-            # Ensure timestamp is datetime and set as index
-            if 'timestamp' in df.columns:
-                # Check if timestamp column contains timezone-aware objects
-                if df['timestamp'].dtype == 'object':
-                    # If they're already pandas Timestamps, just set as index
-                    try:
-                        # Try to convert, handling timezone-aware objects
-                        df['timestamp'] = pd.to_datetime(df['timestamp'], utc=True)
-                    except ValueError:
-                        # If conversion fails, assume they're already proper datetime objects
-                        pass
-                df = df.set_index('timestamp')
-                df = df.sort_index()  # Sort by timestamp
-            else:
-                logger.error("No timestamp column in tick buffer data")
-                return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
-            
-            # Split data by type
-            fut_df = df[df['type'] == 'FUT'].copy()
-            ce_df = df[df['type'] == 'CE'].copy()
-            pe_df = df[df['type'] == 'PE'].copy()
-            
-            logger.info(f"Split data sizes - FUT: {len(fut_df)}, CE: {len(ce_df)}, PE: {len(pe_df)}")
-            
-            def calculate_ohlc(data_df, name):
-                if data_df.empty:
-                    logger.warning(f"No {name} data available")
-                    return pd.DataFrame()
-                try:
-                    # Basic OHLC
-                    ohlc = data_df.resample(interval).agg(
-                        open=('ltp', 'first'),
-                        high=('ltp', 'max'),
-                        low=('ltp', 'min'),
-                        close=('ltp', 'last'),
-                        volume=('volume', 'last'),
-                        oi=('oi', 'last')
-                    ).ffill()
-                    
-                    # Flatten column names
-                    ohlc.columns = ['open', 'high', 'low', 'close', 'volume', 'oi']
-                    
-                    # Technical Indicators for CE/PE
-                    if name in ['CE', 'PE']:
-                        strategy = self.strategy_ce if name == 'CE' else self.strategy_pe
-                        
-                        # EMA
-                        ohlc['fast_ema'] = ohlc['close'].ewm(span=strategy.fast_ema_period, adjust=False).mean()
-                        ohlc['slow_ema'] = ohlc['close'].ewm(span=strategy.slow_ema_period, adjust=False).mean()
-                        # MACD
-                        ohlc['macd'] = ohlc['fast_ema'] - ohlc['slow_ema']
-                        ohlc['macd_signal'] = ohlc['macd'].ewm(span=9, adjust=False).mean()
-                        
-                        # VWAP
-                        typical_price = (ohlc['high'] + ohlc['low'] + ohlc['close']) / 3
-                        ohlc['vwap'] = (typical_price * ohlc['volume']).cumsum() / ohlc['volume'].cumsum()
-                        
-                        # RSI
-                        delta = ohlc['close'].diff()
-                        gain = (delta.where(delta > 0, 0)).rolling(window=strategy.rsi_period).mean()
-                        loss = (-delta.where(delta < 0, 0)).rolling(window=strategy.rsi_period).mean()
-                        rs = gain / loss
-                        ohlc['rsi'] = 100 - (100 / (1 + rs))
-                        
-                        # ATR
-                        high_low = ohlc['high'] - ohlc['low']
-                        high_close = np.abs(ohlc['high'] - ohlc['close'].shift())
-                        low_close = np.abs(ohlc['low'] - ohlc['close'].shift())
-                        true_range = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-                        ohlc['atr'] = true_range.rolling(window=strategy.atr_period).mean()
-                        
-                        # Emit strategy update
-                        if not ohlc.empty:
-                            last_row = ohlc.iloc[-1]
-                            socketio.emit('strategy_update', {
-                                'type': name,
-                                'indicators': {
-                                    'fast_ema': float(last_row['fast_ema']) if not pd.isna(last_row['fast_ema']) else None,
-                                    'slow_ema': float(last_row['slow_ema']) if not pd.isna(last_row['slow_ema']) else None,
-                                    'macd': float(last_row['macd']) if not pd.isna(last_row['macd']) else None,
-                                    'macd_signal': float(last_row['macd_signal']) if not pd.isna(last_row['macd_signal']) else None,
-                                    'rsi': float(last_row['rsi']) if not pd.isna(last_row['rsi']) else None,
-                                    'vwap': float(last_row['vwap']) if not pd.isna(last_row['vwap']) else None,
-                                    'atr': float(last_row['atr']) if not pd.isna(last_row['atr']) else None,
-                                    'market_regime': strategy.market_regime if hasattr(strategy, 'market_regime') else None
-                                }
-                            })
-                    
-                    # Replace NaN with None for JSON serialization
-                    ohlc = ohlc.replace([np.inf, -np.inf], np.nan)
-                    ohlc = ohlc.where(pd.notnull(ohlc), None)
-                    
-                    logger.info(f"{name} OHLC created with {len(ohlc)} rows")
-                    return ohlc.reset_index()
-                    
-                except Exception as e:
-                    logger.error(f"Error calculating {name} OHLC: {str(e)}")
-                    logger.error(traceback.format_exc())
-                    return pd.DataFrame()
-            
-            # Calculate OHLC for each type
-            ohlc_fut = calculate_ohlc(fut_df, "FUT")
-            ohlc_ce = calculate_ohlc(ce_df, "CE")
-            ohlc_pe = calculate_ohlc(pe_df, "PE")
-            
-            return ohlc_fut, ohlc_ce, ohlc_pe
-
     def get_account_summary(self):
         try:
             if not self.smartapi:
@@ -945,51 +827,25 @@ class CrudeATMWebSocket:
         return {'balance': '--', 'pnl': '--'}
 
     def get_strategy_status(self):
-        """Get current strategy status for both CE and PE options"""
+        """Current strategy status for the ATM CE and PE options.
+
+        Served from the indicator state the strategy stage publishes to the
+        market data service on every tick, so a poll neither re-aggregates
+        ticks nor touches the feed thread.
+        """
         def clean_indicators(indicators):
             return {k: None if isinstance(v, float) and (math.isnan(v) or math.isinf(v)) else v 
                    for k, v in indicators.items()}
         
-        # Get latest OHLC data using a fixed interval for strategy calculation
-        strategy_interval = '5s'
-        _, ce_ohlc, pe_ohlc = self.aggregate_ohlc(interval=strategy_interval)
-        
-        # Update indicators from OHLC
-        if not ce_ohlc.empty:
-            last_ce = ce_ohlc.iloc[-1]
-            self.latest_indicators_ce = {
-                'fast_ema': float(last_ce.get('fast_ema', 0)) if not pd.isna(last_ce.get('fast_ema')) else None,
-                'slow_ema': float(last_ce.get('slow_ema', 0)) if not pd.isna(last_ce.get('slow_ema')) else None,
-                'rsi': float(last_ce.get('rsi', 0)) if not pd.isna(last_ce.get('rsi')) else None,
-                'vwap': float(last_ce.get('vwap', 0)) if not pd.isna(last_ce.get('vwap')) else None,
-                 'atr': float(last_ce.get('atr', 0)) if not pd.isna(last_ce.get('atr')) else None,
-                 'macd': float(last_ce.get('macd', 0)) if not pd.isna(last_ce.get('macd')) else None,
-                 'macd_signal': float(last_ce.get('macd_signal', 0)) if not pd.isna(last_ce.get('macd_signal')) else None,
-                'market_regime': self.strategy_ce.market_regime if self.strategy_ce.market_regime else None,
-            }
-        
-        if not pe_ohlc.empty:
-            last_pe = pe_ohlc.iloc[-1]
-            self.latest_indicators_pe = {
-                'fast_ema': float(last_pe.get('fast_ema', 0)) if not pd.isna(last_pe.get('fast_ema')) else None,
-                'slow_ema': float(last_pe.get('slow_ema', 0)) if not pd.isna(last_pe.get('slow_ema')) else None,
-                'rsi': float(last_pe.get('rsi', 0)) if not pd.isna(last_pe.get('rsi')) else None,
-                'vwap': float(last_pe.get('vwap', 0)) if not pd.isna(last_pe.get('vwap')) else None,
-                 'atr': float(last_pe.get('atr', 0)) if not pd.isna(last_pe.get('atr')) else None,
-                 'macd': float(last_pe.get('macd', 0)) if not pd.isna(last_pe.get('macd')) else None,
-                 'macd_signal': float(last_pe.get('macd_signal', 0)) if not pd.isna(last_pe.get('macd_signal')) else None,
-                'market_regime': self.strategy_pe.market_regime if self.strategy_pe.market_regime else None,
-            }
-        
         return {
             'ce': {
                 'signal': self.latest_signal_ce,
-                'indicators': clean_indicators(self.latest_indicators_ce),
+                'indicators': clean_indicators(self.market_data.indicators('CE')),
                 'info': self.ce_info
             },
             'pe': {
                 'signal': self.latest_signal_pe,
-                'indicators': clean_indicators(self.latest_indicators_pe),
+                'indicators': clean_indicators(self.market_data.indicators('PE')),
                 'info': self.pe_info
             }
         }
@@ -1014,6 +870,8 @@ def ensure_instrument_file():
         df = pd.DataFrame.from_dict(requests_data)
         df.to_csv(instruments_file, index=False)
         logging.info("[+] Instrument file Downloaded successfully")
+    # Build (or load) the MCX index now so subscription never parses the CSV
+    get_instrument_index()
 
 ensure_instrument_file()
 
@@ -1053,28 +911,15 @@ def send_email(user, password, subject, body):
         return False, str(e)
 
 class CustomJSONProvider(JSONProvider):
+    """Flask JSON backed by ``serialization.dumps`` (orjson when installed; NumPy/pandas native)."""
     def dumps(self, obj, **kwargs):
-        def _default(o):
-            if isinstance(o, np.integer):
-                return int(o)
-            if isinstance(o, np.floating):
-                if np.isnan(o):
-                    return None
-                return float(o)
-            if isinstance(o, np.ndarray):
-                return o.tolist()
-            if isinstance(o, pd.Timestamp):
-                return o.isoformat()
-            if isinstance(o, pd.DataFrame):
-                return o.replace({np.nan: None}).to_dict(orient='records')
-            if isinstance(o, float):
-                if math.isnan(o):
-                    return None
-                return o
-            return str(o)
-        return json.dumps(obj, default=_default, **kwargs)
+        return serialization.dumps(obj).decode('utf-8')
     def loads(self, s, **kwargs):
-        return json.loads(s, **kwargs)
+        return serialization.loads(s)
+    def response(self, *args, **kwargs):
+        # Skip the bytes -> str -> bytes round trip of the base implementation
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(serialization.dumps(obj), mimetype=serialization.JSON_MIME)
 
 
 
@@ -1093,6 +938,13 @@ socketio = SocketIO(
 )
 app.json = CustomJSONProvider(app)
 
+@socketio.on('connect')
+def handle_connect():
+    """Send the full coalesced state so a new client can apply later deltas."""
+    ws = getattr(app, 'ws', None)
+    if ws is not None and hasattr(ws, 'publisher'):
+        emit('batch', ws.publisher.keyframe())
+
 # === File Watcher (after SocketIO is ready) ===
 try:
     watcher_path = os.getenv('WATCH_PATH', 'watched_dir')
@@ -1150,33 +1002,22 @@ def add_indicators_to_ohlc(df):
             df['macd_signal'] = 0
             return df
         
+        close, high, low, volume = df['close'], df['high'], df['low'], df['volume']
         # Calculate EMAs
-        df['fast_ema'] = df['close'].ewm(span=9, adjust=False).mean()
-        df['slow_ema'] = df['close'].ewm(span=21, adjust=False).mean()
+        df['fast_ema'] = indicators.ema(close, 9)
+        df['slow_ema'] = indicators.ema(close, 21)
         # Calculate MACD (difference between EMAs) and its signal line
         df['macd'] = df['fast_ema'] - df['slow_ema']
-        df['macd_signal'] = df['macd'].ewm(span=9, adjust=False).mean()
+        df['macd_signal'] = indicators.ema(df['macd'], 9)
         
         # Calculate VWAP
-        typical_price = (df['high'] + df['low'] + df['close']) / 3
-        volume_price = typical_price * df['volume']
-        cumulative_volume = df['volume'].rolling(window=20, min_periods=1).sum()
-        cumulative_volume_price = volume_price.rolling(window=20, min_periods=1).sum()
-        df['vwap'] = cumulative_volume_price / cumulative_volume
+        df['vwap'] = indicators.rolling_vwap(high, low, close, volume, 20, min_periods=1)
         
         # Calculate RSI
-        delta = df['close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14, min_periods=1).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14, min_periods=1).mean()
-        rs = gain / loss
-        df['rsi'] = 100 - (100 / (1 + rs))
+        df['rsi'] = indicators.rsi(close, 14, min_periods=1)
         
         # Calculate ATR
-        high_low = df['high'] - df['low']
-        high_close = np.abs(df['high'] - df['close'].shift())
-        low_close = np.abs(df['low'] - df['close'].shift())
-        true_range = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-        df['atr'] = true_range.rolling(window=14, min_periods=1).mean()
+        df['atr'] = indicators.atr(high, low, close, 14, min_periods=1)
         
         # Fill any NaN values with defaults
         df['fast_ema'] = df['fast_ema'].fillna(df['close'])
@@ -1215,6 +1056,32 @@ def handle_error(error):
 def chart():
     return render_template('base.html')
 
+ohlc_responses = OhlcResponseCache()
+
+def _ohlc_response(market_data, symbols, interval, limit, since, fill=True):
+    """Assemble the /ohlc body from per-contract pre-serialized bars in the negotiated format."""
+    fmt = serialization.negotiate(request.headers.get('Accept'), request.args.get('format'))
+    versions = {contract_type: market_data.version(symbol) for contract_type, symbol in symbols.items()}
+    builders = {}
+    for contract_type, symbol in symbols.items():
+        def build(symbol=symbol):
+            ohlc_df = market_data.bars(symbol, interval, limit, fill=fill)
+            return add_indicators_to_ohlc(ohlc_df) if not ohlc_df.empty else ohlc_df
+        builders[contract_type] = ((symbol, interval, limit, fill), versions[contract_type], build)
+    etag = 'W/"%s-%s-%s-%s-%d-%s"' % (fmt, interval, limit, since, fill,
+                                   '-'.join(f"{symbols[ct]}.{versions[ct]}" for ct in symbols))
+    if request.headers.get('If-None-Match') == etag:
+        return app.response_class(status=304, headers={'ETag': etag})
+    if fmt == 'arrow':
+        body, mimetype = serialization.encode_tables(
+            {ct.lower(): ohlc_responses.columns(*args, since) for ct, args in builders.items()}, fmt)
+    else:
+        body = serialization.encode_map(
+            {ct.lower(): ohlc_responses.get(*args, since, fmt) for ct, args in builders.items()}, fmt)
+        mimetype = serialization.FORMAT_MIMES[fmt]
+    return app.response_class(body, mimetype=mimetype,
+                              headers={'ETag': etag, 'Cache-Control': 'no-cache', 'Vary': 'Accept'})
+
 @app.route("/ohlc")
 def ohlc():
     if not hasattr(app, 'ws') or not app.ws:
@@ -1222,160 +1089,67 @@ def ohlc():
     
     interval = request.args.get('interval', '1s')  # Default to 1 second for high-frequency
     limit = int(request.args.get('limit', 100))  # Number of bars to return
+    # Flat bars for short gaps inside a session (fill=0 returns traded bars only)
+    fill = request.args.get('fill', '1').lower() not in ('0', 'false', 'no')
     
     # Ensure the requested interval is valid
-    if interval not in ["1s", "5s", "10s", "30s", "1min", "5min", "15min", "1h"]:
+    if interval not in app.ws.supported_intervals:
         return jsonify({"error": f"Invalid interval: {interval}"}), 400
 
-    logger.info(f"Getting OHLC data with interval: {interval}, limit: {limit}")
+    try:
+        # Only bars starting at or after this bucket (epoch ms or ISO); the newest bar is always sent
+        since = parse_since(request.args.get('since'))
+    except ValueError:
+        return jsonify({"error": f"Invalid since: {request.args.get('since')}"}), 400
+
+    logger.debug(f"Getting OHLC data with interval: {interval}, limit: {limit}, since: {since}")
     
     try:
-        # NEW: Use optimized handler for fast OHLC data
-        if hasattr(app.ws, 'data_manager') or hasattr(app.ws, 'optimized_handler'):
-            result = {'fut': [], 'ce': [], 'pe': []}
-            
-            # PRIMARY: Try data manager in-memory cache first (fastest)
-            if hasattr(app.ws, 'data_manager'):
-                logger.info("Using data manager for OHLC data...")
-                for contract_type in ['FUT', 'CE', 'PE']:
-                    try:
-                        # Pass the interval to the data manager
-                        ohlc_df = app.ws.data_manager.get_fast_ohlc('CRUDEOIL', contract_type, limit, interval=interval)
-                        if not ohlc_df.empty:
-                            # Add indicators
-                            ohlc_df = add_indicators_to_ohlc(ohlc_df)
-                            
-                            # Convert to JSON format
-                            ohlc_data = []
-                            for idx, row in ohlc_df.iterrows():
-                                ohlc_data.append({
-                                    'timestamp': idx.isoformat() if hasattr(idx, 'isoformat') else str(idx),
-                                    'open': float(row['open']) if not pd.isna(row['open']) else 0,
-                                    'high': float(row['high']) if not pd.isna(row['high']) else 0,
-                                    'low': float(row['low']) if not pd.isna(row['low']) else 0,
-                                    'close': float(row['close']) if not pd.isna(row['close']) else 0,
-                                    'volume': int(row['volume']) if not pd.isna(row['volume']) else 0,
-                                    'oi': int(row['oi']) if not pd.isna(row['oi']) else 0,
-                                    'fast_ema': float(row.get('fast_ema', 0)) if not pd.isna(row.get('fast_ema')) else 0,
-                                    'slow_ema': float(row.get('slow_ema', 0)) if not pd.isna(row.get('slow_ema')) else 0,
-                                    'vwap': float(row.get('vwap', 0)) if not pd.isna(row.get('vwap')) else 0,
-                                    'rsi': float(row.get('rsi', 50)) if not pd.isna(row.get('rsi', 50)) else 50,
-                                     'atr': float(row.get('atr', 0)) if not pd.isna(row.get('atr')) else 0,
-                                     'macd': float(row.get('macd', 0)) if not pd.isna(row.get('macd')) else 0,
-                                     'macd_signal': float(row.get('macd_signal', 0)) if not pd.isna(row.get('macd_signal')) else 0
-                                })
-                            
-                            result[contract_type.lower()] = ohlc_data
-                            logger.info(f"Data Manager: {contract_type} OHLC has {len(ohlc_data)} data points")
-                    except Exception as e:
-                        logger.error(f"Error getting {contract_type} data from data manager: {e}")
-                        
-                # If we got data from data manager, return it
-                total_points = sum(len(v) for v in result.values())
-                if total_points > 0:
-                    logger.info(f"Returning data from Data Manager - Total points: {total_points}")
-                    return jsonify(result)
-            
-            # SECONDARY: Try optimized handler
-            if hasattr(app.ws, 'optimized_handler'):
-                logger.info("Trying optimized handler for OHLC data...")
-                # Pass the interval to the optimized handler
-                handler_ohlc = app.ws.optimized_handler.get_ohlc_data(interval=interval)
-                
-                for symbol, ohlc_data in handler_ohlc.items():
-                    if ohlc_data and isinstance(ohlc_data, dict):
-                        # Convert handler OHLC dict to DataFrame
-                        df_data = []
-                        for timestamp, candle in sorted(ohlc_data.items()):
-                            df_data.append({
-                                'timestamp': pd.to_datetime(timestamp),
-                                'open': candle.get('open', 0),
-                                'high': candle.get('high', 0),
-                                'low': candle.get('low', 0),
-                                'close': candle.get('close', 0),
-                                'volume': candle.get('volume', 0),
-                                'oi': 0
-                            })
-                        
-                        if df_data:
-                            ohlc_df = pd.DataFrame(df_data).tail(limit)
-                            ohlc_df = ohlc_df.set_index('timestamp')
-                            
-                            # Add indicators
-                            ohlc_df = add_indicators_to_ohlc(ohlc_df)
-                            
-                            # Convert to JSON format
-                            json_ohlc_data = []
-                            for idx, row in ohlc_df.iterrows():
-                                json_ohlc_data.append({
-                                    'timestamp': idx.isoformat() if hasattr(idx, 'isoformat') else str(idx),
-                                    'open': float(row['open']) if not pd.isna(row['open']) else 0,
-                                    'high': float(row['high']) if not pd.isna(row['high']) else 0,
-                                    'low': float(row['low']) if not pd.isna(row['low']) else 0,
-                                    'close': float(row['close']) if not pd.isna(row['close']) else 0,
-                                    'volume': int(row['volume']) if not pd.isna(row['volume']) else 0,
-                                    'oi': int(row['oi']) if not pd.isna(row['oi']) else 0,
-                                    'fast_ema': float(row.get('fast_ema', 0)) if not pd.isna(row.get('fast_ema')) else 0,
-                                    'slow_ema': float(row.get('slow_ema', 0)) if not pd.isna(row.get('slow_ema')) else 0,
-                                    'vwap': float(row.get('vwap', 0)) if not pd.isna(row.get('vwap')) else 0,
-                                    'rsi': float(row.get('rsi', 50)) if not pd.isna(row.get('rsi', 50)) else 50,
-                                     'atr': float(row.get('atr', 0)) if not pd.isna(row.get('atr')) else 0,
-                                     'macd': float(row.get('macd', 0)) if not pd.isna(row.get('macd')) else 0,
-                                     'macd_signal': float(row.get('macd_signal', 0)) if not pd.isna(row.get('macd_signal')) else 0
-                                })
-                            
-                            # Map symbol to contract type
-                            if '_FUT' in symbol.upper():
-                                result['fut'] = json_ohlc_data
-                                logger.info(f"Optimized Handler: FUT OHLC has {len(json_ohlc_data)} data points for symbol {symbol}")
-                            elif '_CE' in symbol.upper():
-                                result['ce'] = json_ohlc_data
-                                logger.info(f"Optimized Handler: CE OHLC has {len(json_ohlc_data)} data points for symbol {symbol}")
-                            elif '_PE' in symbol.upper():
-                                result['pe'] = json_ohlc_data
-                                logger.info(f"Optimized Handler: PE OHLC has {len(json_ohlc_data)} data points for symbol {symbol}")
-            
-                # If we got data from optimized handler, return it
-                total_points = sum(len(v) for v in result.values())
-                if total_points > 0:
-                    logger.info(f"Returning data from Optimized Handler - Total points: {total_points}")
-                    return jsonify(result)
-            
-            # TERTIARY: Try legacy aggregate method as final fallback
-            logger.info("Trying legacy aggregate method...")
-            fut, ce, pe = app.ws.aggregate_ohlc(interval=interval)
-            
-            # Add indicators to legacy data
-            if not fut.empty:
-                fut = add_indicators_to_ohlc(fut)
-            if not ce.empty:
-                ce = add_indicators_to_ohlc(ce)
-            if not pe.empty:
-                pe = add_indicators_to_ohlc(pe)
-                
-            logger.info(f"Legacy OHLC Data sizes - Futures: {len(fut)}, CE: {len(ce)}, PE: {len(pe)}")
-            
-            # Return legacy data if available
-            legacy_result = {
-                'fut': fut.to_dict('records') if not fut.empty else [],
-                'ce': ce.to_dict('records') if not ce.empty else [],
-                'pe': pe.to_dict('records') if not pe.empty else []
-            }
-            
-            total_legacy_points = sum(len(v) for v in legacy_result.values())
-            if total_legacy_points > 0:
-                logger.info(f"Returning legacy data - Total points: {total_legacy_points}")
-                return jsonify(legacy_result)
-            
-            # If no data found anywhere, return empty result with logging
-            logger.warning("No OHLC data found in any source - returning empty result")
-            return jsonify(result)
-            
+        # Bars of the current ATM contracts, straight from the market data service
+        symbols = {contract_type: app.ws.ohlc_symbol(contract_type) for contract_type in ('FUT', 'CE', 'PE')}
+        return _ohlc_response(app.ws.market_data, symbols, interval, limit, since, fill)
     except Exception as e:
         logger.error(f"Error in OHLC: {str(e)}")
         logger.error(traceback.format_exc())
         return jsonify({"error": str(e)}), 500
 
+@app.route("/ohlc/history")
+def ohlc_history():
+    """Long-range bars for one contract from the mcx_ohlc pyramid (level picked by span)."""
+    if not hasattr(app, 'ws') or not app.ws:
+        return jsonify({"error": "WebSocket not initialized"}), 500
+    if app.ws.bar_history is None:
+        return jsonify({"error": "Bar history not available"}), 503
+
+    contract_type = request.args.get('type', 'FUT').upper()
+    symbol = request.args.get('symbol') or app.ws.ohlc_symbol(contract_type)
+    try:
+        # start/end: epoch ms or ISO; default window is the last day
+        end = parse_since(request.args.get('end'))
+        start = parse_since(request.args.get('start'))
+        max_points = int(request.args.get('max_points', 0)) or None
+    except ValueError:
+        return jsonify({"error": "Invalid start/end/max_points"}), 400
+    end = end if end is not None else now_ms()
+    start = start if start is not None else end - 86_400_000
+    if start >= end:
+        return jsonify({"error": "start must be before end"}), 400
+
+    try:
+        level, columns = app.ws.bar_history.bars(symbol, start, end, max_points)
+        columns = {'bar_ts': columns['bucket_start'],
+                   **{name: values for name, values in columns.items() if name != 'bucket_start'}}
+        fmt = serialization.negotiate(request.headers.get('Accept'), request.args.get('format'))
+        if fmt == 'json':
+            fmt = 'columns'
+        body, mimetype = serialization.encode_tables({contract_type.lower(): columns}, fmt)
+        return app.response_class(body, mimetype=mimetype,
+                                  headers={'X-Bar-Interval': level, 'Vary': 'Accept'})
+    except Exception as e:
+        logger.error(f"Error in OHLC history: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({"error": str(e)}), 500
+
 @app.route("/info")
 def info():
     if not hasattr(app, 'ws') or not app.ws:
@@ -1402,25 +1176,7 @@ def strategy_status():
         return jsonify({"error": "WebSocket not initialized"}), 500
     try:
         status = app.ws.get_strategy_status()
-        # Log the full status for debugging
-        logger.info(f"Full strategy status response: {json.dumps(status, default=str)}")
-        
-        # Verify CE indicators
-        if status['ce']['indicators']:
-            logger.info("CE Indicators present:")
-            for k, v in status['ce']['indicators'].items():
-                logger.info(f"  {k}: {v}")
-        else:
-            logger.warning("No CE indicators found")
-            
-        # Verify PE indicators
-        if status['pe']['indicators']:
-            logger.info("PE Indicators present:")
-            for k, v in status['pe']['indicators'].items():
-                logger.info(f"  {k}: {v}")
-        else:
-            logger.warning("No PE indicators found")
-            
+        logger.debug("Strategy status: %s", status)
         return jsonify(status)
     except Exception as e:
         logger.error(f"Error in strategy_status: {str(e)}")
@@ -1435,9 +1191,8 @@ def strategy_params():
         params = request.json
         logger.info(f"Received strategy parameter update: {params}")
         
-        # Use the proper update_parameters method for both strategies
-        for strat in [app.ws.strategy_ce, app.ws.strategy_pe]:
-            strat.update_parameters(params)
+        # Apply to every per-contract strategy (and to ones created later)
+        app.ws.apply_strategy_params(params)
         
         logger.info("Strategy parameters updated successfully")
         return jsonify({"status": "ok"})
@@ -1879,19 +1634,27 @@ def run_backtest():
         combined_eq.index = pd.to_datetime(combined_eq.index, utc=True, errors='coerce')
         combined_eq = combined_eq.iloc[::step]
 
-        def _fmt(ts):
-            try:
-                return pd.to_datetime(ts).strftime('%Y-%m-%d %H:%M:%S')
-            except Exception:
-                return str(ts)
-
-        idx = combined_eq.index
-        dates_list = [_fmt(ts) for ts in idx]
+        def _trades(trades, label):
+            # Column-wise: one vectorised strftime per time column instead of a parse per trade
+            if not trades:
+                return []
+            df = pd.DataFrame(trades)
+            return pd.DataFrame({
+                'entry_time': serialization.format_times(df['entry_time']),
+                'exit_time': serialization.format_times(df['exit_time']),
+                'type': label + ' ' + df['type'].astype(str),
+                'entry_price': df['entry_price'],
+                'exit_price': df['exit_price'],
+                'pnl': df['pnl'],
+                'return': df['return'],
+            }).to_dict('records')
+
+        dates_list = serialization.format_times(combined_eq.index.to_series())
 
         formatted_results = {
             'dates': dates_list,
             'combined': {
-                'equity_curve': combined_eq.tolist(),
+                'equity_curve': combined_eq.to_numpy(),
                 'total_return': results['combined']['total_return'],
                 'max_drawdown': results['combined']['max_drawdown'],
                  'profit_factor': results['combined']['profit_factor'],
@@ -1910,28 +1673,12 @@ def run_backtest():
             },
             'ce': {
                 # CE equity curve also trimmed the same way for consistency
-                'equity_curve': results['ce']['equity_curve'].iloc[::step].tolist() if len(results['ce']['equity_curve']) > max_points else results['ce']['equity_curve'].tolist(),
-                'trades': [{
-                    'entry_time': _fmt(t['entry_time']),
-                    'exit_time': _fmt(t['exit_time']),
-                    'type': 'CE ' + t['type'],
-                    'entry_price': t['entry_price'],
-                    'exit_price': t['exit_price'],
-                    'pnl': t['pnl'],
-                    'return': t['return']
-                } for t in results['ce']['trades']]
+                'equity_curve': results['ce']['equity_curve'].iloc[::step].to_numpy() if len(results['ce']['equity_curve']) > max_points else results['ce']['equity_curve'].to_numpy(),
+                'trades': _trades(results['ce']['trades'], 'CE')
             },
             'pe': {
-                'equity_curve': results['pe']['equity_curve'].iloc[::step].tolist() if len(results['pe']['equity_curve']) > max_points else results['pe']['equity_curve'].tolist(),
-                'trades': [{
-                    'entry_time': _fmt(t['entry_time']),
-                    'exit_time': _fmt(t['exit_time']),
-                    'type': 'PE ' + t['type'],
-                    'entry_price': t['entry_price'],
-                    'exit_price': t['exit_price'],
-                    'pnl': t['pnl'],
-                    'return': t['return']
-                } for t in results['pe']['trades']]
+                'equity_curve': results['pe']['equity_curve'].iloc[::step].to_numpy() if len(results['pe']['equity_curve']) > max_points else results['pe']['equity_curve'].to_numpy(),
+                'trades': _trades(results['pe']['trades'], 'PE')
             }
         }
         return jsonify(formatted_results)
@@ -2193,12 +1940,9 @@ def performance():
     try:
         stats = {}
         
-        # Get optimized handler stats
-        if hasattr(app.ws, 'optimized_handler') and hasattr(app.ws.optimized_handler, 'get_performance_stats'):
-            handler_stats = app.ws.optimized_handler.get_performance_stats()
-            stats['ticks_processed'] = handler_stats.get('ticks_processed', 0)
-            # You can add other handler-specific stats here if needed
-            # For example: stats['tick_queue_size'] = handler_stats.get('tick_queue_size', 0)
+        # Live market data stats
+        stats['market_data'] = app.ws.market_data.stats()
+        stats['ticks_processed'] = stats['market_data']['ticks_ingested']
 
         # Add system stats if psutil is available
         if PSUTIL_AVAILABLE:
@@ -2214,15 +1958,26 @@ def performance():
             stats['system'] = {'note': 'psutil not available - install for system metrics'}
         
         # Add tick buffer stats
-        with app.ws.lock:
-            stats['legacy_tick_buffer_size'] = len(app.ws.tick_buffer)
+        stats['legacy_tick_buffer_size'] = stats['market_data']['recent_ticks']
         
         # Add database availability
         stats['questdb_available'] = hasattr(app.ws.data_manager, 'questdb') and app.ws.data_manager.questdb.running
         
-        # Add a placeholder for avg_latency_ms if it's not available from the handler
-        if 'avg_latency_ms' not in stats:
-            stats['avg_latency_ms'] = None
+        # Per-stage tick latency histograms (receive -> strategy done is the headline figure)
+        stats['latency'] = app.ws.latency.snapshot()
+        stats['avg_latency_ms'] = app.ws.latency.mean_ms('processing')
+        stats['socket_publisher'] = app.ws.publisher.stats()
+        stats['logging'] = trade_logging.logging_stats()
+        if app.ws.subscriptions is not None:
+            stats['subscriptions'] = app.ws.subscriptions.stats()
+        if app.ws.tick_log:
+            stats['tick_log'] = app.ws.tick_log.stats()
+        stats['ohlc_cache'] = ohlc_responses.stats()
+        if app.ws.bar_history is not None:
+            stats['bar_history'] = app.ws.bar_history.stats()
+        stats['warm_start'] = app.ws.warm_start.stats()
+        # Every bounded queue: depth, high-water mark, enqueued/dropped/spilled, time in queue
+        stats['queues'] = queue_stats()
 
         return jsonify(stats)
         
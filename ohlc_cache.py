@@ -0,0 +1,137 @@
+"""
+Versioned /ohlc response cache for MCX Trading System
+Chart polls are answered from pre-serialized JSON keyed by (source, contract,
+interval, limit) and tagged with the contract's candle-store version. The
+version bumps on every bar change, so polls between ticks cost a dict lookup
+and the frame/indicator/serialization work runs at most once per change.
+
+Every bar carries ``bar_ts`` (bucket start, epoch ms). Clients that pass
+``since=<bar_ts>`` get only bars starting at or after it; the newest bar is
+always included because it may still be open. Entries hold the bars as
+column arrays and keep one encoded body per response format.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+import numpy as np
+import pandas as pd
+
+import serialization
+from timeutil import to_ms
+
+logger = logging.getLogger(__name__)
+
+# Value used when a column is missing or NaN (matches the old iterrows conversion)
+BAR_DEFAULTS = {
+    'open': 0.0, 'high': 0.0, 'low': 0.0, 'close': 0.0, 'volume': 0, 'oi': 0,
+    'fast_ema': 0.0, 'slow_ema': 0.0, 'vwap': 0.0, 'rsi': 50.0, 'atr': 0.0,
+    'macd': 0.0, 'macd_signal': 0.0,
+}
+INT_FIELDS = ('volume', 'oi')
+
+
+def parse_since(value) -> Optional[int]:
+    """``since`` query parameter -> epoch ms (accepts epoch ms or an ISO timestamp)."""
+    if value is None or value == '':
+        return None
+    text = str(value).strip()
+    if text.lstrip('-').isdigit():
+        return int(text)
+    return to_ms(text)
+
+
+def bar_columns(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    return serialization.frame_columns(df, BAR_DEFAULTS, INT_FIELDS)
+
+
+def encode_bars(columns: Dict[str, np.ndarray], fmt: str = 'json') -> bytes:
+    """``json``: legacy list of bar objects; ``columns``/``msgpack``: one array per field."""
+    if fmt == 'json':
+        return serialization.dumps(serialization.records(columns))
+    return serialization.encode_columns(columns, fmt)
+
+
+class _Entry:
+    __slots__ = ('version', 'columns', 'bodies')
+
+    def __init__(self, version: int, columns: Dict[str, np.ndarray]):
+        self.version = version
+        self.columns = columns
+        self.bodies: Dict[str, bytes] = {}   # format -> serialized full window
+
+    def encode(self, fmt: str, start: int = 0) -> bytes:
+        if start:
+            return encode_bars(serialization.slice_columns(self.columns, start), fmt)
+        body = self.bodies.get(fmt)
+        if body is None:
+            body = self.bodies[fmt] = encode_bars(self.columns, fmt)
+        return body
+
+
+class OhlcResponseCache:
+    """LRU of serialized bar lists, invalidated by a per-contract version counter."""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Hashable, _Entry]' = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+
+    def _entry(self, key: Hashable, version: int, build: Callable[[], pd.DataFrame]) -> _Entry:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.version == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+        # Build outside the lock; a concurrent miss for the same key just does the work twice
+        entry = _Entry(version, bar_columns(build()))
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def _start(self, entry: _Entry, since: Optional[int]) -> int:
+        bar_ts = entry.columns['bar_ts']
+        if since is None or not len(bar_ts):
+            return 0
+        # The newest bar may still be open, so it is always resent
+        return min(int(np.searchsorted(bar_ts, since, side='left')), len(bar_ts) - 1)
+
+    def get(self, key: Hashable, version: int, build: Callable[[], pd.DataFrame],
+            since: Optional[int] = None, fmt: str = 'json') -> bytes:
+        """Serialized bars for ``key`` at ``version``; ``build`` returns the frame on a miss.
+
+        The full window is encoded once per format and version. With ``since``
+        only bars starting at or after it are encoded (per call, which is cheap
+        for the handful of bars a cursor poll needs).
+        """
+        entry = self._entry(key, version, build)
+        return entry.encode(fmt, self._start(entry, since))
+
+    def columns(self, key: Hashable, version: int, build: Callable[[], pd.DataFrame],
+                since: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Column arrays (read-only views) for binary encoders that assemble a whole response."""
+        entry = self._entry(key, version, build)
+        return serialization.slice_columns(entry.columns, self._start(entry, since))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0,
+        }
@@ -0,0 +1,90 @@
+"""
+Long-range chart bars for MCX Trading System
+Serves charts spanning hours to weeks from bars persisted in QuestDB
+``mcx_ohlc``, picking the pyramid level (1s -> 1min -> 15min -> 1d) whose
+bar count for the requested span fits ``max_points``.
+
+The persisted part of a window is read with ``QuestDBManager.get_bars``,
+whose query cache keeps it until bars are flushed into that window (late
+bars from a spill resume or a post-outage drain included). The still-open
+tail comes from the live candle store, so a week-long chart costs one cached
+lookup plus a handful of live bars, the same as a one-hour chart.
+"""
+import logging
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from market_data_service import PERSIST_INTERVALS
+from timeutil import floor_ist_ms, interval_ms, now_ms
+
+logger = logging.getLogger(__name__)
+
+MAX_POINTS = 2000
+BAR_FIELDS = ('bucket_start', 'open', 'high', 'low', 'close', 'volume', 'oi')
+
+
+class BarHistory:
+    """Multi-resolution bar reader over QuestDB plus the live candle store."""
+
+    def __init__(self, questdb, market_data, levels: Iterable[str] = PERSIST_INTERVALS,
+                 max_points: int = MAX_POINTS):
+        self.questdb = questdb
+        self.market_data = market_data
+        self.levels = sorted(levels, key=interval_ms)
+        self.max_points = max_points
+
+        # Counters
+        self.requests = 0
+        self.live_bars = 0
+
+    def level_for(self, span_ms: int, max_points: Optional[int] = None) -> str:
+        """Finest pyramid level with at most ``max_points`` bars over ``span_ms``."""
+        max_points = max_points or self.max_points
+        for level in self.levels:
+            if span_ms / interval_ms(level) <= max_points:
+                return level
+        return self.levels[-1]
+
+    def _live(self, symbol: str, level: str, after: int, end: int) -> Dict[str, np.ndarray]:
+        """Live store bars with ``after`` < bucket start < ``end`` (open bar included)."""
+        frame = self.market_data.bars(symbol, level)
+        if frame.empty:
+            return {}
+        starts = frame.index.as_unit('ms').asi8
+        keep = (starts > after) & (starts < end)
+        if not keep.any():
+            return {}
+        columns = {'bucket_start': starts[keep]}
+        for name in BAR_FIELDS[1:]:
+            columns[name] = frame[name].to_numpy()[keep]
+        return columns
+
+    def bars(self, symbol: str, start_ms: int, end_ms: Optional[int] = None,
+             max_points: Optional[int] = None) -> Tuple[str, Dict[str, np.ndarray]]:
+        """(level, columns) for ``symbol`` over [start_ms, end_ms), oldest first.
+
+        ``bucket_start`` is epoch ms; live bars fill in whatever QuestDB has
+        not received yet (the open bar and the writer's flush lag).
+        """
+        end_ms = now_ms() if end_ms is None else end_ms
+        level = self.level_for(max(end_ms - start_ms, 0), max_points)
+        step = interval_ms(level)
+        start = floor_ist_ms(start_ms, step)
+        end = floor_ist_ms(end_ms, step)
+        self.requests += 1
+        persisted = self.questdb.get_bars(symbol, level, start, end)
+        last = int(persisted['bucket_start'][-1]) if len(persisted['bucket_start']) else start - 1
+        live = self._live(symbol, level, last, end + step)
+        if not live:
+            return level, dict(persisted)   # callers own the dict; the arrays stay shared and read-only
+        self.live_bars += len(live['bucket_start'])
+        return level, {name: np.concatenate((persisted[name], live[name].astype(persisted[name].dtype)))
+                       for name in BAR_FIELDS}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'levels': self.levels,
+            'requests': self.requests,
+            'live_bars': self.live_bars,
+        }
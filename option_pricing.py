@@ -0,0 +1,138 @@
+"""
+Vectorized Black-Scholes pricing for MCX options
+Prices, Greeks and implied volatility for whole strike ladders in one NumPy pass.
+
+All functions broadcast their arguments, so scalars and arrays can be mixed
+freely (e.g. one underlying price against an array of strikes). Greeks use the
+same scaling as the strategy: theta per calendar day, vega and rho per 1%.
+"""
+import logging
+from typing import Dict, Optional
+
+import numpy as np
+from scipy.special import ndtr
+
+logger = logging.getLogger(__name__)
+
+_INV_SQRT_2PI = 1.0 / np.sqrt(2.0 * np.pi)
+
+# Search bracket for implied volatility (annualised)
+IV_MIN = 1e-4
+IV_MAX = 5.0
+
+
+def _norm_pdf(x):
+    return _INV_SQRT_2PI * np.exp(-0.5 * x * x)
+
+
+def is_call(option_type) -> np.ndarray:
+    """Normalise 'call'/'put' strings (or arrays of them / booleans) to a boolean array."""
+    if isinstance(option_type, str):
+        return np.asarray(option_type.lower().startswith('c'))
+    arr = np.asarray(option_type)
+    if arr.dtype.kind in 'USO':
+        return np.char.startswith(np.char.lower(arr.astype(str)), 'c')
+    return arr.astype(bool)
+
+
+def _d1_d2(S, K, T, r, sigma):
+    sqrt_t = np.sqrt(T)
+    vol_t = sigma * sqrt_t
+    d1 = (np.log(S / K) + (r + 0.5 * sigma * sigma) * T) / vol_t
+    return d1, d1 - vol_t, sqrt_t
+
+
+def black_scholes(S, K, T, r, sigma, option_type='call') -> np.ndarray:
+    """Black-Scholes price for arrays of contracts."""
+    S, K, T, r, sigma = (np.asarray(v, dtype=np.float64) for v in (S, K, T, r, sigma))
+    call = is_call(option_type)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        d1, d2, _ = _d1_d2(S, K, T, r, sigma)
+        disc_k = K * np.exp(-r * T)
+        return np.where(call,
+                        S * ndtr(d1) - disc_k * ndtr(d2),
+                        disc_k * ndtr(-d2) - S * ndtr(-d1))
+
+
+def greeks(S, K, T, r, sigma, option_type='call') -> Dict[str, np.ndarray]:
+    """Delta, gamma, theta (per day), vega and rho (per 1%) for arrays of contracts."""
+    S, K, T, r, sigma = (np.asarray(v, dtype=np.float64) for v in (S, K, T, r, sigma))
+    call = is_call(option_type)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        d1, d2, sqrt_t = _d1_d2(S, K, T, r, sigma)
+        pdf_d1 = _norm_pdf(d1)
+        disc_k = K * np.exp(-r * T)
+        cdf_d1 = ndtr(d1)
+        decay = -S * pdf_d1 * sigma / (2 * sqrt_t)
+        return {
+            'delta': np.where(call, cdf_d1, cdf_d1 - 1),
+            'gamma': pdf_d1 / (S * sigma * sqrt_t),
+            'theta': np.where(call, decay - r * disc_k * ndtr(d2), decay + r * disc_k * ndtr(-d2)) / 365,
+            'vega': S * sqrt_t * pdf_d1 / 100,
+            'rho': np.where(call, disc_k * T * ndtr(d2), -disc_k * T * ndtr(-d2)) / 100,
+        }
+
+
+def implied_volatility(price, S, K, T, r, option_type='call', initial=None,
+                       tol: float = 1e-5, max_iterations: int = 100,
+                       sigma_min: float = IV_MIN, sigma_max: float = IV_MAX) -> np.ndarray:
+    """Implied volatility for arrays of option prices.
+
+    Newton steps are taken inside a bracket that shrinks on every iteration;
+    whenever Newton would leave the bracket (tiny vega, far-OTM strikes) the
+    step falls back to bisection, so every solvable contract converges.
+    ``initial`` warm-starts the search, typically with the previous tick's IV.
+    Contracts whose price lies outside the attainable range get NaN.
+    """
+    price, S, K, T, r = np.broadcast_arrays(*(np.asarray(v, dtype=np.float64) for v in (price, S, K, T, r)))
+    call = np.broadcast_to(is_call(option_type), price.shape)
+    shape = price.shape
+    price, S, K, T, r, call = (a.ravel() for a in (price, S, K, T, r, call))
+    n = price.size
+    out = np.full(n, np.nan)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        valid = np.isfinite(price) & (S > 0) & (K > 0) & (T > 0)
+        low_px = black_scholes(S, K, T, r, sigma_min, call)
+        high_px = black_scholes(S, K, T, r, sigma_max, call)
+        valid &= (price >= low_px - tol) & (price <= high_px + tol)
+
+    lo = np.full(n, sigma_min)
+    hi = np.full(n, sigma_max)
+    sigma = np.full(n, 0.5)
+    if initial is not None:
+        guess = np.broadcast_to(np.asarray(initial, dtype=np.float64), shape).ravel()
+        usable = np.isfinite(guess) & (guess > sigma_min) & (guess < sigma_max)
+        sigma[usable] = guess[usable]
+
+    idx = np.flatnonzero(valid)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        for _ in range(max_iterations):
+            if not idx.size:
+                break
+            s = sigma[idx]
+            args = (S[idx], K[idx], T[idx], r[idx])
+            diff = black_scholes(*args, s, call[idx]) - price[idx]
+            done = np.abs(diff) < tol
+            out[idx[done]] = s[done]
+            # Price is increasing in sigma, so the sign of diff moves one side of the bracket
+            lo[idx] = np.where(diff < 0, s, lo[idx])
+            hi[idx] = np.where(diff > 0, s, hi[idx])
+            vega = args[0] * np.sqrt(args[2]) * _norm_pdf(_d1_d2(*args, s)[0])
+            step = s - diff / vega
+            bisect = ~np.isfinite(step) | (step <= lo[idx]) | (step >= hi[idx])
+            sigma[idx] = np.where(bisect, 0.5 * (lo[idx] + hi[idx]), step)
+            keep = ~done & (hi[idx] - lo[idx] > 1e-12)
+            # Bracket collapsed without meeting tol (price at the edge of the range)
+            collapsed = ~done & ~keep
+            out[idx[collapsed]] = sigma[idx[collapsed]]
+            idx = idx[keep]
+
+    return out.reshape(shape)
+
+
+def implied_volatility_scalar(price, S, K, T, r, option_type='call', initial: Optional[float] = None,
+                              **kwargs) -> Optional[float]:
+    """Single-contract convenience wrapper; returns None when no volatility fits."""
+    iv = float(implied_volatility(price, S, K, T, r, option_type, initial=initial, **kwargs))
+    return iv if np.isfinite(iv) else None
@@ -0,0 +1,506 @@
+"""
+QuestDB query client for MCX Trading System
+Reads from QuestDB over its HTTP ``/exp`` (CSV export) endpoint through a
+small pool of keep-alive connections, with bound parameters and typed
+column results, and a result cache that new ingest invalidates.
+
+- ``bind`` renders psycopg2-style ``%s`` placeholders as escaped SQL
+  literals (``/exp`` has no server-side binds), so symbols and tokens are
+  never pasted into SQL text.
+- Results are parsed as the response streams in (pandas' C CSV parser) and
+  returned as one NumPy array per column: the dtypes asked for, epoch-ms
+  int64 for timestamp columns. Nothing is built per row.
+- ``QueryCache`` keeps results for ``ttl`` seconds, keyed by the bound SQL.
+  Writers report what they flushed with ``ingested(table, min_ts_ms)``;
+  cached results over that table whose window (``until_ms``) reaches the
+  flushed rows are dropped. A window that ends before the flushed rows stays
+  cached, so repeated historical reads (dashboards, backtests) run once.
+  Writes from other processes are only bounded by ``ttl``.
+- Identical queries in flight at the same time run once.
+- After a connection failure the client stops trying for ``retry_after``
+  seconds, and ``QueryUnavailable`` is raised at once instead of waiting on
+  a dead server for every chart poll.
+
+Run ``python questdb_query.py`` to compare CSV column decoding with the JSON
+-> DataFrame path it replaces.
+"""
+import http.client
+import logging
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence
+from urllib.parse import urlencode
+
+import numpy as np
+import pandas as pd
+
+from latency import LatencyHistogram
+from serialization import loads
+from timeutil import to_ms
+
+logger = logging.getLogger(__name__)
+
+_PLACEHOLDER = re.compile(r"%[s%]")
+
+
+class QueryError(Exception):
+    """QuestDB rejected the query (or answered with something that is not a result)."""
+
+
+class QueryUnavailable(QueryError):
+    """QuestDB could not be reached."""
+
+
+# ---------------------------------------------------------------------------
+# Parameter binding
+# ---------------------------------------------------------------------------
+
+def literal(value) -> str:
+    """One parameter as a QuestDB SQL literal."""
+    if value is None:
+        return 'NULL'
+    if isinstance(value, (bool, np.bool_)):
+        return 'true' if value else 'false'
+    if isinstance(value, (int, np.integer)):
+        return str(int(value))
+    if isinstance(value, (float, np.floating)):
+        if math.isnan(value):
+            return 'NULL'
+        if math.isinf(value):
+            raise QueryError("Infinite values cannot be bound")
+        return repr(float(value))
+    if isinstance(value, datetime):
+        # Timestamps travel as UTC ISO strings; QuestDB casts them in comparisons
+        return literal(pd.Timestamp(to_ms(value), unit='ms', tz='UTC').strftime('%Y-%m-%dT%H:%M:%S.%fZ'))
+    if isinstance(value, str):
+        if '\x00' in value:
+            raise QueryError("NUL characters cannot be bound")
+        return "'" + value.replace("'", "''") + "'"
+    raise QueryError(f"Cannot bind a parameter of type {type(value).__name__}")
+
+
+def bind(sql: str, params: Sequence) -> str:
+    """Replace each ``%s`` with the next parameter as a literal (``%%`` is a literal ``%``)."""
+    values = iter(params)
+
+    def render(match):
+        if match.group() == '%%':
+            return '%'
+        try:
+            return literal(next(values))
+        except StopIteration:
+            raise QueryError("Not enough parameters for the query") from None
+
+    sql = _PLACEHOLDER.sub(render, sql)
+    if next(values, _PLACEHOLDER) is not _PLACEHOLDER:
+        raise QueryError("Too many parameters for the query")
+    return sql
+
+
+# ---------------------------------------------------------------------------
+# Result decoding
+# ---------------------------------------------------------------------------
+
+def decode_csv(stream, dtypes: Optional[Dict[str, Any]] = None,
+               timestamps: Iterable[str] = ()) -> Dict[str, np.ndarray]:
+    """CSV export (header row first) -> column arrays, read straight from ``stream``.
+
+    ``dtypes`` fixes column types (nulls become 0 / ''); ``timestamps`` names
+    columns of ISO timestamps to return as epoch-ms int64. Other columns keep
+    the type the parser inferred.
+    """
+    dtypes = {name: np.dtype(dtype) for name, dtype in (dtypes or {}).items()}
+    timestamps = set(timestamps)
+    text = {name: str for name, dtype in dtypes.items() if dtype.kind in 'OUS'}
+    text.update((name, str) for name in timestamps)
+    try:
+        frame = pd.read_csv(stream, dtype=text, keep_default_na=False, na_values=[''])
+    except pd.errors.EmptyDataError:
+        return {}
+    columns = {}
+    for name in frame.columns:
+        values = frame[name]
+        if name in timestamps:
+            columns[name] = _epoch_ms(values)
+            continue
+        dtype = dtypes.get(name)
+        if dtype is None:
+            columns[name] = values.to_numpy()
+        elif dtype.kind in 'OUS':
+            columns[name] = values.fillna('').to_numpy(dtype=object)
+        else:
+            if dtype.kind in 'iub' and values.hasnans:
+                values = values.fillna(0)
+            columns[name] = values.to_numpy(dtype=dtype)
+    return columns
+
+
+def _epoch_ms(values: pd.Series) -> np.ndarray:
+    """QuestDB timestamps ('2025-10-16T09:00:00.000000Z', UTC) -> epoch ms; nulls become 0."""
+    text = [value[:-1] if value.endswith('Z') else value for value in values.fillna('').tolist()]
+    try:
+        # NumPy parses plain ISO-8601 several times faster than pd.to_datetime
+        parsed = np.array(text, dtype='datetime64[us]')
+    except ValueError:
+        parsed = pd.to_datetime(values, utc=True, errors='coerce').dt.tz_localize(None).to_numpy()
+    return np.where(np.isnat(parsed), 0, parsed.astype('datetime64[ms]').astype(np.int64))
+
+
+def nbytes(columns: Dict[str, np.ndarray]) -> int:
+    # Object columns hold str pointers; count the strings roughly
+    return sum(values.nbytes * (8 if values.dtype == object else 1) for values in columns.values())
+
+
+# ---------------------------------------------------------------------------
+# Result cache
+# ---------------------------------------------------------------------------
+
+class _Entry:
+    __slots__ = ('columns', 'expires', 'tables', 'until_ms', 'nbytes')
+
+    def __init__(self, columns, expires, tables, until_ms, size):
+        self.columns = columns
+        self.expires = expires
+        self.tables = tables
+        self.until_ms = until_ms
+        self.nbytes = size
+
+
+class QueryCache:
+    """LRU of query results with a TTL, invalidated by ingest into the tables they read."""
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[Hashable, _Entry]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._versions: Dict[str, int] = {}   # ingest notifications per table
+        self._bytes = 0
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.invalidated = 0
+
+    def versions(self, tables: Iterable[str]) -> tuple:
+        with self._lock:
+            return tuple(self._versions.get(table, 0) for table in tables)
+
+    def get(self, key: Hashable) -> Optional[Dict[str, np.ndarray]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires <= time.monotonic():
+                self._drop(key)
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.columns
+
+    def put(self, key: Hashable, columns: Dict[str, np.ndarray], ttl: float, tables: tuple,
+            until_ms: Optional[int], versions: tuple):
+        """Cache ``columns`` unless it is too big or the tables were written since ``versions``."""
+        size = nbytes(columns)
+        if size > self.max_bytes // 4:
+            return
+        for values in columns.values():
+            values.flags.writeable = False   # shared by every caller
+        with self._lock:
+            if tuple(self._versions.get(table, 0) for table in tables) != versions:
+                return   # ingest landed while the query ran; the result may already be stale
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = _Entry(columns, time.monotonic() + ttl, tables, until_ms, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+
+    def ingested(self, table: str, min_ts_ms: Optional[int] = None):
+        """Rows with timestamps >= ``min_ts_ms`` were written to ``table`` (None: unknown)."""
+        with self._lock:
+            self._versions[table] = self._versions.get(table, 0) + 1
+            for key, entry in list(self._entries.items()):
+                if table in entry.tables and (entry.until_ms is None or min_ts_ms is None
+                                              or min_ts_ms < entry.until_ms):
+                    self._drop(key)
+                    self.invalidated += 1
+
+    def _drop(self, key: Hashable):
+        self._bytes -= self._entries.pop(key).nbytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'memory_mb': round(self._bytes / 1e6, 2),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0,
+            'expired': self.expired,
+            'invalidated': self.invalidated,
+        }
+
+
+# ---------------------------------------------------------------------------
+# Client
+# ---------------------------------------------------------------------------
+
+class QueryClient:
+    """Pooled keep-alive HTTP client for QuestDB's ``/exp`` and ``/exec`` endpoints."""
+
+    def __init__(self, host: str = 'localhost', port: int = 9000, pool_size: int = 4, timeout: float = 30.0,
+                 cache_ttl: float = 30.0, retry_after: float = 5.0, cache: Optional[QueryCache] = None):
+        self.host = host
+        self.port = port
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl
+        self.retry_after = retry_after
+        self.cache = cache if cache is not None else QueryCache()
+        self._idle: List[http.client.HTTPConnection] = []
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, threading.Event] = {}
+        self._down_until = 0.0
+        self._outage_started: Optional[float] = None
+        self.latency = LatencyHistogram()   # server round trip + decode, cache misses only
+
+        # Counters
+        self.queries = 0
+        self.rows = 0
+        self.errors = 0
+        self.connections = 0
+        self.coalesced = 0
+
+    # ------------------------------------------------------------------
+    # Connections
+    # ------------------------------------------------------------------
+
+    def _connection(self) -> http.client.HTTPConnection:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        self.connections += 1
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def _release(self, conn: http.client.HTTPConnection, reusable: bool):
+        if reusable:
+            with self._lock:
+                self._idle.append(conn)
+        else:
+            conn.close()
+
+    def _request(self, path: str, params: Dict[str, str], read):
+        """GET ``path`` on a pooled connection and hand the response to ``read``."""
+        if time.monotonic() < self._down_until:
+            raise QueryUnavailable(f"QuestDB at {self.host}:{self.port} unreachable, retrying shortly")
+        url = f"{path}?{urlencode(params)}"
+        with self._slots:
+            for attempt in (0, 1):
+                conn = self._connection()
+                reused = conn.sock is not None
+                try:
+                    conn.request('GET', url)
+                    response = conn.getresponse()
+                except (OSError, http.client.HTTPException) as e:
+                    conn.close()
+                    if reused and attempt == 0:
+                        continue   # the server closed an idle keep-alive connection
+                    self._unreachable(e)
+                    raise QueryUnavailable(f"QuestDB at {self.host}:{self.port} unreachable: {e}") from e
+                try:
+                    if response.status != 200:
+                        raise QueryError(_error_message(response.read()))
+                    result = read(response)
+                    response.read()   # drain whatever the reader left so the connection can be reused
+                except Exception:
+                    conn.close()
+                    raise
+                self._release(conn, not response.will_close)
+                self._reachable()
+                return result
+
+    def _unreachable(self, error: Exception):
+        self.errors += 1
+        self._down_until = time.monotonic() + self.retry_after
+        if self._outage_started is None:
+            self._outage_started = time.time()
+            logger.warning(f"⚠️ QuestDB queries unavailable ({self.host}:{self.port}): {error}")
+
+    def _reachable(self):
+        if self._outage_started is not None:
+            logger.info(f"✅ QuestDB queries back after {time.time() - self._outage_started:.0f}s")
+            self._outage_started = None
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def ping(self, timeout: float = 2.0) -> bool:
+        """Whether the QuestDB web server answers (a one-off connection; the pool is not touched)"""
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=timeout)
+        try:
+            conn.request('GET', '/')
+            return conn.getresponse().status == 200
+        except (OSError, http.client.HTTPException):
+            return False
+        finally:
+            conn.close()
+
+    def execute(self, sql: str, params: Optional[Sequence] = None) -> Dict[str, Any]:
+        """Run a statement through ``/exec`` (DDL, small reads); returns QuestDB's JSON reply."""
+        sql = bind(sql, params) if params is not None else sql
+        return self._request('/exec', {'query': sql}, lambda response: loads(response.read()))
+
+    def query(self, sql: str, params: Optional[Sequence] = None, dtypes: Optional[Dict[str, Any]] = None,
+              timestamps: Iterable[str] = (), tables: Iterable[str] = (), until_ms: Optional[int] = None,
+              ttl: Optional[float] = None) -> Dict[str, np.ndarray]:
+        """Run a query and return its columns (see ``decode_csv``); raises ``QueryError``.
+
+        ``tables`` are the tables the query reads and ``until_ms`` the
+        exclusive end of its time window (None: open-ended); together they
+        decide which ingest invalidates the cached result. ``ttl`` overrides
+        the client default, 0 bypasses the cache. Cached arrays are read-only;
+        the dict is the caller's own.
+        """
+        sql = bind(sql, params) if params is not None else sql
+        timestamps = tuple(timestamps)
+        tables = tuple(tables)
+        ttl = self.cache_ttl if ttl is None else ttl
+        if ttl <= 0:
+            return self._fetch(sql, dtypes, timestamps)
+
+        key = (sql, tuple(sorted((name, np.dtype(dtype).str) for name, dtype in (dtypes or {}).items())),
+               timestamps)
+        while True:
+            columns = self.cache.get(key)
+            if columns is not None:
+                return dict(columns)
+            with self._lock:
+                pending = self._inflight.get(key)
+                if pending is None:
+                    done = self._inflight[key] = threading.Event()
+                    break
+            # Someone is already running this query: wait for its result instead of re-querying
+            self.coalesced += 1
+            pending.wait(self.timeout)
+        try:
+            versions = self.cache.versions(tables)
+            columns = self._fetch(sql, dtypes, timestamps)
+            self.cache.put(key, columns, ttl, tables, until_ms, versions)
+            return dict(columns)
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            done.set()
+
+    def query_frame(self, sql: str, params: Optional[Sequence] = None,
+                    timestamps: Iterable[str] = ('timestamp',), **options) -> pd.DataFrame:
+        """``query`` as a DataFrame, timestamp columns as UTC datetimes."""
+        columns = dict(self.query(sql, params, timestamps=timestamps, **options))
+        for name in timestamps:
+            if name in columns:
+                columns[name] = pd.to_datetime(columns[name], unit='ms', utc=True)
+        return pd.DataFrame(columns)
+
+    def _fetch(self, sql: str, dtypes, timestamps) -> Dict[str, np.ndarray]:
+        start = time.perf_counter_ns()
+        try:
+            columns = self._request('/exp', {'query': sql}, lambda response: decode_csv(response, dtypes, timestamps))
+        except QueryUnavailable:
+            raise   # counted once, by _unreachable
+        except QueryError:
+            self.errors += 1
+            raise
+        self.latency.record((time.perf_counter_ns() - start) // 1000)
+        self.queries += 1
+        self.rows += len(next(iter(columns.values()))) if columns else 0
+        return columns
+
+    def ingested(self, table: str, min_ts_ms: Optional[int] = None):
+        """Writer hook: rows from ``min_ts_ms`` on were flushed to ``table`` (see ``QueryCache``)."""
+        self.cache.ingested(table, min_ts_ms)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'available': self._outage_started is None,
+            'queries': self.queries,
+            'rows': self.rows,
+            'errors': self.errors,
+            'coalesced': self.coalesced,
+            'connections': self.connections,
+            'idle_connections': len(self._idle),
+            'latency': self.latency.snapshot(),
+            'cache': self.cache.stats(),
+        }
+
+
+def _error_message(body: bytes) -> str:
+    """QuestDB answers errors as JSON ``{"error": ..., "position": ...}``."""
+    try:
+        reply = loads(body)
+        return f"{reply.get('error', reply)} (position {reply.get('position')})"
+    except (ValueError, AttributeError):
+        return body.decode('utf-8', 'replace')[:500]
+
+
+# ---------------------------------------------------------------------------
+# Benchmark
+# ---------------------------------------------------------------------------
+
+def _benchmark(n: int = 200_000):
+    """Decode cost of one result: /exec JSON -> DataFrame against /exp CSV -> typed columns."""
+    import io
+    import json
+
+    rows = [[f"2025-10-16T{(i // 3600) % 24:02d}:{(i // 60) % 60:02d}:{i % 60:02d}.{i % 1000:03d}000Z",
+             str(400000 + i % 21), 'CE', 100.0 + i % 97 * 0.05, 1000 + i, 5000 + i % 13] for i in range(n)]
+    names = ['timestamp', 'token', 'contract_type', 'ltp', 'volume', 'oi']
+    body_json = json.dumps({'columns': [{'name': name} for name in names], 'dataset': rows}).encode()
+    body_csv = ('"' + '","'.join(names) + '"\n' + ''.join(
+        f"{r[0]},{r[1]},{r[2]},{r[3]},{r[4]},{r[5]}\n" for r in rows)).encode()
+    dtypes = {'token': str, 'contract_type': str, 'ltp': np.float64, 'volume': np.int64, 'oi': np.int64}
+
+    def legacy():
+        return pd.DataFrame(json.loads(body_json)['dataset'])
+
+    def columnar():
+        return decode_csv(io.BytesIO(body_csv), dtypes, ('timestamp',))
+
+    assert len(columnar()['ltp']) == len(legacy()) == n
+    for name, fn in (('JSON -> DataFrame', legacy), ('CSV -> columns', columnar)):
+        start = time.perf_counter()
+        for _ in range(3):
+            fn()
+        elapsed = (time.perf_counter() - start) / 3
+        print(f"{name:>18}: {elapsed * 1e3:8.1f} ms for {n} rows ({elapsed / n * 1e6:.2f} us/row)")
+
+    cache = QueryCache()
+    cache.put('q', columnar(), 60.0, ('tick_data',), None, cache.versions(('tick_data',)))
+    start = time.perf_counter()
+    for _ in range(10_000):
+        cache.get('q')
+    print(f"{'cached result':>18}: {(time.perf_counter() - start) / 10_000 * 1e6:8.2f} us")
+
+
+if __name__ == '__main__':
+    _benchmark()
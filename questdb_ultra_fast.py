@@ -5,13 +5,14 @@ Supports both standard and alternative ports
 import logging
 import threading
 import time
-from queue import Queue
-from datetime import datetime
 import pandas as pd
 import pytz
+import re
 from typing import Dict, List, Optional
-import requests
-import json
+
+from ilp_columns import ULTRA_TICK_FIELDS, ColumnBatcher, ColumnBuffer
+from questdb_query import QueryClient, QueryError, QueryUnavailable
+from timeutil import interval_ms, to_ist, to_ms
 
 # QuestDB ingress for ultra-fast inserts
 try:
@@ -22,6 +23,9 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Native QuestDB SAMPLE BY units (e.g. '30s', '1m', '1h'); pandas-style intervals are converted
+_SAMPLE_BY = re.compile(r"^\d+[UTsmhdMy]$")
+
 class UltraFastQuestDBManager:
     """Ultra-high performance QuestDB manager for trading data"""
     
@@ -37,13 +41,16 @@ class UltraFastQuestDBManager:
         # Try standard ports first, then alternative
         self.active_port = None
         self.active_http_port = None
+        # Pooled HTTP query client on the detected port
+        self.queries = None
         
         # Ultra-fast ingress client
         self.sender = None
         
-        # High-performance batch queue
-        self.tick_queue = Queue(maxsize=100000)  # 100K tick buffer
-        self.batch_size = 1000  # Batch 1000 ticks at once
+        # Ticks go straight into typed column buffers (100K per side), sent 1000 at a time;
+        # overflow is counted in tick_batches.stats() (see /performance), not logged per tick
+        self.tick_batches = ColumnBatcher(ULTRA_TICK_FIELDS, capacity=100000, batch_size=1000,
+                                          name='questdb.tick_data')
         self.batch_timeout = 0.1  # 100ms max batch delay
         
         # Background workers
@@ -98,12 +105,12 @@ class UltraFastQuestDBManager:
             return False
     
     def _test_connection(self, http_port):
-        """Test if QuestDB is running on given port"""
-        try:
-            response = requests.get(f"http://{self.host}:{http_port}", timeout=2)
-            return response.status_code == 200
-        except:
-            return False
+        """Test if QuestDB is running on given port (the client is kept for queries if it is)"""
+        client = QueryClient(self.host, http_port)
+        if client.ping(timeout=2):
+            self.queries = client
+            return True
+        return False
     
     def _create_tables(self):
         """Create optimized tables for MCX trading"""
@@ -150,14 +157,10 @@ class UltraFastQuestDBManager:
             ]
             
             for table_sql in tables:
-                response = requests.post(
-                    f"http://{self.host}:{self.active_http_port}/exec",
-                    data={'query': table_sql},
-                    timeout=10
-                )
-                
-                if response.status_code != 200:
-                    logger.warning(f"Failed to create table: {response.text}")
+                try:
+                    self.queries.execute(table_sql)
+                except QueryError as e:
+                    logger.warning(f"Failed to create table: {e}")
             
             logger.info("✅ QuestDB tables created/verified")
             
@@ -169,87 +172,39 @@ class UltraFastQuestDBManager:
         if not self.running:
             return False
         
-        try:
-            if not self.tick_queue.full():
-                self.tick_queue.put_nowait(tick_data)
-                return True
-            else:
-                logger.warning("Tick queue full - dropping tick")
-                return False
-        except Exception as e:
-            logger.error(f"Error queuing tick: {e}")
-            return False
+        return self.tick_batches.append(tick_data)
     
     def _ingress_worker(self):
         """High-performance ingress worker"""
-        batch = []
-        last_batch_time = time.time()
-        
         while self.running:
             try:
-                # Get tick with timeout
-                try:
-                    tick = self.tick_queue.get(timeout=0.01)  # 10ms timeout
-                    batch.append(tick)
-                except:
-                    # No tick available
-                    pass
-                
-                current_time = time.time()
-                
-                # Send batch if conditions met
-                should_send = (
-                    len(batch) >= self.batch_size or
-                    (len(batch) > 0 and current_time - last_batch_time > self.batch_timeout)
-                )
-                
-                if should_send and batch:
-                    self._send_batch(batch)
-                    batch = []
-                    last_batch_time = current_time
+                # Wake on a full batch or after the batch timeout, then send whatever is pending
+                self.tick_batches.wait(self.batch_timeout)
+                if len(self.tick_batches):
+                    self._send_batch(self.tick_batches.swap())
                     
             except Exception as e:
                 logger.error(f"Ingress worker error: {e}")
                 time.sleep(0.001)  # 1ms sleep on error
     
-    def _send_batch(self, batch: List[Dict]):
-        """Send batch to QuestDB with ultra-fast protocol"""
+    def _send_batch(self, batch: ColumnBuffer):
+        """Send one column buffer to QuestDB as a single frame"""
         try:
             if not self.sender:
                 return
             
-            for tick in batch:
-                # Convert tick to QuestDB format
-                timestamp = tick.get('timestamp')
-                if isinstance(timestamp, str):
-                    timestamp = pd.to_datetime(timestamp).timestamp() * 1000000  # microseconds
-                elif isinstance(timestamp, datetime):
-                    timestamp = timestamp.timestamp() * 1000000
-                
-                # Send using line protocol (fastest method)
-                self.sender.row(
-                    'tick_data',
-                    symbols={
-                        'token': str(tick.get('token', '')),
-                        'contract_type': str(tick.get('contract_type', ''))
-                    },
-                    columns={
-                        'ltp': float(tick.get('ltp', 0)),
-                        'volume': int(tick.get('volume', 0)),
-                        'oi': int(tick.get('oi', 0)),
-                        'open_price': float(tick.get('open_price', 0)),
-                        'high_price': float(tick.get('high_price', 0)),
-                        'low_price': float(tick.get('low_price', 0)),
-                        'change_pct': float(tick.get('change_pct', 0))
-                    },
-                    at=int(timestamp)
-                )
+            self.sender.dataframe(
+                batch.frame(),
+                table_name='tick_data',
+                symbols=['token', 'contract_type'],
+                at='timestamp')
             
             # Flush batch
             self.sender.flush()
             
             # Update performance counters
             self.ticks_written += len(batch)
+            self.queries.ingested('tick_data', int(batch.timestamps[:len(batch)].min()))
             self.batches_written += 1
             
             # Log performance periodically
@@ -262,46 +217,50 @@ class UltraFastQuestDBManager:
         except Exception as e:
             logger.error(f"Error sending batch to QuestDB: {e}")
     
-    def query(self, sql: str) -> Optional[pd.DataFrame]:
-        """Execute SQL query and return DataFrame"""
+    def query(self, sql: str, params: Optional[List] = None, **options) -> Optional[pd.DataFrame]:
+        """Execute SQL query (``%s`` placeholders bound from ``params``) and return DataFrame"""
+        if not self.queries:
+            return None
         try:
-            if not self.active_http_port:
-                return None
-            
-            response = requests.post(
-                f"http://{self.host}:{self.active_http_port}/exec",
-                data={'query': sql},
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                if 'dataset' in data:
-                    return pd.DataFrame(data['dataset'])
-            
-            logger.warning(f"Query failed: {response.text}")
+            return self.queries.query_frame(sql, params, **options)
+        except QueryUnavailable:
             return None
-            
-        except Exception as e:
-            logger.error(f"Query error: {e}")
+        except QueryError as e:
+            logger.warning(f"Query failed: {e}")
             return None
     
     def get_latest_ticks(self, token: str, limit: int = 100) -> Optional[pd.DataFrame]:
         """Get latest ticks for a token"""
-        sql = f"""
+        sql = """
         SELECT * FROM tick_data 
-        WHERE token = '{token}' 
+        WHERE token = %s 
         ORDER BY timestamp DESC 
-        LIMIT {limit}
+        LIMIT %s
         """
-        return self.query(sql)
+        # Open-ended read: QuestDB applies ILP writes asynchronously, so cache it only briefly
+        return self.query(sql, [str(token), int(limit)], dtypes={'token': str, 'contract_type': str},
+                          tables=('tick_data',), ttl=1.0)
     
     def get_ohlc(self, token: str, timeframe: str = '1min', 
                  start_time: str = None, end_time: str = None) -> Optional[pd.DataFrame]:
         """Get OHLC data for a token"""
+        params = [str(token)]
         time_filter = ""
+        until_ms = None
         if start_time and end_time:
-            time_filter = f"AND timestamp BETWEEN '{start_time}' AND '{end_time}'"
+            # Bounds go through to_ms like bound datetimes (naive = IST), so the
+            # filter and the cache window agree; BETWEEN includes end_time
+            start_ms, end_ms = to_ms(start_time), to_ms(end_time)
+            time_filter = "AND timestamp BETWEEN %s AND %s"
+            params += [to_ist(start_ms), to_ist(end_ms)]
+            until_ms = end_ms + 1
+        # SAMPLE BY takes no bind parameter: only a validated unit goes into the SQL
+        if not _SAMPLE_BY.match(timeframe):
+            try:
+                timeframe = f"{interval_ms(timeframe) // 1000}s"
+            except ValueError as e:
+                logger.warning(f"Unsupported OHLC timeframe {timeframe!r}: {e}")
+                return None
         
         sql = f"""
         SELECT 
@@ -312,11 +271,12 @@ class UltraFastQuestDBManager:
             last(ltp) as close_price,
             sum(volume) as volume
         FROM tick_data 
-        WHERE token = '{token}' {time_filter}
+        WHERE token = %s {time_filter}
         SAMPLE BY {timeframe}
         ORDER BY timestamp DESC
         """
-        return self.query(sql)
+        return self.query(sql, params, tables=('tick_data',), until_ms=until_ms,
+                          ttl=None if until_ms is not None else 1.0)
     
     def stop(self):
         """Stop the QuestDB manager"""
@@ -331,6 +291,9 @@ class UltraFastQuestDBManager:
         if self.ingress_worker and self.ingress_worker.is_alive():
             self.ingress_worker.join(timeout=2)
         
+        if self.queries:
+            self.queries.close()
+        
         logger.info("QuestDB manager stopped")
 
 # Convenience function for easy integration
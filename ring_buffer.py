@@ -0,0 +1,222 @@
+"""
+Fixed-capacity columnar ring buffer for tick windows
+Preallocated NumPy columns with a head pointer - O(1) append, zero-copy tail views
+
+Writes are bracketed by a sequence lock, so other threads can take consistent
+copies (``snapshot``) without a mutex the writer would have to wait on.
+"""
+import logging
+import time
+from typing import Callable, Dict, Any, Iterable, Optional, TypeVar
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+class SeqLock:
+    """Single-writer sequence lock.
+
+    The writer wraps each mutation in ``with seqlock:`` (two integer
+    increments, never blocks). Readers run ``read(fn)``, which retries ``fn``
+    until it completes without a write starting or finishing underneath it.
+    """
+
+    __slots__ = ('seq', 'retries')
+
+    def __init__(self):
+        self.seq = 0        # odd while a write is in progress
+        self.retries = 0
+
+    def __enter__(self):
+        self.seq += 1
+        return self
+
+    def __exit__(self, *exc):
+        self.seq += 1
+
+    def read(self, fn: Callable[[], T], max_attempts: int = 1000) -> T:
+        for _ in range(max_attempts):
+            start = self.seq
+            if not start & 1:
+                try:
+                    result = fn()
+                except Exception:
+                    if self.seq == start:
+                        raise
+                    result = None   # torn read blew up; retry
+                if self.seq == start:
+                    return result
+            self.retries += 1
+            time.sleep(0)
+        raise RuntimeError("seqlock read kept racing the writer")
+
+
+class TickRingBuffer:
+    """Array-backed rolling window of ticks.
+
+    Every column is stored twice back-to-back (``2 * capacity`` slots) and each
+    append writes both mirror positions. The newest ``n`` rows are therefore
+    always a contiguous slice, so readers get plain NumPy views without copying
+    or re-ordering.
+    """
+
+    def __init__(self, capacity: int, columns: Dict[str, Any]):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = int(capacity)
+        self.dtypes = {name: np.dtype(dtype) for name, dtype in columns.items()}
+        self._columns = {name: self._blank(dtype) for name, dtype in self.dtypes.items()}
+        self._head = 0   # next slot to write, in [0, capacity)
+        self._size = 0
+        self.seqlock = SeqLock()
+
+    def _blank(self, dtype: np.dtype) -> np.ndarray:
+        if dtype.kind == 'f':
+            return np.full(2 * self.capacity, np.nan, dtype=dtype)
+        return np.zeros(2 * self.capacity, dtype=dtype)
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def empty(self) -> bool:
+        return self._size == 0
+
+    @property
+    def columns(self) -> list:
+        return list(self._columns)
+
+    def add_column(self, name: str, dtype=np.float64):
+        """Register an extra column (e.g. an indicator) after construction."""
+        if name not in self._columns:
+            self.dtypes[name] = np.dtype(dtype)
+            self._columns[name] = self._blank(self.dtypes[name])
+
+    def append(self, row: Dict[str, Any]):
+        """Append one row. Columns missing from ``row`` are reset to NaN/0."""
+        pos = self._head
+        mirror = pos + self.capacity
+        with self.seqlock:
+            for name, arr in self._columns.items():
+                value = row.get(name)
+                if value is None:
+                    value = np.nan if arr.dtype.kind == 'f' else 0
+                arr[pos] = value
+                arr[mirror] = value
+            self._head = (pos + 1) % self.capacity
+            if self._size < self.capacity:
+                self._size += 1
+
+    def _end(self) -> int:
+        # One past the newest row inside the mirrored half
+        return self._head + self.capacity if self._head else 2 * self.capacity
+
+    def view(self, name: str, n: Optional[int] = None) -> np.ndarray:
+        """Zero-copy view of the newest ``n`` values (oldest first)."""
+        n = self._size if n is None else min(int(n), self._size)
+        end = self._end()
+        return self._columns[name][end - n:end]
+
+    def last(self, name: str, offset: int = 1, default=None):
+        """Value ``offset`` rows back from the newest (1 = latest)."""
+        if offset > self._size or offset <= 0:
+            return default
+        return self._columns[name][self._end() - offset].item()
+
+    def last_row(self) -> Dict[str, Any]:
+        """Newest row as a plain dict of Python scalars."""
+        if not self._size:
+            return {}
+        idx = self._end() - 1
+        return {name: arr[idx].item() for name, arr in self._columns.items()}
+
+    def set_last(self, name: str, value, offset: int = 1):
+        """Overwrite a value ``offset`` rows back from the newest."""
+        if offset > self._size or offset <= 0:
+            return
+        idx = self._end() - offset
+        arr = self._columns[name]
+        with self.seqlock:
+            arr[idx] = value
+            arr[idx - self.capacity if idx >= self.capacity else idx + self.capacity] = value
+
+    def update_last(self, row: Dict[str, Any]):
+        """Overwrite several columns of the newest row in place."""
+        if not self._size:
+            return
+        idx = self._end() - 1
+        other = idx - self.capacity if idx >= self.capacity else idx + self.capacity
+        with self.seqlock:
+            for name, value in row.items():
+                arr = self._columns[name]
+                arr[idx] = value
+                arr[other] = value
+
+    def write_tail(self, name: str, values: np.ndarray):
+        """Overwrite the newest ``len(values)`` entries of a column in place."""
+        values = np.asarray(values)
+        n = min(len(values), self._size)
+        if not n:
+            return
+        values = values[-n:]
+        arr = self._columns[name]
+        end = self._end()
+        start = end - n
+        cap = self.capacity
+        split = max(start, cap)
+        with self.seqlock:
+            arr[start:end] = values
+            # Keep the other half of the mirror consistent
+            if start < cap:
+                arr[start + cap:2 * cap] = values[:cap - start]
+            arr[split - cap:end - cap] = values[split - start:]
+
+    def clear(self):
+        with self.seqlock:
+            for name, dtype in self.dtypes.items():
+                self._columns[name] = self._blank(dtype)
+            self._head = 0
+            self._size = 0
+
+    def restore(self, columns: Dict[str, np.ndarray]):
+        """Replace the contents with ``columns`` (oldest first), keeping the newest ``capacity`` rows.
+
+        Columns missing from ``columns`` are reset to NaN/0 (a warm-start load).
+        """
+        n = min(max((len(values) for values in columns.values()), default=0), self.capacity)
+        cap = self.capacity
+        with self.seqlock:
+            for name, dtype in self.dtypes.items():
+                arr = self._blank(dtype)
+                values = columns.get(name)
+                if values is not None and n:
+                    values = np.asarray(values, dtype=dtype)[-n:]
+                    arr[:n] = values
+                    arr[cap:cap + n] = values
+                self._columns[name] = arr
+            self._head = n % cap
+            self._size = n
+
+    def snapshot(self, n: Optional[int] = None, columns: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+        """Consistent read-only copies of the newest ``n`` rows, safe to take from any thread.
+
+        Unlike ``view`` the result never changes under the caller, and the
+        writer is never blocked: the copy is retried if a write overlapped it.
+        """
+        names = list(columns) if columns is not None else list(self._columns)
+
+        def copy():
+            return {name: self.view(name, n).copy() for name in names}
+
+        data = self.seqlock.read(copy)
+        for arr in data.values():
+            arr.setflags(write=False)
+        return data
+
+    def to_frame(self) -> pd.DataFrame:
+        """Materialise the window as a DataFrame (copies - use for display only)."""
+        return pd.DataFrame(self.snapshot())
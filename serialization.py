@@ -0,0 +1,245 @@
+"""
+Response serialization for MCX Trading System
+Column-oriented payloads built straight from NumPy buffers, a JSON encoder
+that understands NumPy/pandas types natively, and optional binary formats.
+
+- ``dumps`` uses orjson when installed (NumPy arrays serialized in C, NaN ->
+  null); otherwise the stdlib encoder with an equivalent ``default``.
+- ``frame_columns`` turns an OHLC frame into one array per field;
+  ``records`` renders the legacy list-of-dicts shape from the same columns.
+- ``negotiate`` picks json / columns / msgpack / arrow from the ``Accept``
+  header (or an explicit ``format`` parameter), falling back to JSON when
+  the optional encoder is not installed.
+"""
+import json
+import logging
+import math
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from timeutil import ist_isoformat
+
+logger = logging.getLogger(__name__)
+
+# Optional fast/binary encoders
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+try:
+    import pyarrow as pa
+    ARROW_AVAILABLE = True
+except ImportError:
+    ARROW_AVAILABLE = False
+
+JSON_MIME = 'application/json'
+MSGPACK_MIME = 'application/msgpack'
+ARROW_MIME = 'application/vnd.apache.arrow.stream'
+
+# Accept header media types -> format name, most specific first
+_ACCEPT = (
+    (ARROW_MIME, 'arrow'),
+    ('application/vnd.apache.arrow.file', 'arrow'),
+    (MSGPACK_MIME, 'msgpack'),
+    ('application/x-msgpack', 'msgpack'),
+)
+FORMAT_MIMES = {'json': JSON_MIME, 'columns': JSON_MIME, 'msgpack': MSGPACK_MIME, 'arrow': ARROW_MIME}
+
+
+def _default(o):
+    """JSON fallback for types neither encoder handles natively."""
+    if isinstance(o, np.integer):
+        return int(o)
+    if isinstance(o, np.floating):
+        return None if np.isnan(o) else float(o)
+    if isinstance(o, np.bool_):
+        return bool(o)
+    if isinstance(o, np.ndarray):
+        return nullable(o)
+    if isinstance(o, (pd.Timestamp, datetime, date)):
+        return None if o is pd.NaT else o.isoformat()
+    if isinstance(o, np.datetime64):
+        return None if np.isnat(o) else pd.Timestamp(o).isoformat()
+    if isinstance(o, pd.DataFrame):
+        return o.replace({np.nan: None}).to_dict(orient='records')
+    if isinstance(o, (pd.Series, pd.Index)):
+        return nullable(o.to_numpy())
+    if isinstance(o, float):
+        return None if math.isnan(o) else o
+    return str(o)
+
+
+if ORJSON_AVAILABLE:
+    _ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def dumps(obj) -> bytes:
+        try:
+            return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS)
+        except TypeError:
+            # e.g. non-contiguous or object arrays orjson refuses; the stdlib path converts them
+            return json.dumps(obj, default=_default).encode('utf-8')
+
+    def loads(data):
+        return orjson.loads(data)
+else:
+    def dumps(obj) -> bytes:
+        return json.dumps(obj, default=_default, separators=(',', ':')).encode('utf-8')
+
+    def loads(data):
+        return json.loads(data)
+
+
+def nullable(values) -> list:
+    """List from an array with NaN/NaT replaced by None (one vectorised mask, no per-item checks)."""
+    values = np.asarray(values)
+    if values.dtype.kind == 'f':
+        mask = np.isnan(values)
+        if mask.any():
+            out = values.astype(object)
+            out[mask] = None
+            return out.tolist()
+    elif values.dtype.kind == 'M':
+        return [None if v is None else pd.Timestamp(v).isoformat() for v in values.astype(object)]
+    return values.tolist()
+
+
+def frame_columns(df: pd.DataFrame, defaults: Optional[Dict[str, Any]] = None,
+                  int_fields: Iterable[str] = ()) -> Dict[str, np.ndarray]:
+    """One NumPy array per field from a frame indexed by bar start.
+
+    ``bar_ts`` (epoch ms) comes from the index. With ``defaults`` only those
+    fields are emitted, NaN/missing values filled with the default; without
+    it every column is passed through as-is (NaN kept, rendered as null).
+    """
+    int_fields = set(int_fields)
+    if df is None or df.empty:
+        names = list(defaults) if defaults else []
+        return {'bar_ts': np.empty(0, dtype=np.int64),
+                **{name: np.empty(0, dtype=np.int64 if name in int_fields else np.float64) for name in names}}
+    columns = {'bar_ts': pd.DatetimeIndex(df.index).as_unit('ms').asi8}
+    if defaults is None:
+        for name in df.columns:
+            columns[name] = df[name].to_numpy()
+        return columns
+    for name, default in defaults.items():
+        if name not in df.columns:
+            values = np.full(len(df), default)
+        else:
+            values = pd.to_numeric(df[name], errors='coerce').fillna(default).to_numpy()
+        columns[name] = values.astype(np.int64 if name in int_fields else np.float64)
+    return columns
+
+
+def slice_columns(columns: Dict[str, np.ndarray], start: int) -> Dict[str, np.ndarray]:
+    return {name: values[start:] for name, values in columns.items()}
+
+
+def records(columns: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+    """Row dicts (legacy chart shape, ISO ``timestamp`` first) from column arrays."""
+    bar_ts = columns['bar_ts'].tolist()
+    lists = {'timestamp': [ist_isoformat(ts) for ts in bar_ts], 'bar_ts': bar_ts}
+    for name, values in columns.items():
+        if name != 'bar_ts':
+            lists[name] = nullable(values)
+    names = list(lists)
+    return [dict(zip(names, row)) for row in zip(*lists.values())]
+
+
+def format_times(values, fmt: str = '%Y-%m-%d %H:%M:%S') -> List[str]:
+    """Vectorised strftime over any datetime-like sequence (unparseable values -> 'NaT')."""
+    series = values if isinstance(values, pd.Series) else pd.Series(list(values), dtype=object)
+    if series.empty:
+        return []
+    try:
+        stamps = pd.to_datetime(series, errors='coerce', format='mixed')
+    except (ValueError, TypeError):
+        stamps = None
+    if stamps is None or not pd.api.types.is_datetime64_any_dtype(stamps):
+        # Mixed time zones (or tz-aware mixed with naive): format one by one
+        return [_format_one(value, fmt) for value in series]
+    return stamps.dt.strftime(fmt).fillna('NaT').tolist()
+
+
+def _format_one(value, fmt: str) -> str:
+    try:
+        return pd.to_datetime(value).strftime(fmt)
+    except Exception:
+        return str(value)
+
+
+def negotiate(accept: Optional[str], requested: Optional[str] = None) -> str:
+    """Response format from an explicit ``format`` value or the ``Accept`` header."""
+    fmt = (requested or '').lower()
+    if not fmt and accept:
+        accept = accept.lower()
+        fmt = next((name for mime, name in _ACCEPT if mime in accept), 'json')
+    if fmt == 'msgpack' and not MSGPACK_AVAILABLE:
+        return 'columns'
+    if fmt == 'arrow' and not ARROW_AVAILABLE:
+        return 'columns'
+    return fmt if fmt in FORMAT_MIMES else 'json'
+
+
+def encode_columns(columns: Dict[str, np.ndarray], fmt: str = 'columns') -> bytes:
+    """Serialize one column dict (``columns`` JSON or msgpack map of arrays)."""
+    if fmt == 'msgpack':
+        return msgpack.packb({name: nullable(values) for name, values in columns.items()}, use_bin_type=True)
+    return dumps(columns)
+
+
+def encode_map(parts: Dict[str, bytes], fmt: str) -> bytes:
+    """Join already-encoded values into one object/map without re-encoding them."""
+    if fmt == 'msgpack':
+        out = [_msgpack_map_header(len(parts))]
+        for key, body in parts.items():
+            out.append(msgpack.packb(key))
+            out.append(body)
+        return b''.join(out)
+    return b'{' + b','.join(b'"%s":%s' % (key.encode('utf-8'), body) for key, body in parts.items()) + b'}'
+
+
+def _msgpack_map_header(size: int) -> bytes:
+    if size < 16:
+        return bytes([0x80 | size])
+    if size < 1 << 16:
+        return b'\xde' + size.to_bytes(2, 'big')
+    return b'\xdf' + size.to_bytes(4, 'big')
+
+
+def arrow_ipc(tables: Dict[str, Dict[str, np.ndarray]], key_field: str = 'contract') -> bytes:
+    """Arrow IPC stream with one record batch per table, tagged by ``key_field``."""
+    batches: List[Any] = []
+    schema = None
+    for key, columns in tables.items():
+        n = len(columns['bar_ts'])
+        arrays = {key_field: pa.array([key] * n, type=pa.string())}
+        for name, values in columns.items():
+            arrays[name] = pa.array(values, from_pandas=True)
+        batch = pa.RecordBatch.from_pydict(arrays)
+        schema = schema or batch.schema
+        batches.append(batch)
+    sink = pa.BufferOutputStream()
+    if schema is None:
+        schema = pa.schema([(key_field, pa.string()), ('bar_ts', pa.int64())])
+    with pa.ipc.new_stream(sink, schema) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
+
+
+def encode_tables(tables: Dict[str, Dict[str, np.ndarray]], fmt: str) -> Tuple[bytes, str]:
+    """Body and mimetype for a map of column tables in the negotiated format."""
+    if fmt == 'arrow':
+        return arrow_ipc(tables), ARROW_MIME
+    return encode_map({key: encode_columns(columns, fmt) for key, columns in tables.items()}, fmt), FORMAT_MIMES[fmt]
@@ -0,0 +1,126 @@
+"""
+Coalescing SocketIO publisher for MCX Trading System
+Producers overwrite the latest payload per (channel, key); a single flusher
+thread sends everything that changed as one batched, delta-encoded frame.
+
+Frame format (event ``batch``)::
+
+    {"seq": 42, "full": false,
+     "updates": [{"ch": "market_data", "key": "CE", "data": {"ltp": 101.5}}, ...]}
+
+``data`` holds only the fields that changed since the last frame (nested dicts
+such as ``indicators`` are diffed one level deep). Clients merge it into their
+copy; ``full`` frames (sent periodically and on connect) carry complete state.
+"""
+import logging
+import threading
+import time
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+BATCH_EVENT = 'batch'
+
+
+def _delta(previous: Optional[Dict[str, Any]], current: Dict[str, Any]) -> Dict[str, Any]:
+    if previous is None:
+        return dict(current)
+    changed = {}
+    for field, value in current.items():
+        old = previous.get(field)
+        if isinstance(value, dict) and isinstance(old, dict):
+            nested = {k: v for k, v in value.items() if old.get(k) != v}
+            if nested:
+                changed[field] = nested
+        elif old != value or field not in previous:
+            changed[field] = value
+    return changed
+
+
+class SocketPublisher:
+    """Latest-value-per-channel publisher flushed at a fixed rate."""
+
+    def __init__(self, socketio, rate_hz: float = 5.0, keyframe_seconds: float = 5.0):
+        self.socketio = socketio
+        self.interval = 1.0 / max(float(rate_hz), 0.1)
+        self.keyframe_seconds = keyframe_seconds
+        self._pending: Dict[Tuple[str, Hashable], Dict[str, Any]] = {}
+        # Producers on other threads store into _pending while the flusher swaps it out
+        self._pending_lock = threading.Lock()
+        self._state: Dict[Tuple[str, Hashable], Dict[str, Any]] = {}
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self._last_keyframe = 0.0
+        self.seq = 0
+
+        # Counters
+        self.published = 0
+        self.frames_sent = 0
+
+    def publish(self, channel: str, key: Hashable, payload: Dict[str, Any]):
+        """Record the latest payload for a channel/key. Called from hot paths: one locked dict store."""
+        with self._pending_lock:
+            self._pending[(channel, key)] = payload
+            self.published += 1
+
+    def _updates(self, items, full: bool):
+        return [{'ch': ch, 'key': key, 'data': data} for (ch, key), data in items
+                if full or data]
+
+    def keyframe(self) -> Dict[str, Any]:
+        """Complete current state as one frame (for new clients)."""
+        return {'seq': self.seq, 'full': True, 'updates': self._updates(list(self._state.items()), True)}
+
+    def flush(self):
+        # Swap the pending dict: producers keep assigning into a fresh one
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+        now = time.time()
+        full = now - self._last_keyframe >= self.keyframe_seconds
+        if not pending and not full:
+            return
+        deltas = []
+        for slot, payload in list(pending.items()):
+            deltas.append((slot, _delta(None if full else self._state.get(slot), payload)))
+            previous = self._state.get(slot)
+            # Partial payloads (e.g. indicators without a signal) keep the other fields
+            self._state[slot] = {**previous, **payload} if previous else payload
+        if full:
+            self._last_keyframe = now
+            frame_items = list(self._state.items())
+        else:
+            frame_items = deltas
+        updates = self._updates(frame_items, full)
+        if not updates:
+            return
+        self.seq += 1
+        self.socketio.emit(BATCH_EVENT, {'seq': self.seq, 'full': full, 'updates': updates})
+        self.frames_sent += 1
+
+    def _run(self):
+        while self._running:
+            started = time.perf_counter()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"❌ Socket publisher flush error: {e}")
+            time.sleep(max(0.0, self.interval - (time.perf_counter() - started)))
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True, name="SocketPublisher")
+        self._thread.start()
+        logger.info(f"✅ Socket publisher started at {1.0 / self.interval:.1f} Hz")
+
+    def stop(self):
+        self._running = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'rate_hz': round(1.0 / self.interval, 2),
+            'published': self.published,
+            'frames_sent': self.frames_sent,
+            'channels': len(self._state),
+        }
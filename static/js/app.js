@@ -154,7 +154,7 @@ function updateLtpVolOiUI(type) {
 }
 
 // === WebSocket: Market data updates ===
-socket.on('market_data', (data) => {
+function handleMarketData(data) {
     if (data.type && latestMarketData[data.type]) {
         latestMarketData[data.type] = {
             ltp: data.ltp,
@@ -167,7 +167,8 @@ socket.on('market_data', (data) => {
         updateLtpVolOiUI(data.type);
     }
     updateCharts();
-});
+}
+socket.on('market_data', handleMarketData);
 
 // === On tab switch, show latest value for that instrument ===
 function showTab(tab) {
@@ -181,8 +182,7 @@ function showTab(tab) {
 }
 
 // Strategy updates
-socket.on('strategy_update', (data) => {
-    console.log('Received strategy update:', data);
+function handleStrategyUpdate(data) {
     const prefix = data.type.toLowerCase();
     if (data.indicators) {
         Object.entries(data.indicators).forEach(([key, value]) => {
@@ -193,6 +193,30 @@ socket.on('strategy_update', (data) => {
             }
         });
     }
+}
+socket.on('strategy_update', handleStrategyUpdate);
+
+// === Batched frames from the server-side publisher ===
+// Each update carries only changed fields; merge into the last known state
+// (one level deep, e.g. indicators) and hand the full record to the handlers.
+const channelState = {};
+const channelHandlers = {
+    market_data: handleMarketData,
+    strategy_update: handleStrategyUpdate
+};
+socket.on('batch', (frame) => {
+    (frame.updates || []).forEach(({ ch, key, data }) => {
+        const slot = `${ch}:${key}`;
+        const prev = frame.full ? {} : (channelState[slot] || {});
+        const merged = { ...prev };
+        Object.entries(data).forEach(([field, value]) => {
+            const isObj = value && typeof value === 'object' && !Array.isArray(value);
+            merged[field] = (isObj && prev[field] && typeof prev[field] === 'object') ? { ...prev[field], ...value } : value;
+        });
+        channelState[slot] = merged;
+        const handler = channelHandlers[ch];
+        if (handler) handler(merged);
+    });
 });
 
 // Log all JS errors globally
@@ -3,21 +3,53 @@ import numpy as np
 import logging
 from datetime import datetime
 import math
-from scipy.stats import norm
 import traceback
 import pytz
 import re
+from ring_buffer import TickRingBuffer
+import indicators
+import option_pricing
+from indicators import StrategyIndicators
 
 # Define IST timezone
 IST = pytz.timezone('Asia/Kolkata')
 
+# Per-tick lines go through a sampled logger (see trade_logging.SampleFilter)
+score_logger = logging.getLogger('strategy.score')
+
+# Columns kept in the rolling tick window (raw tick fields + derived indicators)
+TICK_COLUMNS = {
+    'timestamp': np.int64,  # exchange time, epoch milliseconds
+    'ltp': np.float64,
+    'high': np.float64,
+    'low': np.float64,
+    'close': np.float64,
+    'volume': np.float64,
+    'oi': np.float64,
+    'oi_change': np.float64,
+    'best_bid': np.float64,
+    'best_ask': np.float64,
+    'total_buy_qty': np.float64,
+    'total_sell_qty': np.float64,
+    'fast_ema': np.float64,
+    'slow_ema': np.float64,
+    'rsi': np.float64,
+    'volume_ma': np.float64,
+    'oi_ma': np.float64,
+    'vwap': np.float64,
+    'atr': np.float64,
+}
+
 class HighWinRateStrategy:
     """Advanced options trading strategy with Greek-based scoring and institutional flow detection."""
     
     def __init__(self, contract_hub, account_balance=100000):
         self.contract_hub = contract_hub
         self.account_balance = account_balance
-        self.data = pd.DataFrame()
+        self.window_size = 500
+        self.ticks = TickRingBuffer(self.window_size, TICK_COLUMNS)
+        self._indicators = None  # StrategyIndicators, built lazily from current periods
+        self._last_iv = {}  # (strike, option_type) -> last solved IV, warm start for the solver
         
         # Configurable parameters
         self.fast_ema_period_base = 3
@@ -110,19 +142,23 @@ class HighWinRateStrategy:
             logging.error(traceback.format_exc())
 
     def calculate_vwap(self, data):
-        typical_price = (data['high'] + data['low'] + data['close']) / 3
-        volume_price = typical_price * data['volume']
-        cumulative_volume = data['volume'].rolling(window=self.vwap_period).sum()
-        cumulative_volume_price = volume_price.rolling(window=self.vwap_period).sum()
-        return cumulative_volume_price / cumulative_volume
+        return pd.Series(indicators.rolling_vwap(data['high'], data['low'], data['close'], data['volume'],
+                                                 self.vwap_period), index=data['close'].index)
+
+    @property
+    def data(self):
+        """DataFrame copy of the tick window, for display and ad-hoc analysis only."""
+        df = self.ticks.to_frame()
+        if not df.empty:
+            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms', utc=True).dt.tz_convert(IST)
+        return df
 
     def update_data(self, tick_data):
         try:
-            utc_timestamp = datetime.fromtimestamp(int(tick_data['exchange_timestamp']) / 1000, tz=pytz.UTC)
-            ist_timestamp = utc_timestamp.astimezone(IST)
-            
-            tick_df = pd.DataFrame([{
-                'timestamp': ist_timestamp,
+            best_buy = tick_data.get('best_5_buy_data')
+            best_sell = tick_data.get('best_5_sell_data')
+            self.ticks.append({
+                'timestamp': int(tick_data['exchange_timestamp']),
                 'ltp': float(tick_data['last_traded_price']) / 100,
                 'high': float(tick_data['high_price_of_the_day']) / 100,
                 'low': float(tick_data['low_price_of_the_day']) / 100,
@@ -130,70 +166,103 @@ class HighWinRateStrategy:
                 'volume': tick_data['volume_trade_for_the_day'],
                 'oi': tick_data['open_interest'],
                 'oi_change': tick_data.get('open_interest_change_percentage', 0),
-                'best_bid': float(tick_data['best_5_buy_data'][0]['price']) / 100 if tick_data.get('best_5_buy_data') else None,
-                'best_ask': float(tick_data['best_5_sell_data'][0]['price']) / 100 if tick_data.get('best_5_sell_data') else None,
+                'best_bid': float(best_buy[0]['price']) / 100 if best_buy else None,
+                'best_ask': float(best_sell[0]['price']) / 100 if best_sell else None,
                 'total_buy_qty': tick_data['total_buy_quantity'],
                 'total_sell_qty': tick_data['total_sell_quantity']
-            }])
-            self.data = pd.concat([self.data, tick_df], ignore_index=True)
-            
-            if len(self.data) > 500:
-                self.data = self.data.tail(500)
+            })
             
-            if len(self.data) >= 3:
-                if len(self.data) >= self.atr_period:
-                    atr = self.calculate_atr(self.data, self.atr_period)
-                    self.volatility_factor = atr.iloc[-1] / self.data['ltp'].iloc[-1] / self.volatility_threshold
-                    self.volatility_factor = max(0.5, min(2.0, self.volatility_factor))
-                else:
-                    atr = pd.Series([0.1] * len(self.data))
-                
-                self.fast_ema_period = int(self.fast_ema_period_base * self.volatility_factor)
-                self.slow_ema_period = int(self.slow_ema_period_base * self.volatility_factor)
-                
-                self.data['fast_ema'] = self.data['ltp'].ewm(span=self.fast_ema_period, adjust=False).mean()
-                self.data['slow_ema'] = self.data['ltp'].ewm(span=self.slow_ema_period, adjust=False).mean()
-                self.data['rsi'] = self.calculate_rsi(self.data, self.rsi_period)
-                self.data['volume_ma'] = self.calculate_volume_ma(self.data, self.volume_ma_period)
-                self.data['oi_ma'] = self.calculate_oi_ma(self.data, self.oi_ma_period)
-                self.data['vwap'] = self.calculate_vwap(self.data)
-                self.data['atr'] = atr
-                
+            self._update_indicators()
+            if len(self.ticks) >= 3:
                 self.market_regime = self.analyze_market_context()
-                self.find_support_resistance(self.data)
+                self.find_support_resistance({'low': self.ticks.view('low', 20), 'high': self.ticks.view('high', 20)})
                 
         except Exception as e:
             logging.error(f"Error in update_data: {str(e)}")
             logging.error(traceback.format_exc())
 
+    # Scalars that evolve with the tick stream and are not derivable from the window alone
+    WARM_STATE = ('fast_ema_period', 'slow_ema_period', 'volatility_factor', 'market_regime')
+
+    def warm_state(self):
+        """(tick window copy, adaptive scalars) for a warm-start snapshot; safe from any thread."""
+        return self.ticks.snapshot(), {name: getattr(self, name) for name in self.WARM_STATE}
+
+    def restore_window(self, columns, state=None):
+        """Refill the tick window from a snapshot (or backfill) and rebuild indicator state from it."""
+        self.ticks.restore(columns)
+        for name, value in (state or {}).items():
+            if name in self.WARM_STATE:
+                setattr(self, name, value)
+        self._indicators = None
+        if not self.ticks.empty:
+            self._reseed_indicators()
+
+    def _indicator_periods(self):
+        return (self.rsi_period, self.atr_period, self.vwap_period, self.volume_ma_period, self.oi_ma_period)
+
+    def _reseed_indicators(self):
+        """Rebuild indicator state from the whole tick window (first tick or after a period change)."""
+        ticks = self.ticks
+        self._indicators = StrategyIndicators(self.fast_ema_period, self.slow_ema_period, *self._indicator_periods())
+        columns = self._indicators.seed(ticks.view('high'), ticks.view('low'), ticks.view('close'),
+                                        ticks.view('volume'), ticks.view('oi'))
+        for name in ('fast_ema', 'slow_ema'):
+            ticks.write_tail(name, getattr(self._indicators, name).seed(ticks.view('ltp')))
+        for name, values in columns.items():
+            ticks.write_tail(name, values)
+        return {name: values[-1].item() for name, values in columns.items()}
+
+    def _update_indicators(self):
+        """Advance the streaming indicators by the newest tick - O(1) unless a period changed."""
+        ticks = self.ticks
+        ltp = ticks.last('ltp')
+        reseeded = self._indicators is None or self._indicators.periods() != self._indicator_periods()
+        if reseeded:
+            values = self._reseed_indicators()
+        else:
+            values = self._indicators.update_bar(ticks.last('high'), ticks.last('low'), ticks.last('close'),
+                                                 ticks.last('volume'), ticks.last('oi'))
+        n = len(ticks)
+        if n >= 3:
+            if n >= self.atr_period:
+                self.volatility_factor = values['atr'] / ltp / self.volatility_threshold
+                self.volatility_factor = max(0.5, min(2.0, self.volatility_factor))
+            self.fast_ema_period = int(self.fast_ema_period_base * self.volatility_factor)
+            self.slow_ema_period = int(self.slow_ema_period_base * self.volatility_factor)
+        if n < self.atr_period:
+            values['atr'] = 0.1
+        for name, value in values.items():
+            ticks.set_last(name, value)
+        for name, period in (('fast_ema', self.fast_ema_period), ('slow_ema', self.slow_ema_period)):
+            ema = getattr(self._indicators, name)
+            if ema.span != max(period, 1):
+                # Span follows volatility; re-run over the window so values match a full recompute
+                ema.reset(period)
+                ticks.write_tail(name, ema.seed(ticks.view('ltp')))
+            elif not reseeded:
+                ticks.set_last(name, ema.update(ltp))
+
     def calculate_rsi(self, data, period):
-        delta = data['close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-        rs = gain / loss
-        return 100 - (100 / (1 + rs))
+        return pd.Series(indicators.rsi(data['close'], period), index=data['close'].index)
 
     def calculate_volume_ma(self, data, period):
-        return data['volume'].rolling(window=period).mean()
+        return pd.Series(indicators.rolling_mean(data['volume'], period), index=data['volume'].index)
 
     def calculate_oi_ma(self, data, period):
-        return data['oi'].rolling(window=period).mean()
+        return pd.Series(indicators.rolling_mean(data['oi'], period), index=data['oi'].index)
 
     def calculate_atr(self, data, period):
-        high_low = data['high'] - data['low']
-        high_close = np.abs(data['high'] - data['close'].shift())
-        low_close = np.abs(data['low'] - data['close'].shift())
-        true_range = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-        return true_range.rolling(window=period).mean()
+        return pd.Series(indicators.atr(data['high'], data['low'], data['close'], period), index=data['close'].index)
 
     def analyze_market_context(self):
         try:
-            if len(self.data) < self.slow_ema_period:
+            if len(self.ticks) < self.slow_ema_period:
                 return "UNKNOWN"
-            volatility = self.calculate_atr(self.data, self.atr_period).iloc[-1] / self.data['ltp'].iloc[-1]
-            sma = self.data['ltp'].rolling(window=self.slow_ema_period).mean()
-            current_price = self.data['ltp'].iloc[-1]
-            current_sma = sma.iloc[-1]
+            current_price = self.ticks.last('ltp')
+            atr = self.ticks.last('atr') if len(self.ticks) >= self.atr_period else float('nan')
+            volatility = atr / current_price
+            current_sma = self.ticks.view('ltp', self.slow_ema_period).mean()
             if volatility > self.volatility_threshold:
                 return "VOLATILE"
             elif current_price > current_sma * 1.02:
@@ -205,9 +274,16 @@ class HighWinRateStrategy:
         except Exception as e:
             return "UNKNOWN"
 
-    def find_support_resistance(self, data):
-        self.support_levels = [data['low'].rolling(window=20).min().iloc[-1]] if not data.empty else []
-        self.resistance_levels = [data['high'].rolling(window=20).max().iloc[-1]] if not data.empty else []
+    def find_support_resistance(self, data, window=20):
+        low, high = np.asarray(data['low']), np.asarray(data['high'])
+        if len(low) == 0:
+            self.support_levels, self.resistance_levels = [], []
+            return
+        if len(low) < window:
+            self.support_levels, self.resistance_levels = [np.nan], [np.nan]
+            return
+        self.support_levels = [np.nanmin(low[-window:])]
+        self.resistance_levels = [np.nanmax(high[-window:])]
 
     def is_valid_trading_time(self):
         current_time = datetime.now(IST).time()
@@ -215,9 +291,9 @@ class HighWinRateStrategy:
 
     def check_exit_conditions(self):
         """Return 'EXIT' if SL/target or EOD square-off hit."""
-        if self.trade_state != 'OPEN' or self.entry_price is None or self.data.empty:
+        if self.trade_state != 'OPEN' or self.entry_price is None or self.ticks.empty:
             return None
-        current_price = self.data['ltp'].iloc[-1]
+        current_price = self.ticks.last('ltp')
         stop_pct = 0.01  # 1% SL
         target_pct = 0.015  # 1.5% target
         # End-of-day square-off at 15:25
@@ -231,7 +307,9 @@ class HighWinRateStrategy:
 
     def generate_signals(self, tick_data=None, depth_signal=0):
         try:
-            if len(self.data) < 3:
+            ticks = self.ticks
+            n = len(ticks)
+            if n < 3:
                 return None
             
             symbol = tick_data.get('symbol', '') if tick_data else ''
@@ -242,17 +320,21 @@ class HighWinRateStrategy:
                 return None
             
             # Get current values
-            current_fast = self.data['fast_ema'].iloc[-1] if len(self.data) >= 2 else self.data['ltp'].iloc[-1]
-            current_slow = self.data['slow_ema'].iloc[-1] if len(self.data) >= 3 else self.data['ltp'].iloc[-1]
-            prev_fast = self.data['fast_ema'].iloc[-2] if len(self.data) >= 3 else current_fast
-            prev_slow = self.data['slow_ema'].iloc[-2] if len(self.data) >= 3 else current_slow
-            current_rsi = self.data['rsi'].iloc[-1] if len(self.data) >= self.rsi_period and not pd.isna(self.data['rsi'].iloc[-1]) else 50
-            current_volume = self.data['volume'].iloc[-1]
-            current_volume_ma = self.data['volume_ma'].iloc[-1] if len(self.data) >= self.volume_ma_period else current_volume
-            current_oi = self.data['oi'].iloc[-1]
-            current_oi_ma = self.data['oi_ma'].iloc[-1] if len(self.data) >= self.oi_ma_period else current_oi
-            current_price = self.data['ltp'].iloc[-1]
-            current_vwap = self.data['vwap'].iloc[-1] if len(self.data) >= self.vwap_period and not pd.isna(self.data['vwap'].iloc[-1]) else current_price
+            current_fast = ticks.last('fast_ema')
+            current_slow = ticks.last('slow_ema')
+            prev_fast = ticks.last('fast_ema', 2)
+            prev_slow = ticks.last('slow_ema', 2)
+            current_rsi = ticks.last('rsi')
+            if n < self.rsi_period or math.isnan(current_rsi):
+                current_rsi = 50
+            current_volume = ticks.last('volume')
+            current_volume_ma = ticks.last('volume_ma') if n >= self.volume_ma_period else current_volume
+            current_oi = ticks.last('oi')
+            current_oi_ma = ticks.last('oi_ma') if n >= self.oi_ma_period else current_oi
+            current_price = ticks.last('ltp')
+            current_vwap = ticks.last('vwap')
+            if n < self.vwap_period or math.isnan(current_vwap):
+                current_vwap = current_price
             
             # Parse option details
             strike_price, expiry_date = self._parse_symbol(symbol)
@@ -267,7 +349,7 @@ class HighWinRateStrategy:
                 is_ce=is_ce
             )
             if value_score < 0.4:
-                logging.info(f"🚫 Low-value option skipped (Score: {value_score:.2f})")
+                score_logger.info("🚫 Low-value option skipped (Score: %.2f)", value_score)
                 return None
             
             # Calculate IV and Greeks
@@ -408,7 +490,7 @@ class HighWinRateStrategy:
             score += 0.05 * rsi_score
             details.append(f"RSI={current_rsi:.1f}")
         
-        logging.info(f"📊 {symbol} Score: {score:.2f} | {' '.join(details)}")
+        score_logger.info("📊 %s Score: %.2f | %s", symbol, score, ' '.join(details))
         return score
 
     def _get_dynamic_threshold(self, iv, greeks, current_rsi):
@@ -484,17 +566,17 @@ class HighWinRateStrategy:
     def calculate_position_size(self, volatility=None):
         try:
             base_size = self.account_balance * self.base_position_size
-            if volatility is None and len(self.data) >= self.atr_period:
+            if volatility is None and len(self.ticks) >= self.atr_period:
                 volatility = self.volatility_factor
             if volatility > self.volatility_threshold:
                 base_size *= 0.5 / volatility
             
             # Institutional boost
-            if len(self.data) >= self.volume_ma_period:
-                current_volume = self.data['volume'].iloc[-1]
-                current_volume_ma = self.data['volume_ma'].iloc[-1]
-                current_oi = self.data['oi'].iloc[-1]
-                current_oi_ma = self.data['oi_ma'].iloc[-1] if 'oi_ma' in self.data.columns else current_oi
+            if len(self.ticks) >= self.volume_ma_period:
+                current_volume = self.ticks.last('volume')
+                current_volume_ma = self.ticks.last('volume_ma')
+                current_oi = self.ticks.last('oi')
+                current_oi_ma = self.ticks.last('oi_ma')
                 
                 vol_oi_analysis = self.analyze_volume_oi_edge(
                     current_volume, current_volume_ma,
@@ -511,9 +593,9 @@ class HighWinRateStrategy:
 
     def calculate_stop_loss(self, entry_price, direction):
         try:
-            if len(self.data) < self.atr_period:
+            if len(self.ticks) < self.atr_period:
                 return entry_price * (0.98 if direction == 'BUY' else 1.02)
-            atr = self.data['atr'].iloc[-1]
+            atr = self.ticks.last('atr')
             atr_multiplier = 2.5 * self.volatility_factor if self.market_regime in ["UPTREND", "DOWNTREND"] else 1.5 * self.volatility_factor
             stop_loss = entry_price - (atr * atr_multiplier) if direction == 'BUY' else entry_price + (atr * atr_multiplier)
             min_distance = entry_price * 0.01
@@ -523,49 +605,28 @@ class HighWinRateStrategy:
 
     def calculate_option_greeks(self, S, K, T, r, sigma, option_type='call'):
         try:
-            S, K, T, r, sigma = map(float, [S, K, T, r, sigma])
-            d1 = (math.log(S / K) + (r + 0.5 * sigma ** 2) * T) / (sigma * math.sqrt(T))
-            d2 = d1 - sigma * math.sqrt(T)
-            if option_type.lower() == 'call':
-                delta = norm.cdf(d1)
-                gamma = norm.pdf(d1) / (S * sigma * math.sqrt(T))
-                theta = (-S * norm.pdf(d1) * sigma / (2 * math.sqrt(T)) - r * K * math.exp(-r * T) * norm.cdf(d2)) / 365
-                vega = S * math.sqrt(T) * norm.pdf(d1) / 100
-                rho = K * T * math.exp(-r * T) * norm.cdf(d2) / 100
-            else:
-                delta = norm.cdf(d1) - 1
-                gamma = norm.pdf(d1) / (S * sigma * math.sqrt(T))
-                theta = (-S * norm.pdf(d1) * sigma / (2 * math.sqrt(T)) + r * K * math.exp(-r * T) * norm.cdf(-d2)) / 365
-                vega = S * math.sqrt(T) * norm.pdf(d1) / 100
-                rho = -K * T * math.exp(-r * T) * norm.cdf(-d2) / 100
-            return {'delta': delta, 'gamma': gamma, 'theta': theta, 'vega': vega, 'rho': rho}
+            result = {name: float(value) for name, value in option_pricing.greeks(S, K, T, r, sigma, option_type).items()}
+            return result if all(math.isfinite(v) for v in result.values()) else None
         except Exception as e:
             return None
 
     def calculate_implied_volatility(self, option_price, S, K, T, r, option_type='call', max_iterations=100, precision=0.00001):
         try:
-            sigma = 0.5
-            for _ in range(max_iterations):
-                price = self.black_scholes(S, K, T, r, sigma, option_type)
-                diff = option_price - price
-                if abs(diff) < precision:
-                    return sigma
-                greeks = self.calculate_option_greeks(S, K, T, r, sigma, option_type)
-                vega = greeks['vega'] if greeks else 0
-                if vega == 0:
-                    return None
-                sigma += diff / vega
-            return None
+            # Warm-start from the last IV solved for this strike/side - usually converges in 1-2 steps
+            key = (K, option_type)
+            iv = option_pricing.implied_volatility_scalar(option_price, S, K, T, r, option_type,
+                                                          initial=self._last_iv.get(key),
+                                                          tol=precision, max_iterations=max_iterations)
+            if iv is not None:
+                self._last_iv[key] = iv
+            return iv
         except Exception as e:
             return None
 
     def black_scholes(self, S, K, T, r, sigma, option_type='call'):
         try:
-            d1 = (math.log(S / K) + (r + 0.5 * sigma ** 2) * T) / (sigma * math.sqrt(T))
-            d2 = d1 - sigma * math.sqrt(T)
-            if option_type.lower() == 'call':
-                return S * norm.cdf(d1) - K * math.exp(-r * T) * norm.cdf(d2)
-            return K * math.exp(-r * T) * norm.cdf(-d2) - S * norm.cdf(-d1)
+            price = float(option_pricing.black_scholes(S, K, T, r, sigma, option_type))
+            return price if math.isfinite(price) else None
         except Exception as e:
             return None
 
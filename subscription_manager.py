@@ -0,0 +1,230 @@
+"""
+ATM strike ladder subscriptions for MCX Trading System
+Keeps the websocket subscribed to the futures contract plus CE/PE options for
+ATM ± N listed strikes, and re-centres the ladder as the futures price moves.
+
+Re-centring diffs the desired token set against the active one and sends
+only incremental subscribe / unsubscribe requests on the open connection.
+Contracts with an open position are pinned and never unsubscribed.
+"""
+import logging
+import threading
+from typing import Callable, Dict, Any, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MCX_EXCHANGE_TYPE = 5
+
+
+class Contract:
+    """One subscribed instrument (futures or option)."""
+
+    __slots__ = ('token', 'kind', 'symbol', 'strike', 'expiry', 'lotsize', 'exch_seg')
+
+    def __init__(self, token: str, kind: str, symbol: str, strike: Optional[float],
+                 expiry: str, lotsize, exch_seg: str = 'MCX'):
+        self.token = token
+        self.kind = kind              # FUT / CE / PE
+        self.symbol = symbol
+        self.strike = strike          # rupees; None for futures
+        self.expiry = expiry
+        self.lotsize = lotsize
+        self.exch_seg = exch_seg
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any], kind: str, strike: Optional[float] = None) -> 'Contract':
+        return cls(str(row['token']), kind, row['symbol'], strike, row['expiry'], row['lotsize'], row['exch_seg'])
+
+    def info(self) -> Dict[str, Any]:
+        """Legacy ``fut_info`` / ``ce_info`` / ``pe_info`` shape."""
+        info = {'symbol': self.symbol, 'expiry': self.expiry, 'lotsize': self.lotsize}
+        if self.kind in ('CE', 'PE'):
+            info.update(strike=round(self.strike * 100, 2), optiontype=self.kind)
+        return info
+
+
+class SubscriptionManager:
+    """Futures + ATM ± ``width`` strike ladder with incremental re-centring.
+
+    ``subscribe_fn`` / ``unsubscribe_fn`` receive SmartAPI token lists;
+    ``is_pinned(token)`` reports contracts that must stay subscribed (open
+    positions). Futures prices are fed with ``on_future_price`` from the tick
+    path: the check is two comparisons, re-centring runs on its own thread.
+    """
+
+    def __init__(self, index, name: str, option_expiry: str, futures_token: str,
+                 subscribe_fn: Callable[[List[Dict[str, Any]]], None],
+                 unsubscribe_fn: Callable[[List[Dict[str, Any]]], None],
+                 width: int = 2, hysteresis: float = 0.25,
+                 is_pinned: Optional[Callable[[str], bool]] = None,
+                 on_recenter: Optional[Callable[['SubscriptionManager'], None]] = None):
+        self.index = index
+        self.name = name
+        self.option_expiry = option_expiry.upper()
+        self.width = max(0, int(width))
+        self.hysteresis = hysteresis
+        self.subscribe_fn = subscribe_fn
+        self.unsubscribe_fn = unsubscribe_fn
+        self.is_pinned = is_pinned or (lambda token: False)
+        self.on_recenter = on_recenter
+
+        self.strikes = index.strikes(name, self.option_expiry)
+        if not len(self.strikes):
+            raise ValueError(f"No {name} strikes listed for {self.option_expiry}")
+        self.strike_step = float(np.median(np.diff(self.strikes))) if len(self.strikes) > 1 else 0.0
+
+        fut_row = index.by_token(futures_token)
+        if fut_row is None:
+            raise ValueError(f"Unknown futures token {futures_token}")
+        self.futures = Contract.from_row(fut_row, 'FUT')
+
+        # Replaced wholesale on every re-centre so the tick path reads without a lock
+        self.contracts: Dict[str, Contract] = {}
+        self.token_types: Dict[str, str] = {}
+        self.atm_strike: Optional[float] = None
+        self._atm_tokens: Dict[str, str] = {}
+        self._band: Tuple[float, float] = (np.inf, -np.inf)
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pending_price: Optional[float] = None
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+        # Counters
+        self.recenters = 0
+        self.subscribed = 0
+        self.unsubscribed = 0
+
+    # ------------------------------------------------------------------
+    # Ladder
+    # ------------------------------------------------------------------
+
+    def nearest_strike(self, price: float) -> float:
+        i = int(np.searchsorted(self.strikes, price))
+        candidates = self.strikes[max(0, i - 1):i + 1]
+        return float(candidates[np.argmin(np.abs(candidates - price))])
+
+    def ladder(self, atm: float) -> np.ndarray:
+        i = int(np.searchsorted(self.strikes, atm))
+        return self.strikes[max(0, i - self.width):i + self.width + 1]
+
+    def _desired(self, atm: float) -> Dict[str, Contract]:
+        desired = {self.futures.token: self.futures}
+        for strike in self.ladder(atm).tolist():
+            for kind in ('CE', 'PE'):
+                row = self.index.lookup(self.name, 'OPTFUT', strike=strike, expiry=self.option_expiry, option_type=kind)
+                if row is not None:
+                    desired[str(row['token'])] = Contract.from_row(row, kind, strike)
+        return desired
+
+    @staticmethod
+    def token_list(tokens: Iterable[str]) -> List[Dict[str, Any]]:
+        tokens = sorted(tokens)
+        return [{"exchangeType": MCX_EXCHANGE_TYPE, "tokens": tokens}] if tokens else []
+
+    # ------------------------------------------------------------------
+    # Re-centring
+    # ------------------------------------------------------------------
+
+    def recenter(self, price: float) -> Tuple[List[str], List[str]]:
+        """Move the ladder to ``price``; returns (added, removed) tokens."""
+        with self._lock:
+            atm = self.nearest_strike(price)
+            desired = self._desired(atm)
+            active = self.contracts
+            added = [t for t in desired if t not in active]
+            removed = [t for t in active if t not in desired and not self.is_pinned(t)]
+            contracts = dict(desired)
+            for token in active:
+                if token not in desired and token not in removed:
+                    contracts[token] = active[token]   # pinned: keep streaming
+
+            if removed:
+                self.unsubscribe_fn(self.token_list(removed))
+                self.unsubscribed += len(removed)
+            if added:
+                self.subscribe_fn(self.token_list(added))
+                self.subscribed += len(added)
+
+            self.contracts = contracts
+            self.token_types = {t: c.kind for t, c in contracts.items()}
+            self._atm_tokens = {c.kind: t for t, c in desired.items() if c.strike == atm}
+            self._atm_tokens['FUT'] = self.futures.token
+            changed = atm != self.atm_strike
+            self.atm_strike = atm
+            # Stay put until price is clearly past the midpoint to the next strike
+            half = self.strike_step * (0.5 + self.hysteresis) if self.strike_step else np.inf
+            self._band = (atm - half, atm + half)
+            if changed:
+                self.recenters += 1
+        if changed or added or removed:
+            logger.info(f"🎯 ATM {atm:g} (fut {price:.2f}): +{len(added)} / -{len(removed)} tokens, "
+                        f"{len(self.contracts)} active")
+            if self.on_recenter:
+                self.on_recenter(self)
+        return added, removed
+
+    def on_future_price(self, price: float):
+        """Cheap hot-path check; wakes the re-centre thread when price leaves the band."""
+        low, high = self._band
+        if price < low or price > high:
+            self._pending_price = price
+            self._wake.set()
+
+    def _run(self):
+        while self._running:
+            if not self._wake.wait(1.0):
+                continue
+            self._wake.clear()
+            price = self._pending_price
+            if price is None:
+                continue
+            try:
+                self.recenter(price)
+            except Exception as e:
+                logger.error(f"❌ ATM re-centre failed: {e}", exc_info=True)
+
+    def start(self, price: float):
+        """Subscribe the initial ladder around ``price`` and start watching the futures price."""
+        self.recenter(price)
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True, name="ATMRecenter")
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        self._wake.set()
+
+    def resubscribe(self):
+        """Re-send the full active set (after a websocket reconnect)."""
+        tokens = list(self.contracts)
+        if tokens:
+            self.subscribe_fn(self.token_list(tokens))
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def atm_token(self, kind: str) -> Optional[str]:
+        return self._atm_tokens.get(kind)
+
+    def atm_contract(self, kind: str) -> Optional[Contract]:
+        token = self._atm_tokens.get(kind)
+        return self.contracts.get(token) if token else None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'atm_strike': self.atm_strike,
+            'strike_step': self.strike_step,
+            'width': self.width,
+            'band': [None if not np.isfinite(v) else v for v in self._band],
+            'active': len(self.contracts),
+            'recenters': self.recenters,
+            'subscribed': self.subscribed,
+            'unsubscribed': self.unsubscribed,
+        }
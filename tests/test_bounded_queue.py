@@ -0,0 +1,74 @@
+import os
+
+from bounded_queue import BoundedQueue, COALESCE, DROP_NEWEST, DROP_OLDEST, SPILL
+
+
+def _drain(queue):
+    items = []
+    while True:
+        batch = queue.get_many(1000)
+        if not batch:
+            return items
+        items.extend(batch)
+
+
+def test_drop_oldest_keeps_newest():
+    queue = BoundedQueue('test.drop_oldest', maxsize=3, policy=DROP_OLDEST)
+    assert all(queue.put(i) for i in range(5))
+    assert _drain(queue) == [2, 3, 4]
+    stats = queue.stats()
+    assert (stats['enqueued'], stats['dequeued'], stats['dropped']) == (5, 3, 2)
+    assert stats['high_water'] == 3
+
+
+def test_drop_newest_rejects_incoming():
+    queue = BoundedQueue('test.drop_newest', maxsize=3, policy=DROP_NEWEST)
+    assert [queue.put(i) for i in range(5)] == [True, True, True, False, False]
+    assert _drain(queue) == [0, 1, 2]
+    assert queue.stats()['dropped'] == 2
+
+
+def test_coalesce_replaces_in_place():
+    queue = BoundedQueue('test.coalesce', maxsize=2, policy=COALESCE, key=lambda item: item[0])
+    queue.put(('CE', 1))
+    queue.put(('PE', 1))
+    queue.put(('CE', 2))          # replaces CE, keeps its place ahead of PE
+    assert _drain(queue) == [('CE', 2), ('PE', 1)]
+    assert queue.stats()['coalesced'] == 1
+
+    queue.put(('CE', 3))
+    queue.put(('PE', 3))
+    queue.put(('FUT', 3))         # full: the oldest key goes
+    assert _drain(queue) == [('PE', 3), ('FUT', 3)]
+    assert queue.stats()['dropped'] == 1
+
+
+def test_spill_refills_in_order_and_truncates(tmp_path):
+    path = str(tmp_path / 'bars.spill.jsonl')
+    queue = BoundedQueue('test.spill', maxsize=4, policy=SPILL, spill_path=path)
+    assert all(queue.put({'n': i}) for i in range(10))
+    stats = queue.stats()
+    assert (stats['dropped'], stats['spilled'], stats['spill_pending']) == (0, 6, 6)
+    assert len(queue) == 10
+    # Items put after the spill starts queue behind it, still FIFO
+    assert [item['n'] for item in queue.get_many(3)] == [0, 1, 2]
+    queue.put({'n': 10})
+    assert [item['n'] for item in _drain(queue)] == list(range(3, 11))
+    assert queue.stats()['spill_pending'] == 0
+    assert os.path.getsize(path) == 0
+    queue.close()
+
+
+def test_spill_close_writes_back_and_resumes(tmp_path):
+    path = str(tmp_path / 'bars.spill.jsonl')
+    queue = BoundedQueue('test.spill_close', maxsize=3, policy=SPILL, spill_path=path)
+    for i in range(7):
+        queue.put({'n': i})
+    assert queue.get_many(1)[0]['n'] == 0
+    queue.close()
+    assert not queue.put({'n': 99})     # closed: nothing more reaches the file
+
+    resumed = BoundedQueue('test.spill_resume', maxsize=3, policy=SPILL, spill_path=path)
+    assert len(resumed) == 6
+    assert [item['n'] for item in _drain(resumed)] == [1, 2, 3, 4, 5, 6]
+    resumed.close()
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from candle_store import CandleStore
+from timeutil import floor_ist_ms, interval_ms
+
+BASE_MS = 1_760_600_000_000
+INTERVALS = ["1s", "5s", "10s", "30s", "1min", "5min", "15min", "1h", "1d"]
+
+
+def _ticks(n=20_000, seed=7):
+    rng = np.random.default_rng(seed)
+    ts = BASE_MS + np.cumsum(rng.integers(0, 400, n))
+    prices = np.round(100 + np.cumsum(rng.normal(0, 0.05, n)), 3)
+    volumes = 1000 + np.arange(n)
+    return ts, prices, volumes
+
+
+def _resampled(ts, prices, volumes, upto, step):
+    """The open bar of ``step`` after the first ``upto`` ticks, resampled directly."""
+    ts, prices, volumes = ts[:upto], prices[:upto], volumes[:upto]
+    bucket = floor_ist_ms(int(ts[-1]), step)
+    first = int(np.searchsorted(ts, bucket))
+    window = prices[first:]
+    return (bucket, window[0], window.max(), window.min(), window[-1], int(volumes[-1]))
+
+
+def test_live_bar_matches_resample():
+    ts, prices, volumes = _ticks()
+    store = CandleStore(INTERVALS, capacity=5000)
+    # Every level at ~200 points mid-stream, including when finer levels have moved on
+    checkpoints = set(range(1, len(ts) + 1, 97)) | {len(ts)}
+    for i in range(len(ts)):
+        store.update('CRUDEOIL', int(ts[i]), float(prices[i]), int(volumes[i]))
+        if i + 1 not in checkpoints:
+            continue
+        for interval in INTERVALS:
+            live = store.series('CRUDEOIL', interval).live_bar()
+            expected = _resampled(ts, prices, volumes, i + 1, interval_ms(interval))
+            assert live[0] == expected[0], (interval, i)
+            assert live[1:5] == pytest.approx(expected[1:5]), (interval, i)
+            assert live[5] == expected[5], (interval, i)
+
+
+def test_frame_ends_with_live_bar():
+    ts, prices, volumes = _ticks(5_000)
+    store = CandleStore(INTERVALS, capacity=5000)
+    for t, p, v in zip(ts.tolist(), prices.tolist(), volumes.tolist()):
+        store.update('CRUDEOIL', t, p, v)
+    for interval in ('1min', '5min', '15min'):
+        frame = store.frame('CRUDEOIL', interval)
+        expected = _resampled(ts, prices, volumes, len(ts), interval_ms(interval))
+        assert frame[['open', 'high', 'low', 'close']].iloc[-1].tolist() == pytest.approx(expected[1:5])
@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import indicators as ind
+
+TOL = dict(rtol=1e-9, atol=1e-9, equal_nan=True)
+
+
+def _bars(n=3000, seed=11, gaps=False):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 0.4, n))
+    spread = rng.uniform(0.05, 1.5, n)
+    high = close + spread * rng.uniform(0, 1, n)
+    low = close - spread * rng.uniform(0, 1, n)
+    volume = rng.integers(0, 5000, n).astype(float)
+    if gaps:
+        # Whole bars missing (feed gaps) plus a run at the start
+        missing = rng.choice(n, n // 20, replace=False)
+        missing = np.concatenate([missing, np.arange(3)])
+        for column in (close, high, low, volume):
+            column[missing] = np.nan
+    return pd.DataFrame({'high': high, 'low': low, 'close': close, 'volume': volume})
+
+
+# The pandas formulas the strategy, chart endpoints and backtester used before indicators.py
+
+def _pd_ema(df, span):
+    return df['close'].ewm(span=span, adjust=False).mean().to_numpy()
+
+
+def _pd_rsi(df, period, min_periods=None):
+    delta = df['close'].diff()
+    gain = delta.where(delta > 0, 0).rolling(window=period, min_periods=min_periods).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=period, min_periods=min_periods).mean()
+    return (100 - (100 / (1 + gain / loss))).to_numpy()
+
+
+def _pd_atr(df, period, min_periods=None):
+    high_low = df['high'] - df['low']
+    high_close = (df['high'] - df['close'].shift()).abs()
+    low_close = (df['low'] - df['close'].shift()).abs()
+    tr = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
+    return tr.rolling(window=period, min_periods=min_periods).mean().to_numpy()
+
+
+def _pd_vwap(df, window, min_periods=None):
+    typical = (df['high'] + df['low'] + df['close']) / 3
+    return ((typical * df['volume']).rolling(window=window, min_periods=min_periods).sum()
+            / df['volume'].rolling(window=window, min_periods=min_periods).sum()).to_numpy()
+
+
+def _pd_cumulative_vwap(df):
+    typical = (df['high'] + df['low'] + df['close']) / 3
+    return ((typical * df['volume']).cumsum() / df['volume'].cumsum()).to_numpy()
+
+
+def _stream(indicator, df, columns):
+    rows = df[list(columns)].to_numpy()
+    return np.array([indicator.update(*row) for row in rows], dtype=float)
+
+
+@pytest.fixture(params=[False, True], ids=['clean', 'gaps'])
+def bars(request):
+    return _bars(gaps=request.param)
+
+
+@pytest.mark.parametrize('span', [1, 9, 21])
+def test_ema(bars, span):
+    expected = _pd_ema(bars, span)
+    np.testing.assert_allclose(ind.ema(bars['close'], span), expected, **TOL)
+    np.testing.assert_allclose(_stream(ind.EMA(span), bars, ['close']), expected, **TOL)
+
+
+@pytest.mark.parametrize('period,min_periods', [(14, None), (14, 1), (3, None)])
+def test_rsi(bars, period, min_periods):
+    expected = _pd_rsi(bars, period, min_periods)
+    np.testing.assert_allclose(ind.rsi(bars['close'], period, min_periods), expected, **TOL)
+    np.testing.assert_allclose(_stream(ind.RSI(period, min_periods), bars, ['close']), expected, **TOL)
+
+
+@pytest.mark.parametrize('period,min_periods', [(14, None), (14, 1)])
+def test_atr(bars, period, min_periods):
+    expected = _pd_atr(bars, period, min_periods)
+    np.testing.assert_allclose(ind.atr(bars['high'], bars['low'], bars['close'], period, min_periods),
+                               expected, **TOL)
+    np.testing.assert_allclose(_stream(ind.ATR(period, min_periods), bars, ['high', 'low', 'close']),
+                               expected, **TOL)
+
+
+@pytest.mark.parametrize('window,min_periods', [(20, None), (20, 1)])
+def test_rolling_vwap(bars, window, min_periods):
+    expected = _pd_vwap(bars, window, min_periods)
+    columns = ['high', 'low', 'close', 'volume']
+    np.testing.assert_allclose(ind.rolling_vwap(*(bars[c] for c in columns), window, min_periods),
+                               expected, **TOL)
+    np.testing.assert_allclose(_stream(ind.RollingVWAP(window, min_periods), bars, columns), expected, **TOL)
+
+
+def test_cumulative_vwap(bars):
+    expected = _pd_cumulative_vwap(bars)
+    columns = ['high', 'low', 'close', 'volume']
+    np.testing.assert_allclose(ind.cumulative_vwap(*(bars[c] for c in columns)), expected, **TOL)
+    np.testing.assert_allclose(_stream(ind.CumulativeVWAP(), bars, columns), expected, **TOL)
+
+
+def test_seed_then_stream_continues(bars):
+    """seed() on a prefix followed by update() matches the batch result on the whole series."""
+    split = len(bars) // 2
+    head, tail = bars.iloc[:split], bars.iloc[split:]
+    columns = ['high', 'low', 'close', 'volume']
+
+    cases = [
+        (ind.EMA(21), ['close'], _pd_ema(bars, 21)),
+        (ind.RSI(14), ['close'], _pd_rsi(bars, 14)),
+        (ind.ATR(14), ['high', 'low', 'close'], _pd_atr(bars, 14)),
+        (ind.RollingVWAP(20), columns, _pd_vwap(bars, 20)),
+        (ind.CumulativeVWAP(), columns, _pd_cumulative_vwap(bars)),
+    ]
+    for indicator, used, expected in cases:
+        seeded = indicator.seed(*(head[c].to_numpy() for c in used))
+        streamed = _stream(indicator, tail, used)
+        np.testing.assert_allclose(np.concatenate([seeded, streamed]), expected, err_msg=type(indicator).__name__,
+                                   **TOL)
@@ -0,0 +1,91 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from database_manager import QuestDBManager
+from ohlc_history import BAR_FIELDS, BarHistory
+from questdb_query import QueryClient
+from timeutil import floor_ist_ms
+
+MINUTE = 60_000
+START = floor_ist_ms(1_760_600_000_000, MINUTE)
+END = START + 30 * MINUTE
+
+
+def _columns(starts):
+    starts = np.asarray(starts, dtype=np.int64)
+    prices = 100.0 + np.arange(len(starts), dtype=np.float64)
+    return {'bucket_start': starts, 'open': prices, 'high': prices + 1, 'low': prices - 1,
+            'close': prices, 'volume': np.arange(len(starts), dtype=np.int64),
+            'oi': np.zeros(len(starts), dtype=np.int64)}
+
+
+class _QuestDB:
+    def __init__(self, starts):
+        self.starts = starts
+        self.calls = 0
+
+    def get_bars(self, symbol, interval, start_ms=None, end_ms=None):
+        self.calls += 1
+        return _columns([ts for ts in self.starts if start_ms <= ts < end_ms])
+
+
+class _MarketData:
+    def __init__(self, starts=()):
+        self.starts = list(starts)
+
+    def bars(self, symbol, level):
+        columns = _columns(self.starts)
+        index = pd.to_datetime(columns.pop('bucket_start'), unit='ms', utc=True)
+        return pd.DataFrame(columns, index=index)
+
+
+def test_same_window_twice_with_caller_mutation():
+    questdb = _QuestDB([START, START + MINUTE])
+    history = BarHistory(questdb, _MarketData(), levels=('1min',))
+    for _ in range(2):
+        level, columns = history.bars('CRUDEOIL', START, END)
+        assert level == '1min'
+        assert columns['bucket_start'].tolist() == [START, START + MINUTE]
+        # What /ohlc/history used to do to the result
+        columns.pop('bucket_start')
+
+
+def test_live_tail_follows_persisted_bars():
+    questdb = _QuestDB([START, START + MINUTE])
+    live = _MarketData([START + MINUTE, START + 2 * MINUTE, END + MINUTE])
+    history = BarHistory(questdb, live, levels=('1min',))
+    _, columns = history.bars('CRUDEOIL', START, END)
+    assert columns['bucket_start'].tolist() == [START, START + MINUTE, START + 2 * MINUTE]
+    assert set(columns) == set(BAR_FIELDS)
+
+
+class _BarsClient(QueryClient):
+    """QueryClient answering mcx_ohlc reads from an in-memory table instead of a server."""
+
+    def __init__(self, starts):
+        super().__init__(cache_ttl=60.0)
+        self.starts = starts
+        self.requests = 0
+
+    def _request(self, path, params, read):
+        self.requests += 1
+        rows = ''.join(f"{ts},100.0,101.0,99.0,100.0,1,0\n" for ts in sorted(self.starts))
+        return read(io.BytesIO(f"bucket_start,open,high,low,close,volume,oi\n{rows}".encode()))
+
+
+def test_late_persisted_bar_reaches_a_read_window():
+    questdb = QuestDBManager()
+    questdb.queries = client = _BarsClient([START, START + 2 * MINUTE])
+    history = BarHistory(questdb, _MarketData(), levels=('1min',))
+    assert history.bars('CRUDEOIL', START, END)[1]['bucket_start'].tolist() == [START, START + 2 * MINUTE]
+    history.bars('CRUDEOIL', START, END)
+    assert client.requests == 1
+
+    # A bar re-sent after an outage lands inside the window that was already read
+    client.starts.append(START + MINUTE)
+    client.ingested('mcx_ohlc', START + MINUTE)
+    _, columns = history.bars('CRUDEOIL', START, END)
+    assert columns['bucket_start'].tolist() == [START, START + MINUTE, START + 2 * MINUTE]
+    assert client.requests == 2
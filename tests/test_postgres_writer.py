@@ -0,0 +1,147 @@
+import asyncio
+
+import asyncpg
+
+from database_manager import PostgreSQLManager
+
+
+class _Refused(asyncpg.exceptions.NotNullViolationError):
+    pass
+
+
+class _FakeConnection:
+    def __init__(self, pool):
+        self.pool = pool
+
+    def transaction(self):
+        return _Transaction()
+
+    async def executemany(self, sql, records):
+        self.pool.write('trade' if 'INSERT INTO trade' in sql else 'position', records)
+
+    async def copy_records_to_table(self, table, records, columns):
+        self.pool.write('tick', records)
+
+
+class _Transaction:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class _Acquire:
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def __aenter__(self):
+        return _FakeConnection(self.pool)
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class _FakePool:
+    """Commits a write only if none of its records' symbols is refused (one transaction per call).
+
+    After ``fail_after`` more writes, every call raises a connection error.
+    """
+
+    def __init__(self, refused=(), fail_after=None):
+        self.refused = set(refused)
+        self.fail_after = fail_after
+        self.committed = {'trade': [], 'position': [], 'tick': []}
+        self.calls = 0
+
+    def acquire(self):
+        return _Acquire(self)
+
+    def write(self, kind, records):
+        self.calls += 1
+        if self.fail_after is not None:
+            if self.fail_after <= 0:
+                raise ConnectionResetError('connection lost')
+            self.fail_after -= 1
+        bad = [record[1] for record in records if record[1] in self.refused]
+        if bad:
+            raise _Refused(f'refused {bad}')
+        self.committed[kind].extend(record[1] for record in records)
+
+
+def _manager(pool, max_attempts=1):
+    manager = PostgreSQLManager('postgresql://test', batch_size=100, max_attempts=max_attempts)
+    manager.pool = pool
+    return manager
+
+
+def _trades(manager, symbols):
+    for symbol in symbols:
+        assert manager.log_trade({'timestamp': 1_760_600_000_000, 'symbol': symbol, 'action': 'BUY'})
+
+
+def _flush(manager):
+    return asyncio.run(manager._flush())
+
+
+def test_bisection_commits_accepted_and_drops_refused():
+    pool = _FakePool(refused={'T2', 'T5'})
+    manager = _manager(pool)
+    symbols = [f'T{i}' for i in range(8)]
+    _trades(manager, symbols)
+
+    assert _flush(manager)
+    assert pool.committed['trade'] == [s for s in symbols if s not in ('T2', 'T5')]
+    assert manager.written['trade'] == 6
+    assert manager.dropped['trade'] == 2
+    assert manager.stats()['retry_pending'] == 0
+
+
+def test_batch_size_stats():
+    pool = _FakePool()
+    manager = _manager(pool)
+    for size in (3, 5, 1):
+        _trades(manager, [f'T{i}' for i in range(size)])
+        assert _flush(manager)
+    assert manager.stats()['batch_size'] == {'mean': 3.0, 'p50': 3, 'p99': 5, 'max': 5}
+
+
+def test_refused_tick_does_not_hold_back_trades():
+    pool = _FakePool(refused={'BADTICK'})
+    manager = _manager(pool, max_attempts=3)
+    _trades(manager, ['T0', 'T1'])
+    manager.log_tick({'timestamp': 1_760_600_000_000, 'symbol': 'BADTICK', 'type': 'FUT',
+                      'token': '1', 'ltp': 100.0})
+
+    # Trades commit on the first attempt; only the tick waits for the retry
+    assert not _flush(manager)
+    assert pool.committed['trade'] == ['T0', 'T1']
+    assert [kind for kind, _ in manager._retry] == ['tick']
+    assert manager.dropped['tick'] == 0
+
+    # Refused again until max_attempts, then isolated and dropped
+    assert not _flush(manager)
+    assert _flush(manager)
+    assert manager.dropped == {'trade': 0, 'position': 0, 'tick': 1}
+    assert pool.committed['trade'] == ['T0', 'T1']
+
+
+def test_connection_lost_while_isolating_keeps_unwritten_records():
+    pool = _FakePool(refused={'T1'})
+    manager = _manager(pool)
+    symbols = [f'T{i}' for i in range(8)]
+    _trades(manager, symbols)
+
+    # All 8 refused, T0-T3 refused, T0-T1 refused, T0 written, T1 dropped; the link drops at T2-T3
+    pool.fail_after = 5
+    assert not _flush(manager)
+    assert pool.committed['trade'] == ['T0']
+    assert manager.dropped['trade'] == 1
+    retry = [record[1] for _, record in manager._retry]
+    assert retry == ['T2', 'T3', 'T4', 'T5', 'T6', 'T7']
+
+    pool.fail_after = None
+    assert _flush(manager)
+    assert pool.committed['trade'] == ['T0'] + retry
+    assert manager.written['trade'] == 7
+    assert manager.stats()['retry_pending'] == 0
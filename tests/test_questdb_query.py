@@ -0,0 +1,66 @@
+import io
+
+import numpy as np
+import pytest
+
+from questdb_query import QueryClient, QueryUnavailable
+
+WINDOW_START = 1_760_600_000_000
+WINDOW_END = WINDOW_START + 60_000
+SQL = "SELECT timestamp, ltp FROM tick_data WHERE timestamp >= %s AND timestamp < %s"
+
+
+class _Client(QueryClient):
+    """QueryClient answering /exp from a canned CSV instead of a server."""
+
+    def __init__(self):
+        super().__init__(cache_ttl=60.0)
+        self.requests = 0
+
+    def _request(self, path, params, read):
+        self.requests += 1
+        body = f"timestamp,ltp\n2025-10-16T07:33:20.000000Z,{100 + self.requests}\n".encode()
+        return read(io.BytesIO(body))
+
+
+def _window(client):
+    return client.query(SQL, (WINDOW_START * 1000, WINDOW_END * 1000), timestamps=('timestamp',),
+                        tables=('tick_data',), until_ms=WINDOW_END)
+
+
+def test_ingest_inside_window_refetches():
+    client = _Client()
+    first = _window(client)
+    assert first['ltp'].tolist() == [101.0]
+    assert first['timestamp'].dtype == np.int64
+    assert _window(client)['ltp'].tolist() == [101.0]
+    assert client.requests == 1
+
+    client.ingested('tick_data', WINDOW_START + 30_000)
+    assert _window(client)['ltp'].tolist() == [102.0]
+    assert client.requests == 2
+    assert client.cache.stats()['invalidated'] == 1
+
+
+def test_ingest_outside_window_keeps_entry():
+    client = _Client()
+    _window(client)
+    client.ingested('tick_data', WINDOW_END)        # until_ms is exclusive
+    client.ingested('mcx_ohlc', WINDOW_START)       # another table
+    _window(client)
+    assert client.requests == 1
+
+    client.ingested('tick_data')                    # unknown range: drop to be safe
+    _window(client)
+    assert client.requests == 2
+
+
+def test_connection_failure_counted_once():
+    client = QueryClient(port=1, retry_after=60.0)   # nothing listens on port 1
+    with pytest.raises(QueryUnavailable):
+        client.query("SELECT 1", ttl=0)
+    assert client.errors == 1
+    # Within retry_after the client fails fast without another attempt or count
+    with pytest.raises(QueryUnavailable):
+        client.query("SELECT 1", ttl=0)
+    assert client.errors == 1
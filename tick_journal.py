@@ -0,0 +1,398 @@
+"""
+Write-ahead tick journal for MCX Trading System
+Every normalized tick is appended to a memory-mapped journal before it goes
+anywhere else, and the database is fed from the journal. A full session of
+ticks survives database outages and process crashes for the cost of one
+sequential write per tick.
+
+- Segments (``<dir>/<first seq>.wal``) are preallocated files of fixed-size
+  records (``RECORD``) written through a memory map. A record's ``seq`` is
+  written last and is its commit marker: when a segment is reopened, its
+  valid part is the run of records whose seq counts up from the first one.
+- ``JournalReplayer`` streams the records after its checkpoint to a sink in
+  column batches, stores the acknowledged seq in ``<dir>/checkpoint.json``
+  after each successful batch and deletes segments every sink has
+  acknowledged. While the sink is unreachable it backs off and the backlog
+  stays on disk; it is replayed in order once the sink is back, including
+  after a restart.
+- Dirty pages are flushed (msync) on every replayer pass, so a process
+  crash loses nothing and an OS crash at most the last pass interval.
+"""
+import json
+import logging
+import os
+import struct
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from timeutil import to_ms
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'MCXWAL01'
+HEADER = struct.Struct('<8sqqq')   # magic, record size, first seq, records per segment
+HEADER_BYTES = 64
+SEGMENT_RECORDS = 65536            # ~7 MB per segment
+CHECKPOINT_FILE = 'checkpoint.json'
+
+# One journaled tick; ``seq`` last, written after the rest of the record
+RECORD = np.dtype([
+    ('timestamp', '<i8'),   # epoch ms
+    ('ltp', '<f8'),
+    ('volume', '<i8'),
+    ('oi', '<i8'),
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('symbol', 'S32'),
+    ('type', 'S4'),
+    ('token', 'S12'),
+    ('seq', '<i8'),
+])
+TEXT_FIELDS = ('symbol', 'type', 'token')
+
+
+def record_columns(records: np.ndarray) -> Dict[str, np.ndarray]:
+    """Journal records as column arrays (text fields decoded to str objects)."""
+    columns = {}
+    for name in RECORD.names:
+        values = records[name]
+        columns[name] = np.char.decode(values, 'ascii').astype(object) if name in TEXT_FIELDS else values
+    return columns
+
+
+class _Segment:
+    """One mapped journal file."""
+
+    __slots__ = ('path', 'first_seq', 'capacity', 'records', 'count')
+
+    def __init__(self, path: str, first_seq: int, capacity: int, create: bool = False):
+        if create:
+            with open(path, 'wb') as f:
+                f.write(HEADER.pack(MAGIC, RECORD.itemsize, first_seq, capacity).ljust(HEADER_BYTES, b'\0'))
+                f.truncate(HEADER_BYTES + capacity * RECORD.itemsize)
+        self.path = path
+        self.first_seq = first_seq
+        self.capacity = capacity
+        self.records = np.memmap(path, dtype=RECORD, mode='r+', offset=HEADER_BYTES, shape=(capacity,))
+        self.count = 0
+
+    @classmethod
+    def open(cls, path: str) -> '_Segment':
+        with open(path, 'rb') as f:
+            magic, itemsize, first_seq, capacity = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or itemsize != RECORD.itemsize:
+            raise ValueError(f"not a tick journal segment (or an incompatible version): {path}")
+        segment = cls(path, first_seq, capacity)
+        committed = segment.records['seq'] == np.arange(first_seq, first_seq + capacity)
+        segment.count = capacity if committed.all() else int(np.argmin(committed))
+        return segment
+
+    @property
+    def last_seq(self) -> int:
+        return self.first_seq + self.count - 1
+
+    def flush(self):
+        self.records.flush()
+
+    def close(self):
+        if self.records is not None:
+            self.records.flush()
+            self.records = None
+
+
+class TickJournal:
+    """Append-only, segment-rotated journal of normalized ticks with per-sink checkpoints.
+
+    ``append`` is called from one thread (the persist stage); replayers read
+    and trim from their own threads.
+    """
+
+    def __init__(self, directory: str, segment_records: int = SEGMENT_RECORDS, max_segments: int = 256,
+                 batch_size: int = 1000):
+        self.directory = directory
+        self.segment_records = segment_records
+        self.max_segments = max_segments
+        self.batch_size = batch_size
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()   # guards the segment list and checkpoints
+        self._ready = threading.Event()
+        self._segments: List[_Segment] = []
+        self._acks: Dict[str, int] = self._load_checkpoint()
+
+        # Counters
+        self.appended = 0
+        self.lost = 0
+
+        for name in sorted(os.listdir(directory)):
+            if not name.endswith('.wal'):
+                continue
+            path = os.path.join(directory, name)
+            try:
+                segment = _Segment.open(path)
+            except (OSError, ValueError, struct.error) as e:
+                logger.error(f"❌ Skipping unreadable journal segment {path}: {e}")
+                continue
+            if segment.count:
+                self._segments.append(segment)
+            else:
+                segment.close()
+                os.remove(path)
+        self._segments.sort(key=lambda segment: segment.first_seq)
+        last = self._segments[-1].last_seq if self._segments else 0
+        self.next_seq = max([last] + list(self._acks.values())) + 1
+        # Reopened segments are sealed; the first append starts a new one
+        self._active: Optional[_Segment] = None
+        if self._segments:
+            backlog = self.next_seq - 1 - min(self._acks.values(), default=0)
+            logger.info(f"📒 Tick journal reopened: {len(self._segments)} segments, next seq {self.next_seq}, "
+                        f"{backlog} ticks not yet acknowledged")
+
+    # ------------------------------------------------------------------
+    # Write path
+    # ------------------------------------------------------------------
+
+    def _rotate(self) -> _Segment:
+        segment = _Segment(os.path.join(self.directory, f"{self.next_seq:016d}.wal"), self.next_seq,
+                           self.segment_records, create=True)
+        with self._lock:
+            if self._active is not None:
+                self._active.flush()
+            self._segments.append(segment)
+            self._active = segment
+            while len(self._segments) > self.max_segments:
+                oldest = self._segments.pop(0)
+                self.lost += oldest.count
+                logger.error(f"❌ Tick journal over {self.max_segments} segments: dropped {oldest.count} "
+                             f"unacknowledged ticks from {oldest.path}")
+                self._remove(oldest)
+        return segment
+
+    def append(self, tick: Dict[str, Any]) -> int:
+        """Journal one normalized tick; returns its sequence number."""
+        segment = self._active
+        if segment is None or segment.count >= segment.capacity:
+            segment = self._rotate()
+        i = segment.count
+        seq = self.next_seq
+        ts = tick.get('timestamp')
+        records = segment.records
+        records[i] = (ts if type(ts) is int else to_ms(ts) or 0, tick.get('ltp') or 0.0,
+                      tick.get('volume') or 0, tick.get('oi') or 0, tick.get('open') or 0.0,
+                      tick.get('high') or 0.0, tick.get('low') or 0.0, str(tick.get('symbol') or ''),
+                      str(tick.get('type') or ''), str(tick.get('token') or ''), 0)
+        # Commit marker last: a torn record is never counted on recovery
+        records['seq'][i] = seq
+        segment.count = i + 1
+        self.next_seq = seq + 1
+        self.appended += 1
+        if self.appended % self.batch_size == 0:
+            self._ready.set()
+        return seq
+
+    # ------------------------------------------------------------------
+    # Read / checkpoint side
+    # ------------------------------------------------------------------
+
+    def wait(self, timeout: float) -> bool:
+        """Block until ``batch_size`` more ticks were appended or ``timeout`` passes."""
+        ready = self._ready.wait(timeout)
+        self._ready.clear()
+        return ready
+
+    def read(self, after_seq: int, max_rows: int) -> np.ndarray:
+        """Copy of up to ``max_rows`` committed records after ``after_seq`` (within one segment).
+
+        If ``after_seq`` falls before the oldest segment still on disk, reading
+        resumes at the oldest record available.
+        """
+        with self._lock:
+            for segment in self._segments:
+                if segment.last_seq <= after_seq:
+                    continue
+                start = max(after_seq + 1 - segment.first_seq, 0)
+                end = min(start + max_rows, segment.count)
+                return np.array(segment.records[start:end])
+        return np.empty(0, dtype=RECORD)
+
+    def register(self, name: str) -> int:
+        """Start tracking a sink; a new sink begins at the oldest record on disk."""
+        with self._lock:
+            if name not in self._acks:
+                first = self._segments[0].first_seq if self._segments else self.next_seq
+                self._acks[name] = first - 1
+            return self._acks[name]
+
+    def acked(self, name: str) -> int:
+        return self._acks.get(name, 0)
+
+    def ack(self, name: str, seq: int):
+        """Record that ``name`` has durably stored everything up to ``seq``."""
+        with self._lock:
+            self._acks[name] = seq
+            self._save_checkpoint()
+
+    def trim(self) -> int:
+        """Delete sealed segments every sink has acknowledged; returns how many."""
+        with self._lock:
+            if not self._acks:
+                return 0
+            acked = min(self._acks.values())
+            done = [segment for segment in self._segments
+                    if segment is not self._active and segment.last_seq <= acked]
+            for segment in done:
+                self._segments.remove(segment)
+                self._remove(segment)
+        return len(done)
+
+    def flush(self):
+        """msync the segment being written."""
+        segment = self._active
+        if segment is not None:
+            segment.flush()
+
+    def close(self):
+        with self._lock:
+            for segment in self._segments:
+                segment.close()
+            self._segments = []
+            self._active = None
+
+    def _remove(self, segment: _Segment):
+        segment.close()
+        try:
+            os.remove(segment.path)
+        except OSError as e:
+            logger.warning(f"Could not remove journal segment {segment.path}: {e}")
+
+    def _load_checkpoint(self) -> Dict[str, int]:
+        path = os.path.join(self.directory, CHECKPOINT_FILE)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return {name: int(seq) for name, seq in json.load(f).items()}
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError, AttributeError) as e:
+            logger.error(f"❌ Unreadable journal checkpoint {path}, replaying from the oldest segment: {e}")
+            return {}
+
+    def _save_checkpoint(self):
+        path = os.path.join(self.directory, CHECKPOINT_FILE)
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self._acks, f)
+        os.replace(tmp, path)
+
+    def stats(self) -> Dict[str, Any]:
+        last = self.next_seq - 1
+        return {
+            'next_seq': self.next_seq,
+            'appended': self.appended,
+            'segments': len(self._segments),
+            'disk_mb': round(len(self._segments) * self.segment_records * RECORD.itemsize / 1e6, 1),
+            'acked': dict(self._acks),
+            'lag': {name: last - seq for name, seq in self._acks.items()},
+            'lost': self.lost,
+        }
+
+
+class JournalReplayer:
+    """Streams journal records to one sink, checkpointing after each acknowledged batch.
+
+    ``sink`` receives ``record_columns`` of up to ``batch_size`` records and
+    must raise if they were not stored; the same records are offered again
+    after a backoff.
+    """
+
+    def __init__(self, journal: TickJournal, name: str, sink: Callable[[Dict[str, np.ndarray]], None],
+                 batch_size: int = 5000, interval: float = 1.0, max_backoff: float = 30.0):
+        self.journal = journal
+        self.name = name
+        self.sink = sink
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self.journal.register(name)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._backoff = 0.0
+        self._outage_started: Optional[float] = None
+
+        # Counters
+        self.replayed = 0
+        self.batches = 0
+        self.failures = 0
+        self.skipped = 0
+
+    def pump(self) -> int:
+        """Send everything committed after the checkpoint; returns the number of records sent."""
+        sent = 0
+        while not self._stop.is_set():
+            acked = self.journal.acked(self.name)
+            records = self.journal.read(acked, self.batch_size)
+            if not len(records):
+                break
+            first = int(records['seq'][0])
+            if first != acked + 1:
+                self.skipped += first - acked - 1
+                logger.error(f"❌ Journal sink '{self.name}': seq {acked + 1}..{first - 1} no longer on disk")
+            self.sink(record_columns(records))
+            self.journal.ack(self.name, int(records['seq'][-1]))
+            sent += len(records)
+            self.replayed += len(records)
+            self.batches += 1
+        self.journal.trim()
+        return sent
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self._backoff:
+                self._stop.wait(self._backoff)
+            else:
+                self.journal.wait(self.interval)
+            try:
+                self.journal.flush()
+                sent = self.pump()
+            except Exception as e:
+                self.failures += 1
+                self._backoff = min(max(self._backoff * 2, 1.0), self.max_backoff)
+                if self._outage_started is None:
+                    self._outage_started = time.time()
+                    logger.warning(f"⚠️ Journal sink '{self.name}' unavailable, keeping ticks on disk: {e}")
+                else:
+                    logger.debug(f"Journal sink '{self.name}' still unavailable: {e}")
+                continue
+            self._backoff = 0.0
+            if self._outage_started is not None:
+                logger.info(f"✅ Journal sink '{self.name}' back after {time.time() - self._outage_started:.0f}s, "
+                            f"replayed {sent} ticks")
+                self._outage_started = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name=f"JournalReplay-{self.name}")
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop after the current batch (what is not acknowledged is replayed on the next start)."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'acked': self.journal.acked(self.name),
+            'lag': self.journal.next_seq - 1 - self.journal.acked(self.name),
+            'replayed': self.replayed,
+            'batches': self.batches,
+            'failures': self.failures,
+            'skipped': self.skipped,
+            'connected': self._outage_started is None,
+            'backoff_s': self._backoff,
+        }
@@ -0,0 +1,101 @@
+"""
+Staged tick pipeline for MCX Trading System
+Decouples websocket receive from normalisation, persistence, strategy
+evaluation, order execution and UI publishing.
+
+Each stage owns a bounded queue (``bounded_queue``) and a single worker
+thread, so a slow stage only backs up its own queue. The stage's overflow
+policy decides what happens when that queue is full; drops are counted per
+queue, not logged per tick.
+"""
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from bounded_queue import DROP_OLDEST, BoundedQueue
+
+logger = logging.getLogger(__name__)
+
+
+class PipelineStage:
+    """One pipeline stage: bounded queue + worker thread."""
+
+    def __init__(self, name: str, handler: Callable[[Any], None], maxsize: int = 1000,
+                 policy: str = DROP_OLDEST, key: Optional[Callable[[Any], Hashable]] = None, **queue_options):
+        self.name = name
+        self.handler = handler
+        self.queue = BoundedQueue(f"pipeline.{name}", maxsize, policy, key=key, **queue_options)
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+        # Counters
+        self.processed = 0
+        self.errors = 0
+
+    def __len__(self) -> int:
+        return len(self.queue)
+
+    def submit(self, item: Any) -> bool:
+        """Enqueue under the stage's policy. Returns False if the item was rejected."""
+        return self.queue.put(item)
+
+    def _run(self):
+        while self._running:
+            item, ok = self.queue.get(0.5)
+            if not ok:
+                continue
+            try:
+                self.handler(item)
+                self.processed += 1
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"❌ Pipeline stage '{self.name}' error: {e}", exc_info=True)
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True, name=f"Pipeline-{self.name}")
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.queue.close()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.queue.stats()
+        stats.update(processed=self.processed, errors=self.errors)
+        return stats
+
+
+class TickPipeline:
+    """Named collection of stages started and stopped together."""
+
+    def __init__(self):
+        self.stages: Dict[str, PipelineStage] = {}
+        self.started_at: Optional[float] = None
+
+    def add_stage(self, name: str, handler: Callable[[Any], None], **kwargs) -> PipelineStage:
+        stage = PipelineStage(name, handler, **kwargs)
+        self.stages[name] = stage
+        return stage
+
+    def submit(self, name: str, item: Any) -> bool:
+        return self.stages[name].submit(item)
+
+    def start(self):
+        for stage in self.stages.values():
+            stage.start()
+        self.started_at = time.time()
+        logger.info(f"✅ Tick pipeline started with stages: {', '.join(self.stages)}")
+
+    def stop(self):
+        for stage in self.stages.values():
+            stage.stop()
+        logger.info("Tick pipeline stopped")
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: stage.stats() for name, stage in self.stages.items()}
@@ -0,0 +1,265 @@
+"""
+Indexed in-memory tick store for MCX Trading System
+The last N normalized ticks (all contracts) kept as fixed-capacity typed
+columns, with secondary indexes so per-contract reads never scan the store.
+
+- Rows live in preallocated NumPy columns addressed by a global sequence
+  number (slot = seq % capacity): append and eviction are O(1) and nothing is
+  ever copied or trimmed.
+- ``symbol``, ``type`` and ``token`` are interned to small integer codes;
+  each distinct value keeps a ring of the sequence numbers it appeared at,
+  so "last N ticks for CE" gathers exactly N rows.
+- Writes are bracketed by a ``SeqLock`` (single writer); readers take
+  consistent copies from any thread without blocking it.
+
+Run ``python tick_store.py`` to compare with the list-of-dicts storage it
+replaces.
+"""
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from ring_buffer import SeqLock
+from timeutil import to_ms
+
+logger = logging.getLogger(__name__)
+
+# Numeric tick fields; the key fields below are stored as interned codes
+VALUE_COLUMNS = {
+    'timestamp': np.int64,   # epoch ms
+    'ltp': np.float64,
+    'volume': np.int64,
+    'oi': np.int64,
+    'open': np.float64,
+    'high': np.float64,
+    'low': np.float64,
+}
+KEY_COLUMNS = ('symbol', 'type', 'token')
+
+
+class _KeyIndex:
+    """Sequence numbers at which one key value was appended, newest last.
+
+    Grows by doubling up to the store capacity, then wraps; entries older
+    than the store's oldest row are skipped on read.
+    """
+
+    __slots__ = ('seqs', 'count')
+
+    def __init__(self, size: int = 64):
+        self.seqs = np.empty(size, dtype=np.int64)
+        self.count = 0
+
+    def append(self, seq: int, capacity: int):
+        size = len(self.seqs)
+        if self.count == size and size < capacity:
+            grown = np.empty(min(size * 2, capacity), dtype=np.int64)
+            grown[:size] = self.seqs
+            self.seqs = grown
+            size = len(grown)
+        self.seqs[self.count % size] = seq
+        self.count += 1
+
+    def newest(self, n: Optional[int], oldest_seq: int) -> np.ndarray:
+        """Up to ``n`` newest live sequence numbers, oldest first."""
+        size = len(self.seqs)
+        m = min(self.count, size)
+        if n is not None:
+            m = min(m, n)
+        positions = np.arange(self.count - m, self.count) % size
+        seqs = self.seqs[positions]
+        # Evicted rows are the oldest entries; seqs are increasing
+        return seqs[np.searchsorted(seqs, oldest_seq):]
+
+
+class TickStore:
+    """Fixed-capacity columnar tick ring with per-symbol/type/token indexes."""
+
+    def __init__(self, capacity: int = 100_000, columns: Optional[Dict[str, Any]] = None,
+                 keys: Iterable[str] = KEY_COLUMNS):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = int(capacity)
+        self.dtypes = {name: np.dtype(dtype) for name, dtype in (columns or VALUE_COLUMNS).items()}
+        self.keys = tuple(keys)
+        self._columns = {name: np.zeros(self.capacity, dtype=dtype) for name, dtype in self.dtypes.items()}
+        # Interned key values: code -> value per key column, plus the reverse map
+        self._codes = {key: np.zeros(self.capacity, dtype=np.int32) for key in self.keys}
+        self._values: Dict[str, List[str]] = {key: [] for key in self.keys}
+        self._lookup: Dict[str, Dict[str, int]] = {key: {} for key in self.keys}
+        self._indexes: Dict[str, List[_KeyIndex]] = {key: [] for key in self.keys}
+        self._seq = 0   # sequence number of the next row
+        self.seqlock = SeqLock()
+
+    def __len__(self) -> int:
+        return min(self._seq, self.capacity)
+
+    @property
+    def appended(self) -> int:
+        return self._seq
+
+    def _code(self, key: str, value) -> int:
+        value = value if type(value) is str else ('' if value is None else str(value))
+        lookup = self._lookup[key]
+        code = lookup.get(value)
+        if code is None:
+            code = lookup[value] = len(self._values[key])
+            self._values[key].append(value)
+            self._indexes[key].append(_KeyIndex())
+        return code
+
+    def append(self, tick: Dict[str, Any]):
+        """Store one tick dict; missing numeric fields are stored as 0."""
+        seq = self._seq
+        slot = seq % self.capacity
+        codes = [(key, self._code(key, tick.get(key))) for key in self.keys]
+        with self.seqlock:
+            for name, column in self._columns.items():
+                value = tick.get(name)
+                if name == 'timestamp' and type(value) is not int:
+                    value = to_ms(value)
+                column[slot] = 0 if value is None else value
+            for key, code in codes:
+                self._codes[key][slot] = code
+                self._indexes[key][code].append(seq, self.capacity)
+            self._seq = seq + 1
+
+    def clear(self):
+        with self.seqlock:
+            for key in self.keys:
+                self._values[key] = []
+                self._lookup[key] = {}
+                self._indexes[key] = []
+            self._seq = 0
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def _select(self, n: Optional[int], filters: Dict[str, Any]) -> np.ndarray:
+        """Sequence numbers of the newest ``n`` rows matching ``filters``, oldest first."""
+        total = self._seq
+        oldest = max(total - self.capacity, 0)
+        if not filters:
+            m = total - oldest if n is None else min(n, total - oldest)
+            return np.arange(total - m, total, dtype=np.int64)
+        indexes = []
+        for key, value in filters.items():
+            code = self._lookup[key].get(value if type(value) is str else str(value))
+            if code is None:
+                return np.empty(0, dtype=np.int64)
+            indexes.append((key, code, self._indexes[key][code]))
+        # Walk the smallest index; any other filters are checked on its rows
+        indexes.sort(key=lambda entry: entry[2].count)
+        _, _, index = indexes[0]
+        if len(indexes) == 1:
+            return index.newest(n, oldest)
+        seqs = index.newest(None, oldest)
+        slots = seqs % self.capacity
+        keep = np.ones(len(seqs), dtype=bool)
+        for key, code, _ in indexes[1:]:
+            keep &= self._codes[key][slots] == code
+        seqs = seqs[keep]
+        return seqs if n is None else seqs[max(len(seqs) - n, 0):]
+
+    def columns(self, n: Optional[int] = None, **filters) -> Dict[str, np.ndarray]:
+        """Newest ``n`` matching ticks as column arrays, oldest first (key columns decoded to str).
+
+        ``filters`` are exact matches on key columns, e.g. ``type='CE'`` or
+        ``symbol=..., type=...``. Safe to call from any thread.
+        """
+        unknown = set(filters) - set(self.keys)
+        if unknown:
+            raise ValueError(f"Not an indexed column: {', '.join(sorted(unknown))}")
+        filters = {key: value for key, value in filters.items() if value is not None}
+
+        def read():
+            slots = self._select(n, filters) % self.capacity
+            data = {name: column[slots] for name, column in self._columns.items()}
+            for key in self.keys:
+                codes = self._codes[key][slots]
+                # Copy the table reference under the read so codes and values agree
+                values = self._values[key]
+                data[key] = np.array(values, dtype=object)[codes] if len(values) else codes.astype(object)
+            return data
+
+        return self.seqlock.read(read)
+
+    def records(self, n: Optional[int] = None, **filters) -> List[Dict[str, Any]]:
+        """Like ``columns`` but as tick dicts of Python scalars (only the returned rows are built)."""
+        data = self.columns(n, **filters)
+        names = list(data)
+        return [dict(zip(names, row)) for row in zip(*(data[name].tolist() for name in names))]
+
+    def values(self, key: str) -> List[str]:
+        """Distinct values seen for a key column."""
+        return list(self._values[key])
+
+    def stats(self) -> Dict[str, Any]:
+        nbytes = sum(column.nbytes for column in self._columns.values())
+        nbytes += sum(codes.nbytes for codes in self._codes.values())
+        nbytes += sum(index.seqs.nbytes for indexes in self._indexes.values() for index in indexes)
+        return {
+            'size': len(self),
+            'capacity': self.capacity,
+            'appended': self._seq,
+            'keys': {key: len(values) for key, values in self._values.items()},
+            'memory_mb': round(nbytes / 1e6, 2),
+        }
+
+
+# ---------------------------------------------------------------------------
+# Benchmark
+# ---------------------------------------------------------------------------
+
+def _benchmark(capacity: int = 100_000, extra: int = 2_000):
+    """Append cost once the store is full, per-contract reads and memory, against a trimmed list."""
+    import sys
+
+    n = capacity + extra
+    base = 1_760_600_000_000
+    kinds = ('CE', 'PE', 'FUT')
+    ticks = [{'token': str(400000 + i % 21), 'symbol': f"CRUDEOIL25OCT{5400 + i % 21 * 50}{kinds[i % 21 % 3]}",
+              'type': kinds[i % 21 % 3], 'ltp': 100.0 + i % 97 * 0.05, 'volume': 1000 + i, 'oi': 5000 + i % 13,
+              'open': 101.0, 'high': 110.0, 'low': 95.0, 'timestamp': base + i * 37} for i in range(n)]
+
+    storage = ticks[:capacity]
+    store = TickStore(capacity)
+    for tick in storage:
+        store.append(tick)
+
+    start = time.perf_counter()
+    for tick in ticks[capacity:]:
+        storage.append(tick)
+        if len(storage) > capacity:
+            storage = storage[-capacity:]
+    legacy = (time.perf_counter() - start) / extra * 1e6
+    start = time.perf_counter()
+    for tick in ticks[capacity:]:
+        store.append(tick)
+    indexed = (time.perf_counter() - start) / extra * 1e6
+    print(f"append when full: list + trim {legacy:9.2f} us/tick, TickStore {indexed:6.2f} us/tick")
+
+    symbol = ticks[-1]['symbol']
+    for label, legacy, indexed in (
+            ("last 1000 CE", lambda: [t for t in storage if t.get('type') == 'CE'][-1000:],
+             lambda: store.records(1000, type='CE')),
+            ("last 100 of one contract", lambda: [t for t in storage if t.get('symbol') == symbol][-100:],
+             lambda: store.records(100, symbol=symbol))):
+        assert legacy() == indexed()
+        timings = []
+        for fn in (legacy, indexed):
+            start = time.perf_counter()
+            for _ in range(20):
+                fn()
+            timings.append((time.perf_counter() - start) / 20 * 1e3)
+        print(f"{label:>24}: list scan {timings[0]:7.2f} ms, indexed {timings[1]:7.3f} ms")
+
+    dict_bytes = sum(sys.getsizeof(t) + sum(sys.getsizeof(v) for v in t.values()) for t in storage[:1000]) / 1000
+    print(f"memory: ~{dict_bytes * capacity / 1e6:.0f} MB as dicts, {store.stats()['memory_mb']} MB in the store")
+
+
+if __name__ == '__main__':
+    _benchmark()
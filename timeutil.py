@@ -0,0 +1,153 @@
+"""
+Epoch-millisecond time helpers for MCX Trading System
+The tick path carries one ``int`` timestamp (UTC epoch milliseconds) from the
+websocket to storage; candle bucketing is integer arithmetic and conversion
+to IST happens only when something is rendered for a human.
+
+Run ``python timeutil.py`` to benchmark the integer path against the pandas
+``Timestamp`` round trips it replaces.
+"""
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# IST has no DST, so a fixed offset is exact and much cheaper than pytz
+IST_OFFSET_MS = 19_800_000
+IST = timezone(timedelta(milliseconds=IST_OFFSET_MS), 'IST')
+IST_NAME = 'Asia/Kolkata'
+
+_UNIT_MS = {'ms': 1, 's': 1000, 'min': 60_000, 'h': 3_600_000, 'd': 86_400_000}
+
+
+def now_ms() -> int:
+    return time.time_ns() // 1_000_000
+
+
+def tick_ms(message) -> int:
+    """Exchange timestamp of a raw SmartAPI tick (falls back to the local clock)."""
+    exchange_ms = message.get('exchange_timestamp')
+    return int(exchange_ms) if exchange_ms else now_ms()
+
+
+@lru_cache(maxsize=64)
+def interval_ms(interval: str) -> int:
+    """Length of a pandas-style interval string ('1s', '5min', '1h', '1d') in milliseconds."""
+    for unit in ('min', 'ms', 's', 'h', 'd'):
+        if interval.endswith(unit):
+            count = interval[:-len(unit)]
+            return (int(count) if count else 1) * _UNIT_MS[unit]
+    raise ValueError(f"Unsupported interval: {interval}")
+
+
+def floor_ms(ts_ms: int, step_ms: int) -> int:
+    """Start of the bucket containing ``ts_ms``.
+
+    Buckets align to the epoch, which is also IST-aligned for every interval
+    up to 30 minutes (the IST offset is a whole number of half hours).
+    """
+    return ts_ms - ts_ms % step_ms
+
+
+def floor_ist_ms(ts_ms: int, step_ms: int) -> int:
+    """Start of the bucket containing ``ts_ms``, aligned to IST midnight (hourly/daily bars start on the hour)."""
+    return ts_ms - (ts_ms + IST_OFFSET_MS) % step_ms
+
+
+def to_ms(value) -> Optional[int]:
+    """Best-effort conversion of legacy timestamps (datetime, Timestamp, ISO string) to epoch ms."""
+    if value is None:
+        return None
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, datetime) and not isinstance(value, pd.Timestamp):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=IST)
+        return int(value.timestamp() * 1000)
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize(IST_NAME)
+    return ts.value // 1_000_000
+
+
+def to_ist(ts_ms: int) -> datetime:
+    return datetime.fromtimestamp(ts_ms / 1000, IST)
+
+
+def ist_isoformat(ts_ms: int) -> str:
+    return to_ist(ts_ms).isoformat()
+
+
+def ist_label(ts_ms: int) -> str:
+    """Naive IST wall-clock label, e.g. '2025-10-16 14:03:05'."""
+    return datetime.fromtimestamp(ts_ms / 1000, IST).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def ist_index(ts_ms) -> pd.DatetimeIndex:
+    """Vectorised conversion of an array of epoch ms to a tz-aware IST index."""
+    return pd.to_datetime(np.asarray(ts_ms, dtype=np.int64), unit='ms', utc=True).tz_convert(IST_NAME)
+
+
+def ms_series(values: pd.Series) -> pd.Series:
+    """Epoch-ms int64 series from a column of ints, datetimes or strings."""
+    if pd.api.types.is_integer_dtype(values):
+        return values.astype(np.int64)
+    if pd.api.types.is_numeric_dtype(values):
+        return values.round().astype(np.int64)
+    numeric = pd.to_numeric(values, errors='coerce')
+    text = values[numeric.isna()]
+    if text.empty:
+        return numeric.round().astype(np.int64)
+    parsed = pd.to_datetime(text, errors='coerce', format='mixed')
+    if not pd.api.types.is_datetime64_any_dtype(parsed):
+        # Mixed UTC offsets come back as objects
+        parsed = pd.to_datetime(text, errors='coerce', utc=True, format='mixed')
+    if parsed.dt.tz is None:
+        parsed = parsed.dt.tz_localize(IST_NAME)
+    numeric[text.index] = parsed.dt.tz_convert('UTC').astype('int64') // 1_000_000
+    return numeric.fillna(-1).round().astype(np.int64)
+
+
+def _benchmark(n: int = 200_000):
+    import pytz
+
+    ist = pytz.timezone(IST_NAME)
+    intervals = ["1s", "5s", "10s", "30s", "1min", "5min"]
+    base = 1_760_600_000_000
+    stamps = [base + i * 137 for i in range(n)]
+
+    def legacy(ms):
+        # What each tick used to cost: tz-aware Timestamp, then per-interval round trip
+        tick_time = pd.to_datetime(ms, unit='ms').tz_localize('UTC').tz_convert(ist)
+        for interval in intervals:
+            if interval.endswith('s'):
+                seconds = int(interval[:-1])
+            else:
+                seconds = int(interval[:-3]) * 60
+            rounded = int(tick_time.timestamp() / seconds) * seconds
+            datetime.fromtimestamp(rounded).strftime('%Y-%m-%d %H:%M:%S')
+        pd.Timestamp(tick_time).floor('s')
+
+    steps = [interval_ms(i) for i in intervals]
+
+    def fast(ms):
+        for step in steps:
+            ms - ms % step
+        ms - ms % 1000
+
+    for name, fn, count in (('pandas Timestamp', legacy, n // 20), ('int64 epoch ms', fast, n)):
+        started = time.perf_counter()
+        for ms in stamps[:count]:
+            fn(ms)
+        per_tick = (time.perf_counter() - started) / count * 1e6
+        print(f"{name:>18}: {per_tick:8.3f} us/tick ({count} ticks, {len(intervals)} intervals + 1s cache)")
+
+
+if __name__ == '__main__':
+    _benchmark()
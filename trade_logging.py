@@ -0,0 +1,229 @@
+"""
+Hot-path logging for MCX Trading System
+Log calls only enqueue records; one background thread formats them and does
+all console/file I/O, so disk latency never shows up in tick latency.
+
+- ``setup_logging`` routes the root logger through a queue with console and
+  rotating-file handlers behind it.
+- ``SampleFilter`` keeps 1 in N records per call site, ``RateLimitFilter``
+  caps records per second per logger; both are attached by logger name.
+- ``TickLog`` writes raw ticks as compact JSON lines to a daily file kept
+  apart from the human-readable application log.
+"""
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+
+def parse_size(value) -> int:
+    """'10MB' / '512KB' / '1048576' -> bytes."""
+    text = str(value).strip().upper()
+    for suffix, factor in (('GB', 1 << 30), ('MB', 1 << 20), ('KB', 1 << 10), ('B', 1)):
+        if text.endswith(suffix):
+            return int(float(text[:-len(suffix)]) * factor)
+    return int(text)
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that defers message formatting to the listener thread.
+
+    The stdlib handler formats in ``prepare`` on the calling thread; here the
+    record (with its ``msg``/``args``) is queued as-is. Callers must use
+    %-style arguments with immutable values for this to be safe.
+    """
+
+    def __init__(self, records):
+        super().__init__(records)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class SampleFilter(logging.Filter):
+    """Pass the first of every ``every`` records from each call site."""
+
+    def __init__(self, every: int):
+        super().__init__()
+        self.every = max(1, int(every))
+        self._counts: Dict[Any, int] = {}
+
+    def filter(self, record) -> bool:
+        site = (record.pathname, record.lineno)
+        count = self._counts.get(site, 0)
+        self._counts[site] = count + 1
+        return count % self.every == 0
+
+
+class RateLimitFilter(logging.Filter):
+    """Token bucket: at most ``rate`` records per second (bursts up to ``burst``)."""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        super().__init__()
+        self.rate = float(rate)
+        self.burst = float(burst or max(1, int(rate)))
+        self._tokens = self.burst
+        self._last = time.monotonic()
+        self.suppressed = 0
+
+    def filter(self, record) -> bool:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return True
+        self.suppressed += 1
+        return False
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[LazyQueueHandler] = None
+
+
+def setup_logging(level='INFO', log_file: Optional[str] = None, max_bytes=10 << 20,
+                  backup_count: int = 5, queue_size: int = 100000,
+                  sample: Optional[Dict[str, int]] = None,
+                  rate_limit: Optional[Dict[str, float]] = None) -> logging.Logger:
+    """Install the queue-backed root logger (idempotent) and return it.
+
+    ``sample`` maps logger names to N (keep 1 in N), ``rate_limit`` maps
+    logger names to records per second.
+    """
+    global _listener, _queue_handler
+    root = logging.getLogger()
+    root.setLevel(level)
+    if _listener is None:
+        formatter = logging.Formatter(LOG_FORMAT)
+        handlers = [logging.StreamHandler()]
+        if log_file:
+            os.makedirs(os.path.dirname(log_file) or '.', exist_ok=True)
+            handlers.append(logging.handlers.RotatingFileHandler(
+                log_file, maxBytes=parse_size(max_bytes), backupCount=backup_count, encoding='utf-8'))
+        for handler in handlers:
+            handler.setFormatter(formatter)
+        records = queue.Queue(maxsize=queue_size)
+        _queue_handler = LazyQueueHandler(records)
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(_queue_handler)
+        _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+        _listener.start()
+    for name, every in (sample or {}).items():
+        if every and int(every) > 1:
+            logging.getLogger(name).addFilter(SampleFilter(every))
+    for name, rate in (rate_limit or {}).items():
+        if rate:
+            logging.getLogger(name).addFilter(RateLimitFilter(rate))
+    return root
+
+
+def stop_logging():
+    """Drain queued records (call at exit)."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def logging_stats() -> Dict[str, Any]:
+    handler = _queue_handler
+    return {
+        'queued': handler.queue.qsize() if handler else 0,
+        'dropped': handler.dropped if handler else 0,
+    }
+
+
+class TickLog:
+    """Append-only JSON-lines tick log, one file per day (``<dir>/YYYYMMDD.jsonl``).
+
+    ``write`` appends to a bounded deque (oldest ticks are dropped if the
+    writer falls behind); the writer thread serialises and flushes in batches.
+    """
+
+    def __init__(self, directory: str = os.path.join('logs', 'ticks'), maxlen: int = 100000,
+                 flush_seconds: float = 1.0):
+        self.directory = directory
+        self.flush_seconds = flush_seconds
+        self._pending = deque(maxlen=maxlen)
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self._file = None
+        self._day = None
+        self.written = 0
+        self.submitted = 0
+
+    def write(self, record: Dict[str, Any]):
+        self._pending.append(record)
+        self.submitted += 1
+
+    def _open(self, day: str):
+        if self._file is not None:
+            self._file.close()
+        os.makedirs(self.directory, exist_ok=True)
+        self._file = open(os.path.join(self.directory, f"{day}.jsonl"), 'a', encoding='utf-8')
+        self._day = day
+
+    def flush(self):
+        pending = self._pending
+        if not pending:
+            return
+        day = datetime.now().strftime('%Y%m%d')
+        if day != self._day:
+            self._open(day)
+        dumps = json.dumps
+        lines = []
+        while pending:
+            lines.append(dumps(pending.popleft(), separators=(',', ':'), default=str))
+        self._file.write('\n'.join(lines) + '\n')
+        self._file.flush()
+        self.written += len(lines)
+
+    def _run(self):
+        while self._running:
+            time.sleep(self.flush_seconds)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"❌ Tick log write error: {e}")
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True, name="TickLog")
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(self.flush_seconds + 1)
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'submitted': self.submitted,
+            'written': self.written,
+            'dropped': max(0, self.submitted - self.written - len(self._pending)),
+            'pending': len(self._pending),
+        }
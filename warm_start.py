@@ -0,0 +1,302 @@
+"""
+Warm start for MCX Trading System
+Periodic binary snapshots of live bars, recent ticks and strategy tick
+windows, restored at boot so charts and indicators are ready immediately.
+
+- ``snapshot`` writes one uncompressed ``.npz`` (written aside, then
+  atomically replaced); loading it is a few array copies, no parsing.
+- Strategy windows are restored only when the snapshot is from today's IST
+  day. Indicator state is re-seeded from the window
+  (``HighWinRateStrategy.restore_window``), which reproduces the streaming
+  state exactly.
+- Without a usable snapshot, ``backfill`` replays the last N minutes of
+  ticks from QuestDB ``mcx_ticks`` or, failing that, the JSON-lines tick
+  archive (``trade_logging.TickLog``).
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from market_calendar import ist_day
+from timeutil import now_ms
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+# strategy_for(token, contract_type) -> strategy; strategies() -> {token: (contract_type, strategy)}
+StrategyFactory = Callable[[str, str], Any]
+StrategyProvider = Callable[[], Dict[str, Tuple[str, Any]]]
+
+
+class WarmStart:
+    """Snapshots live state every ``interval`` seconds and restores it at boot."""
+
+    def __init__(self, path: str, market_data, strategies: StrategyProvider, interval: float = 30.0):
+        self.path = path
+        self.market_data = market_data
+        self.strategies = strategies
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # Counters
+        self.snapshots = 0
+        self.snapshot_errors = 0
+        self.last_snapshot_ms: Optional[int] = None
+        self.last_snapshot_bytes = 0
+        self.last_snapshot_seconds = 0.0
+        self.restored: Dict[str, Any] = {}
+
+    # ------------------------------------------------------------------
+    # Snapshot
+    # ------------------------------------------------------------------
+
+    def snapshot(self):
+        started = time.perf_counter()
+        arrays = self.market_data.export_state()
+        strategies, windows = {}, {}
+        for token, (contract_type, strategy) in self.strategies().items():
+            columns, state = strategy.warm_state()
+            if not len(columns.get('timestamp', ())):
+                continue
+            strategies[token] = {'type': contract_type, **state}
+            windows[token] = columns
+        arrays.update({f"strategy|{name}": values for name, values in pack_tables(windows).items()})
+        saved_ms = now_ms()
+        arrays['meta'] = np.array(json.dumps({'version': SNAPSHOT_VERSION, 'saved_ms': saved_ms,
+                                              'strategies': strategies}))
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp = f"{self.path}.tmp.npz"
+        np.savez(tmp, **arrays)
+        os.replace(tmp, self.path)
+        self.snapshots += 1
+        self.last_snapshot_ms = saved_ms
+        self.last_snapshot_bytes = os.path.getsize(self.path)
+        self.last_snapshot_seconds = time.perf_counter() - started
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.snapshot()
+            except Exception as e:
+                self.snapshot_errors += 1
+                logger.error(f"❌ Warm-start snapshot failed: {e}")
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="WarmStart")
+        self._thread.start()
+
+    def stop(self):
+        """Stop the snapshot thread and write a final snapshot."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        try:
+            self.snapshot()
+        except Exception as e:
+            logger.error(f"❌ Final warm-start snapshot failed: {e}")
+
+    # ------------------------------------------------------------------
+    # Restore
+    # ------------------------------------------------------------------
+
+    def restore(self, strategy_for: StrategyFactory) -> bool:
+        """Load the snapshot into the market data service and strategies; False if there is none."""
+        if not os.path.isfile(self.path):
+            return False
+        started = time.perf_counter()
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                arrays = {name: data[name] for name in data.files}
+            meta = json.loads(str(arrays.pop('meta')))
+        except Exception as e:
+            logger.error(f"❌ Unreadable warm-start snapshot {self.path}: {e}")
+            return False
+        if meta.get('version') != SNAPSHOT_VERSION:
+            logger.warning(f"Warm-start snapshot version {meta.get('version')} is not supported; ignoring it")
+            return False
+
+        packed, state = {}, {}
+        for name, values in arrays.items():
+            if name.startswith('strategy|'):
+                packed[name.split('|', 1)[1]] = values
+            else:
+                state[name] = values
+        windows = unpack_tables(packed)
+        contracts = self.market_data.load_state(state)
+
+        restored_windows = 0
+        saved_ms = int(meta['saved_ms'])
+        if ist_day(saved_ms) == ist_day(now_ms()):
+            for token, scalars in meta.get('strategies', {}).items():
+                if token in windows:
+                    strategy_for(token, scalars.pop('type')).restore_window(windows[token], scalars)
+                    restored_windows += 1
+        else:
+            logger.info("Warm-start snapshot is from an earlier day; strategy windows start empty")
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.restored = {'source': 'snapshot', 'contracts': contracts, 'strategies': restored_windows,
+                         'age_s': round((now_ms() - saved_ms) / 1000, 1), 'ms': round(elapsed_ms, 2)}
+        logger.info(f"♻️ Warm start from {self.path}: {contracts} contracts, {restored_windows} strategy "
+                    f"windows in {elapsed_ms:.1f} ms (snapshot age {self.restored['age_s']}s)")
+        return True
+
+    def backfill(self, strategy_for: StrategyFactory, questdb=None, archive_dir: Optional[str] = None,
+                 minutes: int = 15, token_for: Callable[[str], Optional[str]] = lambda symbol: None,
+                 symbol_for: Callable[[str], str] = lambda token: token) -> int:
+        """Replay the last ``minutes`` of ticks (QuestDB first, then the tick archive); returns ticks replayed."""
+        started = time.perf_counter()
+        since_ms = now_ms() - minutes * 60_000
+        source = 'questdb'
+        ticks = questdb.get_ticks_since(since_ms) if questdb is not None else []
+        for tick in ticks:
+            tick['token'] = token_for(tick['symbol']) or ''
+        if not ticks and archive_dir:
+            source = 'tick archive'
+            ticks = archive_ticks(archive_dir, since_ms, symbol_for)
+        if not ticks:
+            logger.info(f"No ticks from the last {minutes} minutes to backfill")
+            return 0
+        self.replay(ticks, strategy_for)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.restored = {'source': source, 'ticks': len(ticks), 'ms': round(elapsed_ms, 2)}
+        logger.info(f"♻️ Backfilled {len(ticks)} ticks ({minutes} min) from {source} in {elapsed_ms:.0f} ms")
+        return len(ticks)
+
+    def replay(self, ticks: List[Dict[str, Any]], strategy_for: StrategyFactory):
+        """Feed normalized ticks (oldest first) to the bar builder and rebuild strategy windows."""
+        windows: Dict[Tuple[str, str], deque] = {}
+        for tick in ticks:
+            self.market_data.ingest(tick)
+            token = tick.get('token')
+            if token and tick.get('type'):
+                key = (token, tick['type'])
+                if key not in windows:
+                    windows[key] = deque(maxlen=strategy_for(token, tick['type']).ticks.capacity)
+                windows[key].append(tick)
+        for (token, contract_type), rows in windows.items():
+            ltp = np.fromiter((row['ltp'] for row in rows), dtype=np.float64, count=len(rows))
+            strategy_for(token, contract_type).restore_window({
+                'timestamp': np.fromiter((row['timestamp'] for row in rows), dtype=np.int64, count=len(rows)),
+                'ltp': ltp,
+                'close': ltp,
+                'high': np.fromiter((row.get('high') or row['ltp'] for row in rows), dtype=np.float64, count=len(rows)),
+                'low': np.fromiter((row.get('low') or row['ltp'] for row in rows), dtype=np.float64, count=len(rows)),
+                'volume': np.fromiter((row['volume'] for row in rows), dtype=np.float64, count=len(rows)),
+                'oi': np.fromiter((row['oi'] for row in rows), dtype=np.float64, count=len(rows)),
+            })
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'path': self.path,
+            'snapshots': self.snapshots,
+            'snapshot_errors': self.snapshot_errors,
+            'last_snapshot_ms': self.last_snapshot_ms,
+            'last_snapshot_bytes': self.last_snapshot_bytes,
+            'last_snapshot_seconds': round(self.last_snapshot_seconds, 4),
+            'restored': self.restored,
+        }
+
+
+def pack_tables(tables: Dict[str, Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    """Numeric column tables as one float64 matrix plus names/offsets (few arrays load fast from .npz)."""
+    columns = list(dict.fromkeys(name for table in tables.values() for name in table))
+    blocks = []
+    for table in tables.values():
+        n = len(next(iter(table.values()))) if table else 0
+        blocks.append(np.column_stack([np.asarray(table[name], dtype=np.float64) if name in table
+                                       else np.full(n, np.nan) for name in columns]).reshape(n, len(columns)))
+    return {
+        'names': np.array(list(tables), dtype=str),
+        'columns': np.array(columns, dtype=str),
+        'offsets': np.cumsum([0] + [len(block) for block in blocks], dtype=np.int64),
+        'rows': np.concatenate(blocks) if blocks else np.empty((0, len(columns))),
+    }
+
+
+def unpack_tables(packed: Dict[str, np.ndarray]) -> Dict[str, Dict[str, np.ndarray]]:
+    """Inverse of ``pack_tables`` (columns come back as float64 views)."""
+    if 'names' not in packed:
+        return {}
+    columns = packed['columns'].tolist()
+    offsets, rows = packed['offsets'], packed['rows']
+    return {name: {column: rows[offsets[i]:offsets[i + 1], j] for j, column in enumerate(columns)}
+            for i, name in enumerate(packed['names'].tolist())}
+
+
+def _read_tail(path: str, since_ms: int) -> List[Dict[str, Any]]:
+    """Records of a JSON-lines tick file with ``ts`` >= ``since_ms``, reading only the file's tail."""
+    span = 1 << 20
+    with open(path, 'rb') as f:
+        size = f.seek(0, os.SEEK_END)
+        while True:
+            start = max(0, size - span)
+            f.seek(start)
+            lines = f.read().split(b'\n')
+            if start:
+                lines = lines[1:]   # first line is partial
+            first = next((line for line in lines if line.strip()), None)
+            if start == 0 or first is None or json.loads(first)['ts'] < since_ms:
+                break
+            span *= 4
+    records = []
+    for line in lines:
+        if line.strip():
+            record = json.loads(line)
+            if record.get('ts', 0) >= since_ms:
+                records.append(record)
+    return records
+
+
+def archive_ticks(directory: str, since_ms: int, symbol_for: Callable[[str], str]) -> List[Dict[str, Any]]:
+    """Normalized ticks since ``since_ms`` from the tick archive (yesterday's and today's files).
+
+    The archive keeps ltp/volume/oi only; a contract's high/low are the
+    running extremes of the archived prices, a stand-in for the day range.
+    """
+    today = datetime.now()
+    records = []
+    for day in (today - timedelta(days=1), today):
+        path = os.path.join(directory, f"{day.strftime('%Y%m%d')}.jsonl")
+        if os.path.isfile(path):
+            try:
+                records.extend(_read_tail(path, since_ms))
+            except Exception as e:
+                logger.error(f"Failed to read tick archive {path}: {e}")
+    records.sort(key=lambda record: record['ts'])
+    highs: Dict[str, float] = {}
+    lows: Dict[str, float] = {}
+    ticks = []
+    for record in records:
+        token = str(record.get('token', ''))
+        ltp = float(record.get('ltp') or 0)
+        if ltp <= 0:
+            continue
+        highs[token] = max(highs.get(token, ltp), ltp)
+        lows[token] = min(lows.get(token, ltp), ltp)
+        ticks.append({
+            'token': token,
+            'type': record.get('type', ''),
+            'symbol': symbol_for(token),
+            'timestamp': int(record['ts']),
+            'ltp': ltp,
+            'volume': int(record.get('vol') or 0),
+            'oi': int(record.get('oi') or 0),
+            'open': 0.0,
+            'high': highs[token],
+            'low': lows[token],
+        })
+    return ticks